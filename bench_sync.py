@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark pipeline sinkronisasi (scraping -> transformasi -> upsert DB) tanpa internet.
+Run: python bench_sync.py [--accounts 20 --posts 60 --latency 0.05 --rate-limit-prob 0.01]
+Memakai ReplaySource (portal/sources.py) dengan profil sintetis atau fixture (--fixtures DIR),
+dan database sementara di folder temp (DB aplikasi tidak disentuh).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sinkronisasi offline")
+    parser.add_argument("--accounts", type=int, default=20, help="Jumlah profil sintetis")
+    parser.add_argument("--posts", type=int, default=60, help="Post per profil sintetis")
+    parser.add_argument("--fixtures", help="File/folder fixture JSON (menggantikan profil sintetis)")
+    parser.add_argument("--limit", type=int, default=60, help="Maksimal post per akun")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="Detik per request simulasi")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0, help="Peluang 401 per request")
+    parser.add_argument("--cooldown", type=int, default=1, help="Cooldown global (detik) setelah rate limit")
+    parser.add_argument("--paced", action="store_true", help="Bebankan request simulasi ke pacer adaptif")
+    parser.add_argument("--runs", type=int, default=2, help="Run ke-2 dst. incremental (tanpa cache scraping)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Tulis ringkasan juga ke file ini (mis. bench_output.txt)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_path = os.path.abspath(args.output) if args.output else None
+    fixtures = os.path.abspath(args.fixtures) if args.fixtures else None
+    workdir = tempfile.mkdtemp(prefix="pln_bench_")
+    # portal.db menentukan lokasi DB dari folder kerja saat import
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import text
+
+    from portal.db import engine, init_db
+    from portal.instrumentation import PHASES
+    from portal.scraper import rate_limit_manager, scraping_cache, set_post_source
+    from portal.sources import ReplaySource, synthetic_profiles
+    from portal.sync import sync_accounts_concurrently
+
+    init_db()
+    rate_limit_manager.global_cooldown_seconds = args.cooldown
+    if not args.paced:
+        # Tanpa --paced yang diukur pipeline-nya saja: bucket per akun tidak menahan run berikutnya
+        rate_limit_manager.limiter.account_rate = 1000.0
+    options = dict(latency=args.latency, latency_jitter=args.jitter, rate_limit_prob=args.rate_limit_prob,
+                   pacer=rate_limit_manager.pacer if args.paced else None, seed=args.seed)
+    if fixtures:
+        source = ReplaySource.from_path(fixtures, **options)
+    else:
+        source = ReplaySource(synthetic_profiles(args.accounts, args.posts, seed=args.seed), **options)
+    set_post_source(source)
+    rows = [{"username_ig": p["username"], "nama_unit": p.get("full_name", p["username"]), "kategori": "Korporat"}
+            for p in source.profiles.values()]
+
+    lines = [f"Benchmark sinkronisasi offline: {len(rows)} akun, limit {args.limit}, workers {args.workers}, "
+             f"latency {args.latency}s±{args.jitter}, rate limit {args.rate_limit_prob:.1%}"]
+    try:
+        for run in range(args.runs):
+            incremental = run > 0
+            scraping_cache.clear()
+            rate_limit_manager.limiter.reset()
+            requests_before, limited_before = source.requests, source.rate_limited
+            with engine.begin() as conn:
+                metrics_before = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM sync_metrics")).scalar()
+            started = time.perf_counter()
+            summary = sync_accounts_concurrently(rows, args.limit, "Semua", max_workers=args.workers,
+                                                 incremental=incremental, notify=lambda level, message: None)
+            elapsed = time.perf_counter() - started
+            written = summary["inserted"] + summary["updated"]
+            with engine.begin() as conn:
+                phase_sums = conn.execute(text(
+                    "SELECT " + ", ".join(f"COALESCE(SUM({p}_s), 0)" for p in PHASES) +
+                    " FROM sync_metrics WHERE id > :id"), {"id": metrics_before}).fetchone()
+                total_rows = conn.execute(text("SELECT COUNT(*) FROM monitoring_pln")).scalar()
+            lines.append(
+                f"run {run + 1} ({'incremental' if incremental else 'full'}): {elapsed:.2f}s, "
+                f"{written} post ditulis ({written / elapsed:.1f} post/detik), "
+                f"insert {summary['inserted']}, update {summary['updated']}, "
+                f"request {source.requests - requests_before}, rate limit {source.rate_limited - limited_before}, "
+                f"akun rate_limited {len(summary['rate_limited'])}, gagal {len(summary['failed'])}, "
+                f"baris DB {total_rows}")
+            lines.append("    waktu per fase (detik, dijumlah semua akun): " +
+                         ", ".join(f"{p}={v:.2f}" for p, v in zip(PHASES, phase_sums)))
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = "\n".join(lines)
+    print(report)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as fh:
+            fh.write(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Cek rencana query (EXPLAIN QUERY PLAN) semua SQL statis di main.py dan query filter/pencarian
+yang disusun portal.monitoring dan portal.search.
+Run: python check_query_plans.py [file.py ...]
+Skema dibuat dari migrasi (portal/migrations) di database sementara; DB aplikasi tidak disentuh.
+Gagal (exit 1) jika query yang memfilter/join tabel besar masih full table scan, atau planner
+harus membuat index otomatis. Query tanpa WHERE yang memang membaca seluruh tabel hanya dilaporkan.
+"""
+import ast
+import itertools
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FILES = ["main.py"]
+# Tabel yang tumbuh terus; users/daftar_akun_unit cukup kecil untuk di-scan
+LARGE_TABLES = {
+    "monitoring_pln", "pengajuan_dokumentasi", "dokumentasi_calendar", "engagement_snapshots",
+    "post_keys", "sync_metrics", "sync_job_items", "follower_history",
+}
+SQL_START = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(.*)$")
+
+
+def _variants(node, names):
+    """Semua kemungkinan string untuk ekspresi SQL: konstanta, variabel, a + b, a if c else b"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, ast.Name):
+        return names(node.id)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return [a + b for a, b in itertools.product(_variants(node.left, names), _variants(node.right, names))]
+    if isinstance(node, ast.IfExp):
+        return _variants(node.body, names) + _variants(node.orelse, names)
+    return []
+
+
+class _QueryCollector(ast.NodeVisitor):
+    """Kumpulkan SQL dari text(...)/execute(...) dalam urutan kode; variabel SQL dilacak per fungsi.
+    `sql += "..."` (biasanya di dalam if) menghasilkan varian dengan dan tanpa tambahan"""
+    def __init__(self):
+        self.scopes = [{}]
+        self.queries = []
+
+    def names(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return []
+
+    def visit_FunctionDef(self, node):
+        self.scopes.append({})
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    def visit_Assign(self, node):
+        self.generic_visit(node)
+        if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            found = _variants(node.value, self.names)
+            if any(SQL_START.match(s) for s in found):
+                self.scopes[-1][node.targets[0].id] = found
+
+    def visit_AugAssign(self, node):
+        self.generic_visit(node)
+        if isinstance(node.target, ast.Name) and isinstance(node.op, ast.Add):
+            current = self.names(node.target.id)
+            if current:
+                extra = _variants(node.value, self.names)
+                self.scopes[-1][node.target.id] = current + [a + b for a in current for b in extra]
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        fname = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+        if fname in ("text", "execute") and node.args:
+            for sql in _variants(node.args[0], self.names):
+                if SQL_START.match(sql):
+                    self.queries.append((node.lineno, sql))
+
+
+def extract_queries(path):
+    """[(baris, sql)] dari text(...) dan cursor.execute(...) di file Python"""
+    with open(path, encoding="utf-8") as fh:
+        tree = ast.parse(fh.read(), path)
+    collector = _QueryCollector()
+    collector.visit(tree)
+    queries, seen = [], set()
+    for lineno, sql in collector.queries:
+        key = " ".join(sql.split())
+        if key not in seen:
+            seen.add(key)
+            queries.append((lineno, sql))
+    return sorted(queries)
+
+
+def builder_queries():
+    """[(label, sql)] query dinamis portal.monitoring / portal.search untuk kombinasi filter yang umum"""
+    from portal.monitoring import (DISTINCT_COLUMNS, build_filter, count_sql, distinct_sql, heatmap_sql, page_sql,
+                                   search_sql)
+    from portal.search import CALENDAR_FTS, CAPTION_FTS, PENGAJUAN_FTS, ranked_sql
+
+    samples = {
+        "tanpa filter": {},
+        "unit": dict(unit="UP3"),
+        "unit Unknown (NULL)": dict(unit="Unknown"),
+        "akun": dict(akun="@akun"),
+        "kategori": dict(kategori="Influencer"),
+        "kategori Korporat (NULL)": dict(kategori="Korporat"),
+        "kategori+sumber": dict(kategori="Influencer", source="Hashtag #pln"),
+        "sumber": dict(source="Manual"),
+        "tanggal": dict(date_from="2026-01-01", date_to="2026-01-31"),
+        "unit+tanggal": dict(unit="UP3", date_from="2026-01-01", date_to="2026-01-31"),
+        "kata kunci": dict(search="pln lamp"),
+        "kata kunci+unit+tanggal": dict(search="pln", unit="UP3", date_from="2026-01-01", date_to="2026-01-31"),
+    }
+    queries = []
+    for label, kwargs in samples.items():
+        where, _ = build_filter(**kwargs)
+        queries += [(f"count [{label}]", count_sql(where)), (f"page [{label}]", page_sql(where)),
+                    (f"heatmap [{label}]", heatmap_sql(where))]
+    queries += [("search [kata kunci]", search_sql()), ("search [kata kunci+unit]", search_sql(["pic_unit = :pic_unit"]))]
+    queries += [(f"ranked [{fts}]", ranked_sql(fts)) for fts in (CAPTION_FTS, PENGAJUAN_FTS, CALENDAR_FTS)]
+    return queries + [(f"distinct [{col}]", distinct_sql(col)) for col in DISTINCT_COLUMNS]
+
+
+def _bindable(sql):
+    # bindparam(expanding=True): `IN :daftar` diisi list saat eksekusi; untuk EXPLAIN cukup satu nilai
+    return re.sub(r"\bIN\s+:(\w+)", r"IN (:\1)", sql, flags=re.IGNORECASE)
+
+
+def _params(sql):
+    named = re.findall(r"(?<!:):(\w+)", sql)
+    if named:
+        return {n: None for n in named}
+    return (None,) * sql.count("?")
+
+
+def check_query(conn, sql):
+    """Return (rencana, pelanggaran, full_read)"""
+    sql = _bindable(sql)
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, _params(sql)).fetchall()]
+    filtered = re.search(r"\bWHERE\b", sql, re.IGNORECASE) is not None
+    problems, full_read, outer_seen = [], False, False
+    for detail in plan:
+        if "AUTOMATIC" in detail:
+            problems.append(f"index otomatis: {detail}")
+        m = SCAN.match(detail)
+        if not m:
+            continue
+        table, rest = m.group(1), m.group(2)
+        first_loop, outer_seen = not outer_seen, True
+        if table not in LARGE_TABLES or "INDEX" in rest:
+            continue
+        if filtered or not first_loop:
+            problems.append(f"full scan {table}: {detail}")
+        else:
+            full_read = True
+    return plan, problems, full_read
+
+
+def main(argv=None):
+    files = (argv if argv is not None else sys.argv[1:]) or DEFAULT_FILES
+    workdir = tempfile.mkdtemp(prefix="pln_plan_")
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import create_engine
+
+    from portal.migrations import current_version, run_migrations
+
+    db_path = os.path.join(workdir, "plan.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    failures = 0
+    try:
+        run_migrations(engine)
+        print(f"Skema versi {current_version(engine)} ({db_path})")
+        engine.dispose()
+        conn = sqlite3.connect(db_path)
+        sources = [(path, [(f"{path}:{lineno}", sql) for lineno, sql in extract_queries(os.path.join(ROOT, path))])
+                   for path in files]
+        sources.append(("portal.monitoring / portal.search (filter & pencarian)", builder_queries()))
+        for path, queries in sources:
+            print(f"\n{path}: {len(queries)} query")
+            for where, sql in queries:
+                one_line = " ".join(sql.split())
+                try:
+                    plan, problems, full_read = check_query(conn, sql)
+                except sqlite3.Error as e:
+                    failures += 1
+                    print(f"  ERROR  {where} {one_line[:90]}\n         {e}")
+                    continue
+                status = "FAIL" if problems else "FULL" if full_read else "OK"
+                print(f"  {status:<5}  {where} {one_line[:90]}")
+                for detail in plan if problems else []:
+                    print(f"         | {detail}")
+                failures += bool(problems)
+        conn.close()
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n{failures} query bermasalah" if failures else "\nSemua query memakai index (FULL = baca seluruh tabel tanpa filter)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
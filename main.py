@@ -1,60 +1,25 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, text
 from datetime import datetime, timedelta
 import io
 import time
-import instaloader
 import xlsxwriter
-import re
-import os
 import hashlib
-import sqlite3
 import calendar
 
-# ============ CACHING & SESSION MANAGEMENT ============
-class ScrapingCache:
-    """Simple cache untuk hasil scraping dengan TTL"""
-    def __init__(self, ttl_minutes=60):
-        self.cache = {}
-        self.ttl = timedelta(minutes=ttl_minutes)
-    
-    def get(self, key):
-        """Get cached value jika belum expired"""
-        if key in self.cache:
-            value, timestamp = self.cache[key]
-            if datetime.now() - timestamp < self.ttl:
-                return value
-            else:
-                del self.cache[key]
-        return None
-    
-    def set(self, key, value):
-        """Set cache value dengan timestamp"""
-        self.cache[key] = (value, datetime.now())
-    
-    def clear_expired(self):
-        """Remove expired entries"""
-        now = datetime.now()
-        expired_keys = [k for k, (_, ts) in self.cache.items() if now - ts >= self.ttl]
-        for k in expired_keys:
-            del self.cache[k]
-
-# Global cache instance (1 hour TTL)
-scraping_cache = ScrapingCache(ttl_minutes=60)
-
-# CONFIGURATION 
-DB_PATH = os.path.abspath("PLN_Ultimate_Monitoring_V7.db")
-DB_URL = f"sqlite:///{DB_PATH}"
-engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
-
-def get_db_connection():
-    """Get direct SQLite connection with WAL mode for better concurrency"""
-    conn = sqlite3.connect(DB_PATH, timeout=15.0)
-    conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA busy_timeout=5000")
-    return conn
+from portal.db import engine, get_db_connection
+from portal.db import init_db as init_schema
+from portal.ingest import add_hashtag, list_sources, remove_source, set_source_active, sync_tagged_sources
+from portal.instrumentation import get_slowest_accounts, get_sync_trend
+from portal.monitoring import (DEFAULT_PAGE_SIZE, build_filter, count_posts, distinct_values, heatmap_counts,
+                               load_filtered, load_page, search_captions)
+from portal.scheduler import DAILY_REQUEST_BUDGET, plan_sync, requests_used_today, score_accounts
+from portal.scraper import account_flights, rate_limit_manager, scraping_cache, session_pool
+from portal.search import CALENDAR_FTS, PENGAJUAN_FTS, marked_html, rank_frame, ranked_matches
+from portal.sync import (METRIC_REFRESH_TIERS, enqueue_sync_job, get_active_workers, list_job_items,
+                         list_sync_jobs, resume_job, select_posts_due_for_refresh)
+from portal.utils import clean_txt, extract_username, get_month_order, parse_date_str, period_bounds
 
 def update_password_direct(user_id, new_password_hash):
     """Update password using direct SQLite connection with verification"""
@@ -117,30 +82,6 @@ st.set_page_config(
 )
 
 # ============ AUTHENTICATION & ROLE SYSTEM ============
-def init_auth_db():
-    """Initialize users and roles table"""
-    with engine.begin() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT DEFAULT 'user',
-                unit TEXT,
-                created_at TEXT
-            )
-        """))
-        # create default admin if not exists
-        admin_pass = hashlib.sha256('admin123'.encode()).hexdigest()
-        try:
-            conn.execute(text("""
-                INSERT INTO users (username, password, role, unit, created_at)
-                VALUES ('admin', :pass, 'admin', 'ADMIN', :ca)
-            """), {"pass": admin_pass, "ca": datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
-        except Exception:
-            pass
-
-
 def login_user(username, password):
     """Verify credentials and return user info dict or None"""
     try:
@@ -291,8 +232,15 @@ def show_login_page():
                 else:
                     st.error("❌ Username sudah terpakai")
 
-# Initialize databases
-init_auth_db()
+# ============ INITIALIZE DATABASE ============
+def init_db():
+    """Migrasi skema (users, tabel monitoring, dst.); setelah berhasil sekali, rerun berikutnya no-op"""
+    try:
+        init_schema()
+    except Exception as e:
+        st.error(f"Database initialization error: {e}")
+
+init_db()
 
 # Check if user is logged in
 if 'user' not in st.session_state:
@@ -307,130 +255,6 @@ if 'current_nav' not in st.session_state:
     else:
         st.session_state.current_nav = "Dashboard User"
 
-# ============ INITIALIZE SESSION STATE & DATABASE ============
-def init_db():
-    """Initialize database tables"""
-    try:
-        with engine.begin() as conn:
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS daftar_akun_unit (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nama_unit TEXT,
-                    username_ig TEXT UNIQUE
-                )
-            """))
-            
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS monitoring_pln (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tanggal TEXT, bulan TEXT, tahun TEXT,
-                    judul_pemberitaan TEXT, 
-                    link_pemberitaan TEXT UNIQUE,
-                    platform TEXT, tipe_konten TEXT, 
-                    pic_unit TEXT, 
-                    akun TEXT,
-                    kategori TEXT,
-                    likes INTEGER DEFAULT 0, 
-                    comments INTEGER DEFAULT 0,
-                    views INTEGER DEFAULT 0,
-                    last_updated TEXT
-                )
-            """))
-            # Ensure unique index exists for ON CONFLICT to work reliably
-            try:
-                conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_monitoring_link ON monitoring_pln(link_pemberitaan)"))
-            except Exception:
-                pass
-
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS pengajuan_dokumentasi (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nama_pengaju TEXT,
-                    user_id INTEGER,
-                    nomor_telpon TEXT,
-                    unit TEXT,
-                    tanggal_acara TEXT,
-                    jam_mulai TEXT,
-                    jam_selesai TEXT,
-                    output_link_drive TEXT,
-                    output_type TEXT,
-                    biaya REAL DEFAULT 0,
-                    deadline_penyelesaian TEXT,
-                    status TEXT DEFAULT 'pending',
-                    hasil_link_drive TEXT,
-                    added_to_calendar INTEGER DEFAULT 0,
-                    created_at TEXT,
-                    updated_at TEXT,
-                    notes TEXT
-                )
-            """))
-
-            conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS dokumentasi_calendar (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    pengajuan_id INTEGER,
-                    tanggal TEXT,
-                    nama_kegiatan TEXT,
-                    unit TEXT,
-                    status TEXT,
-                    created_at TEXT
-                )
-            """))
-
-            # --- Migration: ensure expected columns exist for backwards compatibility ---
-            def ensure_columns(table_name, columns):
-                # columns: dict of column_name -> column_definition (e.g. "user_id INTEGER")
-                existing = [r[1] for r in conn.execute(text(f"PRAGMA table_info('{table_name}')")).fetchall()]
-                for col, definition in columns.items():
-                    if col not in existing:
-                        try:
-                            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {definition}"))
-                        except Exception:
-                            pass
-
-            ensure_columns('pengajuan_dokumentasi', {
-                'user_id': "user_id INTEGER",
-                'nomor_telpon': "nomor_telpon TEXT",
-                'unit': "unit TEXT",
-                'tanggal_acara': "tanggal_acara TEXT",
-                'jam_mulai': "jam_mulai TEXT",
-                'jam_selesai': "jam_selesai TEXT",
-                'output_link_drive': "output_link_drive TEXT",
-                'output_type': "output_type TEXT",
-                'biaya': "biaya REAL DEFAULT 0",
-                'deadline_penyelesaian': "deadline_penyelesaian TEXT",
-                'status': "status TEXT DEFAULT 'pending'",
-                'hasil_link_drive': "hasil_link_drive TEXT",
-                'hasil_video': "hasil_video TEXT",
-                'hasil_flyer': "hasil_flyer TEXT",
-                'rejection_reason': "rejection_reason TEXT",
-                'added_to_calendar': "added_to_calendar INTEGER DEFAULT 0",
-                'created_at': "created_at TEXT",
-                'updated_at': "updated_at TEXT",
-                'notes': "notes TEXT"
-            })
-
-            ensure_columns('monitoring_pln', {
-                'platform': "platform TEXT DEFAULT 'Instagram'",
-                'tipe_konten': "tipe_konten TEXT DEFAULT 'Feeds'",
-                'comments': "comments INTEGER DEFAULT 0",
-                'source': "source TEXT DEFAULT 'Scraping'"
-            })
-
-            ensure_columns('dokumentasi_calendar', {
-                'pengajuan_id': "pengajuan_id INTEGER",
-                'tanggal': "tanggal TEXT",
-                'nama_kegiatan': "nama_kegiatan TEXT",
-                'unit': "unit TEXT",
-                'status': "status TEXT",
-                'doc_link': "doc_link TEXT",
-                'created_at': "created_at TEXT"
-            })
-    except Exception as e:
-        st.error(f"Database initialization error: {e}")
-
-init_db()
-
 # ============ GLOBAL CSS (ULTRA-COMPLETE PARIPURNA) ============
 GLOBAL_CSS = """
 <style>
@@ -696,29 +520,6 @@ div[data-testid="stVerticalBlockBorderWrapper"] {
 st.markdown(GLOBAL_CSS, unsafe_allow_html=True)
 
 # ============ HELPER FUNCTIONS SCRAP============
-def clean_txt(text_input):
-    if not text_input: return "Konten Visual"
-    res = re.sub(r'[^\x00-\x7f]', r'', text_input)
-    return res.replace('\n', ' ').strip()
-
-def get_month_order():
-    return ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 
-            'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
-
-def extract_username(input_str):
-    if not input_str:
-        return ""
-    s = str(input_str).strip()
-    # Jika merupakan URL posting (/p/shortcode) kembalikan full url (handler lain akan deteksi)
-    if '/p/' in s:
-        return s.rstrip('/')
-    # Jika berupa URL profil, ambil username terakhir
-    if 'instagram.com' in s:
-        parts = s.rstrip('/').split('/')
-        return parts[-1].replace('@','')
-    # Jika berupa shortcode (beberapa input hanya shortcode), biarkan apa adanya
-    return s.replace('@', '').strip()
-
 def render_documentation_links(drive_link, video_link, flyer_link):
     """Render HTML untuk ketiga documentation links"""
     if not any([
@@ -743,185 +544,21 @@ def render_documentation_links(drive_link, video_link, flyer_link):
     return html
 
 
-# ============ INSTAGRAM RATE LIMIT MANAGER ============
-class InstagramRateLimitManager:
-    """Manage Instagram rate limit safely with exponential backoff"""
-    def __init__(self):
-        self.last_request_time = {}
-        self.rate_limit_wait_until = {}
-        self.min_delay_between_requests = 3  # increased from 2 to 3 seconds
-        self.user_agent_list = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15'
-        ]
-        self.ua_index = 0
-        self.request_count = 0
-    
-    def get_next_user_agent(self):
-        """Rotate user agents"""
-        ua = self.user_agent_list[self.ua_index]
-        self.ua_index = (self.ua_index + 1) % len(self.user_agent_list)
-        return ua
-    
-    def wait_if_needed(self, username):
-        """Check and wait if rate limit detected with jitter"""
-        if username in self.rate_limit_wait_until:
-            wait_until = self.rate_limit_wait_until[username]
-            if datetime.now() < wait_until:
-                remaining = (wait_until - datetime.now()).total_seconds()
-                st.warning(f"⏳ Rate limit active untuk @{username}. Tunggu {int(remaining)} detik lagi...")
-                time.sleep(min(remaining, 60))
-        
-        # Enforce minimum delay between requests dengan jitter
-        if username in self.last_request_time:
-            elapsed = (datetime.now() - self.last_request_time[username]).total_seconds()
-            if elapsed < self.min_delay_between_requests:
-                jitter = np.random.uniform(0.5, 1.5)  # Random jitter 0.5-1.5 seconds
-                sleep_time = max(0, self.min_delay_between_requests - elapsed + jitter)
-                time.sleep(sleep_time)
-        
-        self.last_request_time[username] = datetime.now()
-        self.request_count += 1
-    
-    def mark_rate_limited(self, username, retry_after_seconds=900):
-        """Mark account as rate limited (default 15 min)"""
-        self.rate_limit_wait_until[username] = datetime.now() + timedelta(seconds=retry_after_seconds)
-    
-    def should_slow_down(self):
-        """Return True if should add extra delay (every 10 requests)"""
-        return self.request_count % 10 == 0 and self.request_count > 0
-
-# Global rate limit manager
-rate_limit_manager = InstagramRateLimitManager()
+def st_notify(level, message):
+    """Tampilkan pesan scraper ke UI Streamlit (level: info/warning/error/debug)"""
+    if level == "debug":
+        return
+    getattr(st, level, st.write)(message)
 
 # Helper function to apply date filter
-# ============ SCRAPER ENGINE ============
-def run_scraper(username, unit_name, limit=20, target_month="Semua", kategori_input="Korporat", date_from=None, date_to=None, max_retries=2):
-    """Scrape Instagram posts with retry logic and rate limit handling"""
-    clean_username = extract_username(username)
-    
-    # Check cache first
-    cache_key = f"{clean_username}_{unit_name}_{limit}_{target_month}"
-    cached_result = scraping_cache.get(cache_key)
-    if cached_result is not None:
-        st.info(f"✅ Menggunakan cache untuk @{clean_username} (TTL: 1 jam)")
-        return cached_result
-    
-    # Check rate limit before attempting
-    rate_limit_manager.wait_if_needed(clean_username)
-    
-    L = instaloader.Instaloader()
-    L.context.user_agent = rate_limit_manager.get_next_user_agent()
-    
-    results = []
-    month_map = {i+1: m for i, m in enumerate(get_month_order())}
-    
-    # Normal profile scraping with retry and improved safety
-    profile = None
-    for attempt in range(max_retries + 1):
-        try:
-            # Rotate user agent setiap retry
-            L.context.user_agent = rate_limit_manager.get_next_user_agent()
-            profile = instaloader.Profile.from_username(L.context, clean_username)
-            break
-        except Exception as e:
-            error_msg = str(e)
-            # Check if user not found
-            if "not found" in error_msg.lower() or "does not exist" in error_msg.lower():
-                st.error(f"❌ Username '@{clean_username}' tidak ditemukan")
-                return pd.DataFrame()
-            # Rate limit error
-            elif "401 Unauthorized" in error_msg or "Please wait a few minutes" in error_msg or "429" in error_msg:
-                rate_limit_manager.mark_rate_limited(clean_username)
-                if attempt < max_retries:
-                    wait_time = 10 * (2 ** attempt)  # Exponential backoff: 10s, 20s - lebih panjang untuk safety
-                    st.warning(f"⏳ Instagram membatasi akses (Rate Limit). Menunggu {wait_time} detik sebelum retry... (Attempt {attempt+1}/{max_retries})")
-                    time.sleep(wait_time)
-                else:
-                    st.error(f"❌ Instagram membatasi akses setelah {max_retries} retry. Silakan coba lagi dalam 15-30 menit.")
-                    return pd.DataFrame()
-            else:
-                st.error(f"❌ Gagal membuka profil @{clean_username}: {e}")
-                return pd.DataFrame()
-    
-    if not profile:
-        return pd.DataFrame()
 
-    count = 0
-    for post in profile.get_posts():
-        try:
-            if count >= limit:
-                break
-
-            cur_month = month_map.get(post.date.month, '')
-            if target_month != "Semua" and cur_month != target_month:
-                continue
-            if date_from and post.date.date() < date_from:
-                continue
-            if date_to and post.date.date() > date_to:
-                continue
-
-            is_vid = getattr(post, 'is_video', False)
-            caption = post.caption if getattr(post, 'caption', None) else ''
-            results.append({
-                "tanggal": post.date.strftime("%d/%m/%Y"),
-                "bulan": cur_month,
-                "tahun": str(post.date.year),
-                "judul_pemberitaan": clean_txt(caption[:500] if caption else "Konten Visual"),
-                "link_pemberitaan": f"https://www.instagram.com/p/{post.shortcode}/",
-                "platform": "Instagram",
-                "tipe_konten": "Reels" if is_vid else "Feeds",
-                "pic_unit": unit_name,
-                "akun": f"@{clean_username}",
-                "kategori": kategori_input,
-                "likes": int(getattr(post, 'likes', 0) or 0),
-                "comments": int(getattr(post, 'comments', 0) or 0),
-                "views": int(getattr(post, 'video_view_count', 0) or 0),
-                "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "source": "Scraping"
-            })
-            count += 1
-            
-            # Adaptive delay: lebih lama setiap beberapa post untuk safety
-            base_delay = 2  # base delay 2 second
-            if count % 5 == 0:
-                # Extra delay every 5 posts
-                extra_delay = np.random.uniform(1, 3)
-                time.sleep(base_delay + extra_delay)
-            else:
-                time.sleep(base_delay)
-        except Exception as inner_e:
-            # Check if it's a rate limit error
-            error_msg = str(inner_e)
-            if "401 Unauthorized" in error_msg or "Please wait" in error_msg:
-                rate_limit_manager.mark_rate_limited(clean_username)
-                st.warning(f"⚠️ Rate limit detected saat scrape post. Menghentikan scraping untuk mencegah ban...")
-                break
-            else:
-                # Skip problematic post but continue
-                st.debug(f"Skip post @{clean_username}: {inner_e}")
-
-    result_df = pd.DataFrame(results)
-    # Cache the result
-    scraping_cache.set(cache_key, result_df)
-    return result_df
-
-def apply_date_filter(df):
-    """Apply date range filter to dataframe if enabled"""
-    if not df.empty and st.session_state.get('use_date_filter', False):
-        # Parse tanggal column
-        df['tanggal_parsed'] = pd.to_datetime(df['tanggal'], format='%d/%m/%Y', errors='coerce')
-        date_from = st.session_state.get('date_filter_from')
-        date_to = st.session_state.get('date_filter_to')
-        
-        if date_from and date_to:
-            df = df[(df['tanggal_parsed'] >= pd.Timestamp(date_from)) & 
-                    (df['tanggal_parsed'] <= pd.Timestamp(date_to))]
-            df = df.drop('tanggal_parsed', axis=1)
-    return df
+def date_filter_range():
+    """Rentang tanggal global ('YYYY-MM-DD', 'YYYY-MM-DD') jika filter tanggal aktif, selain itu (None, None)"""
+    date_from = st.session_state.get('date_filter_from')
+    date_to = st.session_state.get('date_filter_to')
+    if st.session_state.get('use_date_filter', False) and date_from and date_to:
+        return pd.Timestamp(date_from).strftime('%Y-%m-%d'), pd.Timestamp(date_to).strftime('%Y-%m-%d')
+    return None, None
 
 # --- Analytics / Export Helpers ---
 def color_rekap_style(val):
@@ -1017,21 +654,53 @@ def get_nav_for_role(role):
 
 # ============ CALENDAR RENDER HELPERS ============
 
-def parse_date_str(datestr):
-    """Try to parse several date formats to a datetime.date object"""
-    from datetime import datetime as _dt
-    if not datestr or pd.isna(datestr):
-        return None
-    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d-%m-%Y"):
-        try:
-            return _dt.strptime(datestr, fmt).date()
-        except Exception:
-            continue
-    try:
-        # fallback: pandas
-        return pd.to_datetime(datestr, dayfirst=True).date()
-    except Exception:
-        return None
+def _with_date_obj(df):
+    df['date_obj'] = pd.to_datetime(df['tanggal_iso'], format='%Y-%m-%d', errors='coerce').dt.date
+    return df
+
+
+def load_pengajuan_events(date_from, date_to, statuses=None):
+    """Agenda dari pengajuan_dokumentasi dengan tanggal acara di rentang ISO [date_from, date_to], urut tanggal.
+    statuses: list status (huruf kecil, '' = tanpa status); None = semua"""
+    sql = """
+        SELECT p.id as pengajuan_id, p.tanggal_acara as tanggal, p.tanggal_acara_iso as tanggal_iso,
+               p.nama_pengaju as nama_kegiatan, p.unit, p.status, p.created_at, p.jam_mulai, p.jam_selesai,
+               p.nomor_telpon, p.hasil_link_drive, p.hasil_video, p.hasil_flyer,
+               (SELECT c.doc_link FROM dokumentasi_calendar c
+                WHERE c.pengajuan_id = p.id AND c.doc_link IS NOT NULL AND c.doc_link != ''
+                ORDER BY c.id DESC LIMIT 1) as doc_link
+        FROM pengajuan_dokumentasi p
+        WHERE p.tanggal_acara_iso BETWEEN :date_from AND :date_to
+    """
+    params = {"date_from": date_from, "date_to": date_to}
+    if statuses is None:
+        stmt = text(sql + " ORDER BY p.tanggal_acara_iso, p.jam_mulai")
+    else:
+        stmt = text(sql + " AND COALESCE(LOWER(p.status), '') IN :statuses ORDER BY p.tanggal_acara_iso, p.jam_mulai"
+                    ).bindparams(bindparam("statuses", expanding=True))
+        params["statuses"] = list(statuses)
+    return _with_date_obj(pd.read_sql(stmt, engine, params=params))
+
+
+def load_calendar_events(date_from, date_to, user_id=None, unit=None):
+    """Event dokumentasi_calendar di rentang ISO [date_from, date_to] yang pengajuannya approved/done
+    (atau tanpa pengajuan), urut tanggal. user_id: hanya milik user tsb; unit: hanya unit tsb"""
+    sql = """
+        SELECT c.*, p.jam_mulai, p.jam_selesai, p.user_id, COALESCE(p.status, '') as p_status,
+               p.hasil_link_drive, p.hasil_video, p.hasil_flyer
+        FROM dokumentasi_calendar c
+        LEFT JOIN pengajuan_dokumentasi p ON c.pengajuan_id = p.id
+        WHERE c.tanggal_iso BETWEEN :date_from AND :date_to AND COALESCE(p.status, '') IN ('approved', 'done', '')
+    """
+    params = {"date_from": date_from, "date_to": date_to}
+    if user_id is not None:
+        sql += " AND p.user_id = :uid"
+        params["uid"] = user_id
+    if unit:
+        sql += " AND c.unit = :unit"
+        params["unit"] = unit
+    return _with_date_obj(pd.read_sql(text(sql + " ORDER BY c.tanggal_iso"), engine, params=params))
+
 
 def render_month_calendar(year, month, events=None):
     """Return HTML calendar for given month with events marked.
@@ -1044,7 +713,7 @@ def render_month_calendar(year, month, events=None):
     if events is None:
         events = []
     for ev in events:
-        d = parse_date_str(ev.get('tanggal'))
+        d = parse_date_str(ev.get('tanggal_iso') or ev.get('tanggal'))
         if d and d.year == year and d.month == month:
             events_map.setdefault(d.day, []).append(ev)
 
@@ -1354,46 +1023,19 @@ if user_role == "admin":
             </div>
         """, unsafe_allow_html=True)
 
-        # Load Database Utama
+        # Ringkasan database (COUNT saja; data dimuat per halaman sesuai filter)
         try:
-            df_db = pd.read_sql(text("SELECT * FROM monitoring_pln"), engine)
-            if df_db.empty:
+            total_db = count_posts()
+            if total_db == 0:
                 st.info("ℹ️ Database monitoring kosong. Silakan lakukan sinkronisasi data terlebih dahulu.")
+            else:
+                st.info(f"📊 {total_db} data di database")
         except Exception as e:
             st.error(f"❌ Gagal membaca database: {e}")
-            df_db = pd.DataFrame()
-        
-        # Pre-processing Data agar Filter Akurat
-        if not df_db.empty:
-            df_db['pic_unit'] = df_db['pic_unit'].fillna("Unknown")
-            df_db['kategori'] = df_db['kategori'].fillna("Korporat")
-            df_db['tahun'] = df_db['tahun'].astype(str)
-            # Normalize "bulan" values: strip whitespace and convert numeric months to month names
-            try:
-                df_db['bulan'] = df_db['bulan'].fillna('').astype(str).str.strip()
-                def _normalize_month(val):
-                    try:
-                        v = str(val).strip()
-                        if v.isdigit():
-                            m = int(v)
-                            if 1 <= m <= 12:
-                                return get_month_order()[m-1]
-                        # handle numeric like '01'
-                        if len(v) == 2 and v.isdigit():
-                            m = int(v)
-                            if 1 <= m <= 12:
-                                return get_month_order()[m-1]
-                        return v
-                    except Exception:
-                        return val
-                df_db['bulan'] = df_db['bulan'].apply(_normalize_month)
-            except Exception:
-                pass
-
-            st.info(f"📊 Memuat {len(df_db)} data dari database")
+            total_db = 0
 
         # --- SECTION: FILTER PANEL ---
-        if df_db.empty:
+        if total_db == 0:
             st.warning("⚠️ Tidak ada data untuk ditampilkan. Lakukan sinkronisasi terlebih dahulu.")
         else:
             with st.container():
@@ -1404,51 +1046,76 @@ if user_role == "admin":
                 with f1:
                     search_judul = st.text_input("Kata Kunci", placeholder="Cari caption...")
                 with f2:
-                    list_unit = ["Semua Unit"] + sorted(df_db['pic_unit'].unique().tolist())
+                    list_unit = ["Semua Unit"] + distinct_values('pic_unit')
                     sel_unit = st.selectbox("Unit Kerja", list_unit)
                 with f3:
-                    list_akun = ["Semua Akun"] + sorted(df_db['akun'].unique().tolist())
+                    list_akun = ["Semua Akun"] + distinct_values('akun')
                     sel_akun = st.selectbox("Akun", list_akun)
                 with f4:
                     sel_kat = st.selectbox("Kategori", ["Semua", "Korporat", "Influencer"])
                 with f5:
-                    list_src = ["Semua"] + sorted(df_db['source'].fillna('Scraping').unique().tolist())
+                    list_src = ["Semua"] + distinct_values('source')
                     sel_source = st.selectbox("Sumber Data", list_src)
 
-                # Filter Logic
-                df_filtered = df_db.copy()
-                if search_judul:
-                    df_filtered = df_filtered[df_filtered['judul_pemberitaan'].str.contains(search_judul, case=False, na=False)]
-                if sel_unit != "Semua Unit":
-                    df_filtered = df_filtered[df_filtered['pic_unit'] == sel_unit]
-                if sel_akun != "Semua Akun":
-                    df_filtered = df_filtered[df_filtered['akun'] == sel_akun]
-                if sel_kat != "Semua":
-                    df_filtered = df_filtered[df_filtered['kategori'] == sel_kat]
-                if 'sel_source' in locals() and sel_source != "Semua":
-                    df_filtered = df_filtered[df_filtered['source'] == sel_source]
+                d1, d2 = st.columns([1, 2])
+                with d1:
+                    st.checkbox("Filter rentang tanggal", key="use_date_filter")
+                with d2:
+                    if st.session_state.get('use_date_filter', False):
+                        date_range = st.date_input("Rentang Tanggal", value=(datetime.now().date() - timedelta(days=30), datetime.now().date()))
+                        if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+                            st.session_state['date_filter_from'], st.session_state['date_filter_to'] = date_range
+
+                # Filter Logic: semua filter (termasuk tanggal global) jadi satu WHERE berparameter
+                date_from, date_to = date_filter_range()
+                panel_filters = dict(
+                    unit=None if sel_unit == "Semua Unit" else sel_unit,
+                    akun=None if sel_akun == "Semua Akun" else sel_akun,
+                    kategori=None if sel_kat == "Semua" else sel_kat,
+                    source=None if sel_source == "Semua" else sel_source,
+                    date_from=date_from, date_to=date_to)
+                where_sql, where_params = build_filter(search=search_judul.strip() or None, **panel_filters)
+                total_filtered = count_posts(where_sql, where_params)
                 
                 st.markdown("</div>", unsafe_allow_html=True)
 
-            # Apply Global Date Filter (Asumsi fungsi ini ada di helper-mu)
-            df_display = apply_date_filter(df_filtered)
-            
-            if not df_display.empty:
+            if total_filtered > 0:
                 # --- SECTION: ACTIONS ---
                 c_stat, c_dl = st.columns([2, 1])
                 with c_stat:
                     st.markdown(f"""
                         <div style='background-color: #f0fdf4; border-left: 5px solid #22c55e; padding: 12px; border-radius: 8px;'>
-                            <span style='color: #166534; font-weight: 600;'>✓ Berhasil memfilter {len(df_display)} data postingan.</span>
+                            <span style='color: #166534; font-weight: 600;'>✓ Berhasil memfilter {total_filtered} data postingan.</span>
                         </div>
                     """, unsafe_allow_html=True)
                 with c_dl:
-                    st.download_button(
-                        label="📥 DOWNLOAD EXCEL",
-                        data=generate_excel_report(df_display),
-                        file_name=f"Rekap_PLN_{datetime.now().strftime('%d%m%y')}.xlsx",
-                        use_container_width=True
-                    )
+                    # Excel berisi semua baris hasil filter: dibuat hanya saat diminta, bukan setiap rerun
+                    export_key = repr((where_sql, sorted(where_params.items())))
+                    if st.session_state.get('rekap_export_key') != export_key:
+                        if st.button("📥 SIAPKAN EXCEL", use_container_width=True):
+                            with st.spinner("Menyusun file Excel..."):
+                                st.session_state['rekap_export'] = generate_excel_report(load_filtered(where_sql, where_params))
+                                st.session_state['rekap_export_key'] = export_key
+                            st.rerun()
+                    else:
+                        st.download_button(
+                            label="📥 DOWNLOAD EXCEL",
+                            data=st.session_state['rekap_export'],
+                            file_name=f"Rekap_PLN_{datetime.now().strftime('%d%m%y')}.xlsx",
+                            use_container_width=True
+                        )
+
+                # --- SECTION: HASIL PENCARIAN (urut relevansi FTS) ---
+                if search_judul.strip():
+                    df_top = search_captions(search_judul, limit=10, **panel_filters)
+                    with st.expander(f"🔎 {len(df_top)} Caption Paling Relevan", expanded=True):
+                        for _, hit in df_top.iterrows():
+                            st.markdown(f"""
+                                <div style='padding: 10px 0; border-bottom: 1px solid #f1f5f9;'>
+                                    <div style='font-size: 12px; color: #64748b; font-weight: 600;'>📅 {hit['tanggal']} • {hit['akun']} • {hit['pic_unit'] or 'Unknown'} • ❤️ {int(hit['likes'] or 0):,} • 👁️ {int(hit['views'] or 0):,}</div>
+                                    <div style='color: #0f172a; margin-top: 4px;'>{marked_html(hit['cuplikan'])} <a href='{hit['link_pemberitaan']}' target='_blank'>🔗</a></div>
+                                </div>
+                            """, unsafe_allow_html=True)
 
                 st.markdown("<br>", unsafe_allow_html=True)
 
@@ -1457,15 +1124,17 @@ if user_role == "admin":
                 
                 with t_heatmap:
                     st.markdown("<div style='background: white; padding: 20px; border-radius: 15px; box-shadow: 0 4px 6px -1px rgba(0,0,0,0.05);'>", unsafe_allow_html=True)
-                    years_sorted = sorted(df_display['tahun'].unique().tolist(), reverse=True)
+                    # Agregat per tahun/unit/bulan dihitung di SQL
+                    df_counts = heatmap_counts(where_sql, where_params)
+                    years_sorted = sorted(df_counts['tahun'].unique().tolist(), reverse=True) if not df_counts.empty else []
 
                     if years_sorted:
                         y_tabs = st.tabs(["Semua Tahun"] + years_sorted)
                         for i, y_val in enumerate(["Semua Tahun"] + years_sorted):
                             with y_tabs[i]:
-                                df_y = df_display if y_val == "Semua Tahun" else df_display[df_display['tahun'] == y_val]
+                                df_y = df_counts if y_val == "Semua Tahun" else df_counts[df_counts['tahun'] == y_val]
                                 if not df_y.empty:
-                                    pivot = df_y.pivot_table(index='pic_unit', columns='bulan', values='link_pemberitaan', aggfunc='count', fill_value=0)
+                                    pivot = df_y.pivot_table(index='pic_unit', columns='bulan', values='posts', aggfunc='sum', fill_value=0)
                                     bulan_order = [b for b in get_month_order() if b in pivot.columns]
                                     if bulan_order:
                                         st.dataframe(pivot[bulan_order].style.background_gradient(cmap='GnBu', axis=None), use_container_width=True)
@@ -1474,6 +1143,21 @@ if user_role == "admin":
                 with t_editor:
                     st.markdown("<div style='background: white; padding: 20px; border-radius: 15px; box-shadow: 0 4px 6px -1px rgba(0,0,0,0.05);'>", unsafe_allow_html=True)
                     st.info("💡 Klik dua kali pada sel untuk mengedit. Pilih  kolom dan tekan delete di keyboard untuk menghapus. Gunakan tombol simpan di bawah untuk memperbarui database.")
+
+                    # Editor hanya memuat satu halaman (LIMIT/OFFSET); ganti filter -> kembali ke halaman 1
+                    total_pages = max(1, -(-total_filtered // DEFAULT_PAGE_SIZE))
+                    filter_key = repr((where_sql, sorted(where_params.items())))
+                    if st.session_state.get('rekap_filter_key') != filter_key:
+                        st.session_state['rekap_filter_key'] = filter_key
+                        st.session_state['rekap_page'] = 1
+                    st.session_state['rekap_page'] = min(st.session_state.get('rekap_page', 1), total_pages)
+                    pg1, pg2 = st.columns([1, 3])
+                    with pg1:
+                        page = st.number_input("Halaman", min_value=1, max_value=total_pages, step=1, key="rekap_page")
+                    with pg2:
+                        first_row = (page - 1) * DEFAULT_PAGE_SIZE + 1
+                        st.caption(f"Menampilkan baris {first_row}–{min(page * DEFAULT_PAGE_SIZE, total_filtered)} dari {total_filtered} (halaman {page}/{total_pages}, terbaru dulu)")
+                    df_display = load_page(where_sql, where_params, page=page)
                     
                     # Kolom yang ditampilkan di editor (urut sesuai permintaan pengguna)
                     display_cols = [
@@ -1621,18 +1305,99 @@ if user_role == "admin":
                 </div>
             """, unsafe_allow_html=True)
 
+        with st.expander("📦 Statistik Cache Scraping"):
+            cache_stats = scraping_cache.stats()
+            cs1, cs2, cs3, cs4 = st.columns(4)
+            cs1.metric("Hit", cache_stats['hits'])
+            cs2.metric("Miss", cache_stats['misses'])
+            cs3.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+            cs4.metric("Entri", f"{cache_stats['entries']} ({cache_stats['size_bytes'] / 1024:.0f} KB)")
+            st.caption(f"Username tidak ditemukan (negative cache): {cache_stats['missing']} · "
+                       f"Hit negatif: {cache_stats['negative_hits']} · Eviction: {cache_stats['evictions']}")
+            if st.button("🧹 Kosongkan Cache", key="btn_clear_scrape_cache", type="secondary"):
+                scraping_cache.clear()
+                st.toast("Cache scraping dikosongkan")
+                st.rerun()
+
+        with st.expander("🔑 Sesi Instagram"):
+            sessions_df = pd.DataFrame(session_pool.stats())
+            if sessions_df.empty:
+                st.info("Belum ada sesi tercatat.")
+            else:
+                st.dataframe(sessions_df, use_container_width=True, hide_index=True)
+            st.caption("Sesi login dipakai ulang antar akun dan diistirahatkan otomatis saat kena rate limit. "
+                       "Tambah sesi login dari server: `python -m portal.sessions --login USERNAME` lalu restart worker.")
+
+        with st.expander("🚦 Pacing Request Instagram"):
+            pacing = rate_limit_manager.pacer.state()
+            pc1, pc2, pc3, pc4 = st.columns(4)
+            pc1.metric("Laju Saat Ini", f"{pacing['rate'] * 60:.1f} req/menit")
+            pc2.metric("Akun Paralel", f"{pacing['concurrency']} / {rate_limit_manager.max_concurrent_accounts}")
+            pc3.metric("Total Request", rate_limit_manager.request_count)
+            pc4.metric("Rate Limit Tercatat", pacing['throttles'])
+            if pacing['last_throttle_at']:
+                st.caption(f"Rate limit terakhir: {datetime.fromtimestamp(pacing['last_throttle_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+            st.caption("Laju naik perlahan selama tidak ada 429/401 dan dipotong setengah saat Instagram membatasi (AIMD).")
+
+        with st.expander("⏱️ Waktu Sinkronisasi per Akun"):
+            metric_days = st.selectbox("Periode", [7, 30, 90], format_func=lambda d: f"{d} hari terakhir",
+                                       key="sync_metrics_days")
+            phase_labels = {"profile_s": "Resolusi Profil", "iteration_s": "Iterasi Post", "sleep_s": "Jeda Pacing",
+                            "rate_limit_wait_s": "Tunggu Rate Limit", "db_write_s": "Tulis DB"}
+            slowest_df = get_slowest_accounts(metric_days)
+            if slowest_df.empty:
+                st.info("Belum ada data waktu sinkronisasi. Data tercatat setiap akun selesai disinkronkan worker.")
+            else:
+                st.markdown("**Akun paling lambat (rata-rata detik per run)**")
+                st.bar_chart(slowest_df.set_index("username_ig")[list(phase_labels)].rename(columns=phase_labels),
+                             height=280, horizontal=True)
+                st.dataframe(slowest_df.rename(columns={"username_ig": "Akun", "runs": "Run", "total_s": "Total (s)",
+                                                        "requests": "Request", "posts": "Post",
+                                                        "rate_limited": "Rate Limit", "failed": "Gagal",
+                                                        **phase_labels}).round(1),
+                             use_container_width=True, hide_index=True)
+                trend_df = get_sync_trend(metric_days)
+                st.markdown("**Tren total waktu per hari (detik)**")
+                st.line_chart(trend_df.set_index("tanggal")[list(phase_labels)].rename(columns=phase_labels), height=250)
+
+        with st.expander("🗓️ Prioritas Jadwal Sinkronisasi"):
+            score_df = score_accounts()
+            if score_df.empty:
+                st.info("Belum ada akun terdaftar.")
+            else:
+                sp1, sp2, sp3 = st.columns(3)
+                sp1.metric("Akun Jatuh Tempo", f"{int(score_df['due'].sum())} / {len(score_df)}")
+                sp2.metric("Request Hari Ini", f"{requests_used_today()} / {DAILY_REQUEST_BUDGET}")
+                sp3.metric("Estimasi Request Jatuh Tempo", int(score_df.loc[score_df['due'], 'est_requests'].sum()))
+                st.dataframe(score_df.rename(columns={
+                    "username_ig": "Akun", "nama_unit": "Unit", "last_success_at": "Sukses Terakhir",
+                    "staleness_h": "Basi (jam)", "posts_per_day": "Post/Hari", "interval_h": "Interval Target (jam)",
+                    "failures": "Gagal", "est_requests": "Estimasi Request", "priority": "Prioritas",
+                    "due": "Jatuh Tempo"}), use_container_width=True, hide_index=True)
+                st.caption("Prioritas = jam sejak sukses terakhir ÷ (interval target × 2^gagal). Interval target 24 jam ÷ "
+                           "post per hari (30 hari terakhir), minimal 6 jam dan maksimal 7 hari. Worker menjalankan "
+                           "akun jatuh tempo (prioritas ≥ 1) berurutan selama budget request harian masih cukup.")
+
         st.markdown("<br>", unsafe_allow_html=True)
 
         # --- 2. CONFIGURATION PANEL ---
         with st.container(border=True):
             st.markdown("<h4 style='color: #1e3a8a; margin-top: 0;'>⚙️ Pengaturan Sinkronisasi</h4>", unsafe_allow_html=True)
             
-            cc1, cc2, cc3, cc4 = st.columns([1.5, 1, 0.8, 1])
-            sync_mode = cc1.selectbox("Target Sinkronisasi", 
-                ["Semua Akun Terdaftar", "Pilih Akun Unit Spesifik", "Input Manual Username Influencer"])
-            sync_month = cc2.selectbox("Filter Bulan", ["Semua"] + ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli", "Agustus", "September", "Oktober", "November", "Desember"])
+            cc1, cc2, cc3, cc4, cc5 = st.columns([1.5, 1, 0.8, 1, 0.8])
+            sync_mode = cc1.selectbox("Target Sinkronisasi",
+                ["Semua Akun Terdaftar", "Prioritas Otomatis (Budget Harian)", "Pilih Akun Unit Spesifik",
+                 "Input Manual Username Influencer"])
+            sync_month = cc2.selectbox("Filter Bulan", ["Semua"] + ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli", "Agustus", "September", "Oktober", "November", "Desember"],
+                                       help="Bulan terakhir yang sudah lewat (atau bulan pada tahun 'Sampai Tanggal' jika Custom Range aktif).")
             sync_limit = cc3.number_input("Limit Post", 1, 100, 10)
             date_mode = cc4.selectbox("Mode Periode", ["Semua Waktu", "Custom Range"])
+            sync_workers = cc5.number_input("Akun Paralel", 1, rate_limit_manager.max_concurrent_accounts,
+                                            rate_limit_manager.max_concurrent_accounts,
+                                            help="Jumlah akun yang di-scrape bersamaan. Jeda antar request per akun tetap dijaga.")
+
+            sync_incremental = st.checkbox("⚡ Mode Inkremental (hanya post baru + refresh metrik 3 hari terakhir)", value=True,
+                                           help="Berhenti saat mencapai post yang sudah tersimpan. Diabaikan jika Filter Bulan / Custom Range aktif.")
 
             date_from, date_to = None, None
             if date_mode == "Custom Range":
@@ -1653,101 +1418,169 @@ if user_role == "admin":
                 sel_acc = st.multiselect("Pilih Akun Unit", units_df['username_ig'].tolist())
                 to_process = units_df[units_df['username_ig'].isin(sel_acc)].copy()
                 to_process['kategori'] = "Korporat"
-                
+
+            elif sync_mode == "Prioritas Otomatis (Budget Harian)":
+                sync_budget = st.number_input("Budget Request per Hari", 10, 10000, DAILY_REQUEST_BUDGET, step=50,
+                                              help="Akun jatuh tempo dijalankan berurutan prioritas sampai estimasi request melebihi sisa budget hari ini.")
+                to_process, budget_left = plan_sync(sync_budget)
+                if to_process.empty:
+                    st.info("Tidak ada akun jatuh tempo yang muat di sisa budget hari ini.")
+                else:
+                    st.caption(f"{len(to_process)} akun akan disinkronkan (urut prioritas): "
+                               + ", ".join(to_process['username_ig'].head(10))
+                               + (" ..." if len(to_process) > 10 else "") + f" · sisa budget ±{budget_left} request")
+
             else:
                 to_process = units_df.copy()
                 to_process['kategori'] = "Korporat"
 
-            # --- EXECUTION ENGINE ---
+            # --- ENQUEUE JOB (dikerjakan oleh proses `python -m portal.sync`) ---
             if st.button("🚀 MULAI PROSES SINKRONISASI", use_container_width=True, type="primary"):
                 if to_process.empty:
                     st.error("❌ Pilih target dulu!")
                 else:
-                    log_box = st.empty()
-                    prog_bar = st.progress(0)
-                    
-                    inserted = 0
-                    updated = 0
-                    for idx, row in to_process.iterrows():
-                        target = row.get('username_ig', '')
-                        unit_name = row.get('nama_unit', 'Unknown')
-                        kat_name = row.get('kategori', 'Korporat')
-
-                        log_box.info(f"🔄 Memproses: `@{target}`...")
-                        try:
-                            # Scrape data dari username/profil
-                            new_data_df = run_scraper(target, unit_name, sync_limit, sync_month, kat_name, date_from, date_to)
-                            new_data_list = new_data_df.to_dict('records') if not new_data_df.empty else []
+                    job_params = {
+                        "mode": {"Input Manual Username Influencer": "manual",
+                                 "Pilih Akun Unit Spesifik": "units",
+                                 "Prioritas Otomatis (Budget Harian)": "priority"}.get(sync_mode, "all"),
+                        "limit": int(sync_limit), "month": sync_month,
+                        "date_from": date_from.isoformat() if date_from else None,
+                        "date_to": date_to.isoformat() if date_to else None,
+                        "workers": int(sync_workers), "incremental": sync_incremental
+                    }
+                    if job_params["mode"] == "manual":
+                        job_params.update({"username": inf_user, "unit": inf_unit})
+                    elif job_params["mode"] == "units":
+                        job_params["usernames"] = sel_acc
+                    elif job_params["mode"] == "priority":
+                        job_params["budget"] = int(sync_budget)
+                    job_id = enqueue_sync_job(job_params, requested_by=user_name)
+                    st.success(f"✅ Job #{job_id} masuk antrean ({len(to_process)} akun). Progres tampil di bawah.")
+
+        # --- REFRESH METRIK SAJA (per shortcode, tanpa scrape profil) ---
+        with st.container(border=True):
+            st.markdown("<h4 style='color: #1e3a8a; margin-top: 0;'>📈 Refresh Metrik Saja</h4>", unsafe_allow_html=True)
+            tier_txt = " · ".join(
+                f"≤{max_age} hari: tiap {int(every.total_seconds() // 3600)} jam" if every < timedelta(days=1)
+                else f"≤{max_age} hari: tiap {every.days} hari"
+                for max_age, every in METRIC_REFRESH_TIERS
+            )
+            st.caption(f"Update likes/comments/views post yang sudah tersimpan (1 request per post). Jadwal: {tier_txt} · "
+                       f"lebih dari {METRIC_REFRESH_TIERS[-1][0]} hari tidak di-refresh.")
+            mr1, mr2 = st.columns([1, 2])
+            metrics_limit = mr1.number_input("Maks. Post", 10, 500, 150, step=10, key="metrics_refresh_limit")
+            due_count = len(select_posts_due_for_refresh())
+            mr2.metric("Post Jatuh Tempo Refresh", due_count)
+            if st.button("📈 Antrekan Refresh Metrik", use_container_width=True, disabled=due_count == 0,
+                         key="btn_enqueue_metrics_refresh"):
+                job_id = enqueue_sync_job({"mode": "metrics", "limit": int(metrics_limit)}, requested_by=user_name)
+                st.success(f"✅ Job #{job_id} (refresh metrik, maks. {int(metrics_limit)} post) masuk antrean.")
+
+        # --- INGEST HASHTAG & TAG (liputan Influencer/publik) ---
+        with st.container(border=True):
+            st.markdown("<h4 style='color: #1e3a8a; margin-top: 0;'>#️⃣ Pantauan Hashtag & Tag</h4>", unsafe_allow_html=True)
+            st.caption("Post publik dengan hashtag terpantau dan post yang menandai akun unit disimpan sebagai kategori "
+                       "Influencer (link yang sudah ada hanya diperbarui metriknya). Hanya post baru sejak run terakhir "
+                       "yang diambil; memakai budget request yang sama dengan sinkronisasi akun.")
+            hc1, hc2, hc3 = st.columns([1.5, 1.5, 1])
+            new_tag = hc1.text_input("Hashtag", placeholder="#plnlampung", key="ingest_new_hashtag")
+            tag_unit = hc2.selectbox("Kaitkan ke Unit", units_df['nama_unit'].tolist() if not units_df.empty else ["Pusat"],
+                                     key="ingest_hashtag_unit")
+            hc3.markdown("<br>", unsafe_allow_html=True)
+            if hc3.button("➕ Tambah", use_container_width=True, key="btn_add_hashtag"):
+                if new_tag.strip('# '):
+                    add_hashtag(new_tag, tag_unit, added_by=user_name)
+                    st.success(f"✅ #{new_tag.lstrip('#').strip().lower()} dipantau.")
+                else:
+                    st.error("❌ Isi hashtag dulu!")
+
+            sync_tagged_sources()
+            sources_df = pd.DataFrame(list_sources())
+            if not sources_df.empty:
+                sources_df['Sumber'] = sources_df.apply(
+                    lambda r: f"#{r['value']}" if r['kind'] == 'hashtag' else f"Tag @{r['value']}", axis=1)
+                st.dataframe(sources_df[['Sumber', 'nama_unit', 'active', 'last_post_at', 'last_run_at', 'last_status']].rename(
+                    columns={"nama_unit": "Unit", "active": "Aktif", "last_post_at": "Post Terbaru",
+                             "last_run_at": "Run Terakhir", "last_status": "Status"}),
+                    use_container_width=True, hide_index=True)
+                hs1, hs2 = st.columns([3, 1])
+                picked = hs1.multiselect("Pilih sumber", sources_df['source_key'].tolist(), key="ingest_picked_sources",
+                                         format_func=lambda k: k.replace("hashtag:", "#").replace("tagged:", "Tag @"))
+                action = hs2.selectbox("Aksi", ["Nonaktifkan", "Aktifkan", "Hapus Hashtag"], key="ingest_source_action")
+                if st.button("Terapkan", disabled=not picked, key="btn_apply_ingest_sources"):
+                    for key in picked:
+                        if action == "Hapus Hashtag":
+                            if key.startswith("hashtag:"):
+                                remove_source(key)
+                        else:
+                            set_source_active(key, action == "Aktifkan")
+                    st.rerun()
 
-                            # Simpan dengan logika insert/update eksplisit untuk menghitung berapa yang baru/diupdate
-                            if new_data_list:
-                                try:
-                                    with engine.begin() as conn:
-                                        for item in new_data_list:
-                                            if not item: continue
-                                            link = item.get('link_pemberitaan')
-                                            if not link:
-                                                st.warning(f"⚠️ Skip item tanpa link: {item.get('judul_pemberitaan', 'Unknown')[:50]}")
-                                                continue
-                                            # cek ada tidaknya record
-                                            exists = conn.execute(text("SELECT id FROM monitoring_pln WHERE link_pemberitaan = :l"), {"l": link}).fetchone()
-                                            if exists:
-                                                conn.execute(text("""
-                                                    UPDATE monitoring_pln SET 
-                                                        tanggal=:t, bulan=:b, tahun=:y, judul_pemberitaan=:j,
-                                                        platform=:p, tipe_konten=:tk, pic_unit=:pic, akun=:ak, kategori=:kat,
-                                                        likes=:lk, comments=:cm, views=:vw, last_updated=:lu, source=:src
-                                                    WHERE link_pemberitaan = :l
-                                                """), {
-                                                    "t": item.get('tanggal'), "b": item.get('bulan'), "y": str(item.get('tahun')),
-                                                    "j": item.get('judul_pemberitaan', 'No Title'), "p": item.get('platform', 'Instagram'),
-                                                    "tk": item.get('tipe_konten', 'Feeds'), "pic": unit_name, "ak": item.get('akun', target),
-                                                    "kat": kat_name, "lk": int(item.get('likes',0)), "cm": int(item.get('comments',0)),
-                                                    "vw": int(item.get('views',0)), "lu": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
-                                                    "src": item.get('source', 'Scraping'), "l": link
-                                                })
-                                                updated += 1
-                                            else:
-                                                conn.execute(text("""
-                                                    INSERT INTO monitoring_pln (
-                                                        tanggal, bulan, tahun, judul_pemberitaan, link_pemberitaan,
-                                                        platform, tipe_konten, pic_unit, akun, kategori,
-                                                        likes, comments, views, last_updated, source
-                                                    ) VALUES (
-                                                        :t, :b, :y, :j, :l, :p, :tk, :pic, :ak, :kat, :lk, :cm, :vw, :lu, :src
-                                                    )
-                                                """), {
-                                                    "t": item.get('tanggal'), "b": item.get('bulan'), "y": str(item.get('tahun')),
-                                                    "j": item.get('judul_pemberitaan', 'No Title'), "l": link,
-                                                    "p": item.get('platform', 'Instagram'), "tk": item.get('tipe_konten', 'Feeds'),
-                                                    "pic": unit_name, "ak": item.get('akun', target), "kat": kat_name,
-                                                    "lk": int(item.get('likes', 0)), "cm": int(item.get('comments', 0)),
-                                                    "vw": int(item.get('views', 0)), "lu": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                                                    "src": item.get('source', 'Scraping')
-                                                })
-                                                inserted += 1
-                                except Exception as inner_e:
-                                    st.error(f"❌ Gagal insert/update item: {inner_e}")
-                                    continue
-
-                            # Update progress bar dengan value dalam range [0, 1]
-                            progress_value = min((idx + 1) / len(to_process), 1.0)
-                            prog_bar.progress(progress_value)
-                        except Exception as e:
-                            st.warning(f"⚠️ Skip @{target}: {str(e)}")
-                            # Update progress bar meskipun ada error
-                            progress_value = min((idx + 1) / len(to_process), 1.0)
-                            prog_bar.progress(progress_value)
-
-                    # Summary after processing
-                    st.balloons()
-                    st.success(f"Sinkronisasi selesai — Baru: {inserted}, Diperbarui: {updated}")
-                    
-                    st.success("✅ Sinkronisasi Selesai!")
-                    time.sleep(2)
-                    st.cache_data.clear()  # Clear cache untuk reload data
+            ic1, ic2 = st.columns([1, 2])
+            ingest_limit = ic1.number_input("Maks. Post Baru per Sumber", 5, 200, 50, step=5, key="ingest_limit")
+            if ic2.button("#️⃣ Antrekan Ingest Hashtag & Tag", use_container_width=True, key="btn_enqueue_ingest"):
+                job_id = enqueue_sync_job({"mode": "ingest", "limit": int(ingest_limit)}, requested_by=user_name)
+                st.success(f"✅ Job #{job_id} (ingest hashtag & tag) masuk antrean.")
+
+        # --- 3. STATUS ANTREAN (refresh otomatis jika Streamlit mendukung st.fragment) ---
+        live_fragment = st.fragment(run_every=5) if hasattr(st, "fragment") else (lambda f: f)
+
+        @live_fragment
+        def render_sync_queue():
+            with st.container(border=True):
+                sh1, sh2 = st.columns([4, 1])
+                sh1.markdown("<h4 style='color: #1e3a8a; margin-top: 0;'>📋 Status Antrean Sinkronisasi</h4>", unsafe_allow_html=True)
+                if sh2.button("🔄 Refresh Status", key="btn_refresh_sync_jobs", use_container_width=True):
+                    st.cache_data.clear()  # data baru dari worker ikut tampil
                     st.rerun()
 
+                workers_df = get_active_workers()
+                if workers_df.empty:
+                    st.warning("⚠️ Worker sinkronisasi tidak aktif. Jalankan `python -m portal.sync` dari folder aplikasi agar job diproses.")
+                else:
+                    st.caption("🟢 Worker aktif: " + ", ".join(f"{w.worker_id} ({w.state})" for w in workers_df.itertuples()))
+                in_flight = account_flights.in_flight()
+                if in_flight:
+                    st.caption("🔒 Sedang di-scrape (permintaan lain untuk akun ini menunggu & memakai hasilnya): "
+                               + ", ".join(f"@{f['username_ig']}" for f in in_flight))
+
+                jobs_df = list_sync_jobs(limit=15)
+                if jobs_df.empty:
+                    st.info("Belum ada job sinkronisasi.")
+                    return
+                jobs_df['progres'] = jobs_df.apply(
+                    lambda r: f"{r['processed_accounts']}/{r['total_accounts']}" if r['total_accounts'] else "-", axis=1)
+                st.dataframe(
+                    jobs_df[['id', 'status', 'progres', 'inserted', 'updated', 'requested_by',
+                             'created_at', 'finished_at', 'message']],
+                    use_container_width=True, hide_index=True
+                )
+
+                # Detail per akun (checkpoint) untuk job terpilih
+                active = jobs_df[jobs_df['status'].isin(['running', 'queued'])]
+                default_id = int(active['id'].iloc[-1]) if not active.empty else int(jobs_df['id'].iloc[0])
+                job_ids = jobs_df['id'].astype(int).tolist()
+                sel_job = st.selectbox("Detail Job", job_ids, index=job_ids.index(default_id),
+                                       format_func=lambda j: f"Job #{j}", key="sel_sync_job")
+                job_row = jobs_df[jobs_df['id'] == sel_job].iloc[0]
+                items_df = list_job_items(sel_job)
+                if not items_df.empty:
+                    st.progress(min(job_row['processed_accounts'] / max(len(items_df), 1), 1.0),
+                                text=f"{job_row['processed_accounts']}/{len(items_df)} akun selesai")
+                    status_icon = {"queued": "⏳", "running": "🔄", "done": "✅", "rate_limited": "🚫", "failed": "❌"}
+                    items_df['status'] = items_df['status'].map(lambda s: f"{status_icon.get(s, '')} {s}")
+                    st.dataframe(items_df, use_container_width=True, hide_index=True)
+
+                has_leftover = not items_df.empty and items_df['status'].str.contains('rate_limited|failed|queued').any()
+                if job_row['status'] in ('rate_limited', 'failed', 'done') and has_leftover:
+                    if st.button(f"▶️ Lanjutkan Job #{sel_job} dari Checkpoint", key="btn_resume_sync_job"):
+                        resume_job(sel_job)
+                        st.toast(f"Job #{sel_job} masuk antrean lagi — akun yang sudah selesai dilewati")
+                        st.rerun()
+
+        st.markdown("<br>", unsafe_allow_html=True)
+        render_sync_queue()
+
     # ---------------------------------------------------------
     # PAGE 4: INPUT DATA (FORM & SCRAPE)
     # ---------------------------------------------------------
@@ -1867,7 +1700,7 @@ if user_role == "admin":
 
                 if status_filter != "Semua": df_admin = df_admin[df_admin['status'] == status_filter]
                 if unit_filter != "Semua": df_admin = df_admin[df_admin['unit'] == unit_filter]
-                if search_query: df_admin = df_admin[df_admin['nama_pengaju'].str.contains(search_query, case=False, na=False)]
+                if search_query: df_admin = rank_frame(df_admin, ranked_matches(PENGAJUAN_FTS, search_query))
 
         # --- LOOPING KARTU PENGAJUAN ---
         for _, row in df_admin.iterrows():
@@ -1877,7 +1710,7 @@ if user_role == "admin":
             with st.container(border=True):
                 st.markdown(f"""
                     <div style='display: flex; justify-content: space-between; align-items: center; border-bottom: 2px solid #f1f5f9; padding-bottom: 12px; margin-bottom: 20px;'>
-                        <div style='font-size: 18px; font-weight: 800; color: #1e3a8a;'>ID #{row['id']} | {row['nama_pengaju']}</div>
+                        <div style='font-size: 18px; font-weight: 800; color: #1e3a8a;'>ID #{row['id']} | {row.get('sorot') or row['nama_pengaju']}</div>
                         <div style='background: {st_color}; color: white; padding: 6px 16px; border-radius: 8px; font-size: 12px; font-weight: 900; letter-spacing: 1px;'>{row['status'].upper()}</div>
                     </div>
                 """, unsafe_allow_html=True)
@@ -1993,31 +1826,9 @@ if user_role == "admin":
             </div>
         """, unsafe_allow_html=True)
 
-        df_peng = pd.read_sql(text("""
-            SELECT id as pengajuan_id, tanggal_acara as tanggal, nama_pengaju as nama_kegiatan, 
-                   unit, status, created_at, jam_mulai, jam_selesai, nomor_telpon, 
-                   hasil_link_drive, hasil_video, hasil_flyer
-            FROM pengajuan_dokumentasi 
-            ORDER BY tanggal_acara ASC
-        """), engine)
-
-        if df_peng.empty:
-            combined_events = pd.DataFrame(columns=['pengajuan_id', 'tanggal', 'nama_kegiatan', 'unit', 'status', 'created_at', 'jam_mulai', 'jam_selesai', 'nomor_telpon', 'hasil_link_drive', 'hasil_video', 'hasil_flyer'])
-        else:
-            combined_events = df_peng.copy()
-        
-        try:
-            df_cal = pd.read_sql(text("""
-                SELECT pengajuan_id, doc_link FROM dokumentasi_calendar 
-                WHERE doc_link IS NOT NULL AND doc_link != ''
-            """), engine)
-            if not df_cal.empty:
-                for _, cal_row in df_cal.iterrows():
-                    mask = combined_events['pengajuan_id'] == cal_row['pengajuan_id']
-                    if mask.any():
-                        combined_events.loc[mask, 'doc_link'] = cal_row['doc_link']
-        except:
-            pass
+        # Rentang tanggal difilter di SQL (tanggal_acara_iso); cukup cek apakah ada agenda sama sekali
+        with engine.begin() as conn:
+            has_agenda = bool(conn.execute(text("SELECT EXISTS (SELECT 1 FROM pengajuan_dokumentasi)")).scalar())
 
         with st.container(border=True):
             c_s1, c_s2, c_s3 = st.columns([1.2, 1.2, 1])
@@ -2031,22 +1842,13 @@ if user_role == "admin":
                 st.markdown("<p style='font-size:0.85rem; margin-bottom:8px; font-weight:700; color:#475569;'>STATUS</p>", unsafe_allow_html=True)
                 sel_status = st.selectbox("Status", ["Semua", "Approved", "Done", "Pending"], key="admin_cal_status", label_visibility="collapsed")
             
-            if not combined_events.empty:
-                combined_events['date_obj'] = combined_events['tanggal'].apply(parse_date_str)
-                status_filter = combined_events['status'].fillna('').str.lower()
-                
-                if sel_status == "Semua":
-                    status_list = ['approved', 'done', 'pending', '']
-                else:
-                    status_list = [sel_status.lower()]
-                
-                combined_events_filtered = combined_events[
-                    status_filter.isin(status_list)
-                ]
+            if sel_status == "Semua":
+                status_list = ['approved', 'done', 'pending', '']
             else:
-                combined_events_filtered = combined_events
+                status_list = [sel_status.lower()]
+            month_events = load_pengajuan_events(*period_bounds(sel_y, sel_m), statuses=status_list)
             
-            st.markdown(render_month_calendar(sel_y, sel_m, combined_events_filtered.to_dict('records')), unsafe_allow_html=True)
+            st.markdown(render_month_calendar(sel_y, sel_m, month_events.to_dict('records')), unsafe_allow_html=True)
 
         st.markdown("<br>", unsafe_allow_html=True)
         
@@ -2079,7 +1881,7 @@ if user_role == "admin":
                     with st.container(border=True):
                         st.markdown("<p style='font-weight: 800; color: #1e3a8a; font-size: 15px;'>📋 DAFTAR AGENDA AKTIF</p>", unsafe_allow_html=True)
                         
-                        if combined_events.empty:
+                        if not has_agenda:
                             st.caption("Belum ada jadwal.")
                         else:
                             st.markdown("<p style='font-size:0.75rem; margin-bottom:8px; margin-top:15px; font-weight:700; color:#475569;'>🔍 FILTER JADWAL</p>", unsafe_allow_html=True)
@@ -2109,17 +1911,14 @@ if user_role == "admin":
                                 if mode_hari == "Tanggal Spesifik":
                                     filter_date_list = st.date_input("Pilih Tanggal", value=datetime.now().date(), key="admin_agenda_date", label_visibility="collapsed")
 
-                            combined_events['date_obj'] = combined_events['tanggal'].apply(parse_date_str)
-                            
-                            mask = (combined_events['date_obj'].apply(lambda x: x.year if x else 0) == filter_year)
-                            
-                            if filter_month != 0:
-                                mask &= (combined_events['date_obj'].apply(lambda x: x.month if x else 0) == filter_month)
-                            
                             if mode_hari == "Tanggal Spesifik":
-                                mask &= (combined_events['date_obj'] == filter_date_list)
-                            
-                            df_cal_filtered = combined_events[mask]
+                                # Tanggal spesifik tetap harus cocok dengan tahun & bulan yang dipilih
+                                in_period = filter_date_list.year == filter_year and filter_month in (0, filter_date_list.month)
+                                day_iso = filter_date_list.isoformat()
+                                agenda_range = (day_iso, day_iso) if in_period else (None, None)  # BETWEEN NULL: kosong
+                            else:
+                                agenda_range = period_bounds(filter_year, filter_month)
+                            df_cal_filtered = load_pengajuan_events(*agenda_range)
 
                             st.markdown("<div style='margin-top:15px; border-top: 1px solid #f1f5f9; padding-top:10px;'></div>", unsafe_allow_html=True)
                             
@@ -2627,28 +2426,26 @@ else:  # role: user
                 s_year = st.number_input("Tahun Visual", value=datetime.now().year)
 
         try:
-            query = """
-                SELECT c.*, p.jam_mulai, p.jam_selesai, p.user_id, COALESCE(p.status, '') as p_status,
-                       p.hasil_link_drive, p.hasil_video, p.hasil_flyer
-                FROM dokumentasi_calendar c
+            mine_id = user_id if show_mine else None
+            df_month = load_calendar_events(*period_bounds(s_year, s_month), user_id=mine_id)
+            # Unit yang punya event (untuk filter & cek kosong) tanpa memuat seluruh kalender
+            unit_sql = """
+                SELECT DISTINCT c.unit FROM dokumentasi_calendar c
                 LEFT JOIN pengajuan_dokumentasi p ON c.pengajuan_id = p.id
+                WHERE COALESCE(p.status, '') IN ('approved', 'done', '')
             """
-            df_all = pd.read_sql(text(query + (" WHERE p.user_id = :uid" if show_mine else "")), engine, params={"uid": user_id} if show_mine else None)
-
-            if not df_all.empty:
-                df_all['p_status'] = df_all['p_status'].fillna('')
-                df_all = df_all[df_all['p_status'].isin(['approved', 'done', ''])]
-                df_all['date_obj'] = df_all['tanggal'].apply(parse_date_str)
+            event_units = pd.read_sql(text(unit_sql + (" AND p.user_id = :uid" if show_mine else "")), engine,
+                                      params={"uid": user_id} if show_mine else None)['unit'].tolist()
 
             # --- RENDER KALENDER VISUAL ---
             st.markdown("<div style='margin-top:30px;'></div>", unsafe_allow_html=True)
-            events_list = df_all.to_dict('records') if not df_all.empty else []
+            events_list = df_month.to_dict('records')
             st.markdown(render_month_calendar(s_year, s_month, events_list), unsafe_allow_html=True)
 
             # --- DAFTAR DETAIL KEGIATAN (SMART FILTER) ---
             st.markdown("<h3 style='color: #1e3a8a; font-size: 22px; font-weight: 800; margin-top: 40px; margin-bottom: 20px;'>📋 Daftar Detail Kegiatan</h3>", unsafe_allow_html=True)
 
-            if not df_all.empty:
+            if event_units:
                 with st.container(border=True):
                     search_query = st.text_input("🔍 Cari Nama Kegiatan...", placeholder="Ketik nama acara...")
                     
@@ -2671,37 +2468,30 @@ else:  # role: user
                             filter_date = st.date_input("Tanggal", value=datetime.now().date(), key="user_cal_filter_date", label_visibility="collapsed")
                         else:
                             st.markdown("<p style='font-size:0.75rem; margin-bottom:4px; font-weight:700; color:#475569;'>UNIT</p>", unsafe_allow_html=True)
-                            unit_list = ["Semua Unit"] + sorted([u for u in df_all['unit'].unique().tolist() if pd.notna(u)])
+                            unit_list = ["Semua Unit"] + sorted(u for u in event_units if pd.notna(u))
                             sel_unit = st.selectbox("Unit", unit_list, key="user_cal_unit", label_visibility="collapsed")
                     
                     with sf4:
                         if mode_hari == "Pilih Tanggal":
                             st.markdown("<p style='font-size:0.75rem; margin-bottom:4px; font-weight:700; color:#475569;'>UNIT</p>", unsafe_allow_html=True)
-                            unit_list = ["Semua Unit"] + sorted([u for u in df_all['unit'].unique().tolist() if pd.notna(u)])
+                            unit_list = ["Semua Unit"] + sorted(u for u in event_units if pd.notna(u))
                             sel_unit = st.selectbox("Unit_2", unit_list, key="user_cal_unit_2", label_visibility="collapsed")
                         else:
                             st.markdown("<p style='font-size:0.75rem; margin-bottom:4px; font-weight:700; color:#475569;'>TAHUN</p>", unsafe_allow_html=True)
                             sel_year = st.number_input("Tahun", value=datetime.now().year, key="user_cal_year", label_visibility="collapsed")
 
-                df_table = df_all.copy()
-
-                if mode_hari == "Semua Hari":
-                    df_table = df_table[df_table['date_obj'].apply(lambda x: x.year if x else 0) == sel_year]
-
-                if filter_month != 0:
-                    df_table = df_table[df_table['date_obj'].apply(lambda x: x.month if x else 0) == filter_month]
-
                 if mode_hari == "Pilih Tanggal":
-                    df_table = df_table[df_table['date_obj'] == filter_date]
+                    day_iso = filter_date.isoformat()
+                    table_range = (day_iso, day_iso) if filter_month in (0, filter_date.month) else (None, None)
+                else:
+                    table_range = period_bounds(sel_year, filter_month)
+                df_table = load_calendar_events(*table_range, user_id=mine_id,
+                                                unit=None if sel_unit == "Semua Unit" else sel_unit)
 
                 if search_query:
-                    df_table = df_table[df_table['nama_kegiatan'].str.contains(search_query, case=False, na=False)]
-                
-                if sel_unit != "Semua Unit":
-                    df_table = df_table[df_table['unit'] == sel_unit]
+                    df_table = rank_frame(df_table, ranked_matches(CALENDAR_FTS, search_query))
 
                 if not df_table.empty:
-                    df_table = df_table.sort_values(by='date_obj')
                     for _, row in df_table.iterrows():
                         st_val = str(row['p_status']).lower()
                         colors = {
@@ -2729,7 +2519,7 @@ else:  # role: user
                                             🕒 {row.get('jam_mulai') or '08:00'} - {row.get('jam_selesai') or 'Selesai'}
                                         </div>
                                     </div>
-                                    <div style='font-size: 1.2rem; font-weight: 800; color: #0f172a;'>{row['nama_kegiatan']}</div>
+                                    <div style='font-size: 1.2rem; font-weight: 800; color: #0f172a;'>{row.get('sorot') or row['nama_kegiatan']}</div>
                                     <div style='margin-top: 4px; color: #475569; font-size: 0.9rem;'>📍 Unit: <span style='font-weight: 600; color: #1e3a8a;'>{row.get('unit','')}</span></div>
                                     {doc_link_section}
                                 </div>
@@ -2866,8 +2656,8 @@ else:  # role: user
             valid_statuses = ['pending', 'approved', 'done', 'rejected']
             df_history['status'] = df_history['status'].apply(lambda x: x if x in valid_statuses else 'pending')
         
-        if search_q:
-            df_history = df_history[df_history['nama_pengaju'].str.contains(search_q, case=False, na=False)]
+        if search_q and not df_history.empty:
+            df_history = rank_frame(df_history, ranked_matches(PENGAJUAN_FTS, search_q))
 
         if df_history.empty:
             st.info("Belum ada data riwayat.")
@@ -2879,7 +2669,7 @@ else:  # role: user
                 with st.container(border=True):
                     h1, h2 = st.columns([3, 1])
                     with h1:
-                        st.markdown(f"<h3 style='margin:0; color:#0f172a;'>📌 {row['nama_pengaju']}</h3>", unsafe_allow_html=True)
+                        st.markdown(f"<h3 style='margin:0; color:#0f172a;'>📌 {row.get('sorot') or row['nama_pengaju']}</h3>", unsafe_allow_html=True)
                         st.markdown(f"<p style='color:#2563eb; font-weight:700; margin-top:2px; font-size:0.95rem;'>{row['unit']} • 📅 {row['tanggal_acara']}</p>", unsafe_allow_html=True)
                     with h2:
                         status_lower = row['status'].lower()
@@ -0,0 +1 @@
+"""Modul bersama portal monitoring: database, scraper Instagram, dan proses sinkronisasi."""
@@ -0,0 +1,32 @@
+"""Koneksi database bersama untuk aplikasi Streamlit dan proses sinkronisasi headless."""
+import os
+import sqlite3
+
+from sqlalchemy import create_engine
+
+from portal.migrations import run_migrations
+
+# CONFIGURATION 
+DB_PATH = os.path.abspath("PLN_Ultimate_Monitoring_V7.db")
+DB_URL = f"sqlite:///{DB_PATH}"
+engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
+# Cache hasil scraping disimpan di file terpisah di samping DB utama
+CACHE_DB_PATH = f"{os.path.splitext(DB_PATH)[0]}_cache.db"
+# State token bucket rate limiter Instagram (dibagi semua proses Streamlit & worker)
+RATE_LIMIT_DB_PATH = f"{os.path.splitext(DB_PATH)[0]}_ratelimit.db"
+# File sesi login Instagram (python -m portal.sessions --login USERNAME)
+SESSION_DIR = os.path.join(os.path.dirname(DB_PATH), "ig_sessions")
+
+
+def get_db_connection():
+    """Get direct SQLite connection with WAL mode for better concurrency"""
+    conn = sqlite3.connect(DB_PATH, timeout=15.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def init_db():
+    """Terapkan migrasi skema yang belum ada (portal/migrations). Hanya bekerja sekali per proses;
+    panggilan berikutnya (mis. setiap rerun Streamlit) langsung kembali. Raise jika gagal"""
+    return run_migrations(engine)
@@ -0,0 +1,135 @@
+"""Riwayat engagement per post: retensi snapshot dan kurva pertumbuhan.
+
+Snapshot ditulis oleh trigger di monitoring_pln (lihat portal.db) sebagai delta
+likes/comments/views dengan timestamp epoch (UTC). Nilai kumulatif = jumlah delta.
+"""
+import time
+from datetime import timedelta
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from portal.db import engine
+
+METRICS = ["likes", "comments", "views"]
+
+# Retensi: snapshot lebih tua dari umur tertentu digabung ke bucket yang lebih kasar.
+# (umur minimal, ukuran bucket); snapshot < 7 hari disimpan apa adanya.
+SNAPSHOT_RETENTION = [
+    (timedelta(days=7), timedelta(days=1)),
+    (timedelta(days=90), timedelta(days=7)),
+]
+
+# Level agregasi kurva -> kolom di monitoring_pln
+GROWTH_LEVELS = {"post": "link_pemberitaan", "akun": "akun", "unit": "pic_unit"}
+
+
+def downsample_snapshots(now=None, retention=SNAPSHOT_RETENTION):
+    """Gabungkan snapshot lama per (post, bucket) menjadi satu baris berisi jumlah delta.
+    Nilai kumulatif tidak berubah karena delta hanya dijumlahkan. Return jumlah baris yang dihapus"""
+    now = int(now if now is not None else time.time())
+    removed = 0
+    with engine.begin() as conn:
+        before = conn.execute(text("SELECT COUNT(*) FROM engagement_snapshots")).scalar()
+        for min_age, bucket in retention:
+            params = {"cutoff": now - int(min_age.total_seconds()), "bucket": int(bucket.total_seconds())}
+            conn.execute(text("DROP TABLE IF EXISTS temp.snapshot_merge"))
+            conn.execute(text("""
+                CREATE TEMP TABLE snapshot_merge AS
+                SELECT post_key, ts / :bucket AS bucket_no, MAX(ts) AS ts,
+                       SUM(d_likes) AS d_likes, SUM(d_comments) AS d_comments, SUM(d_views) AS d_views
+                FROM engagement_snapshots WHERE ts < :cutoff
+                GROUP BY post_key, ts / :bucket HAVING COUNT(*) > 1
+            """), params)
+            conn.execute(text("""
+                DELETE FROM engagement_snapshots
+                WHERE ts < :cutoff AND (post_key, ts / :bucket) IN (SELECT post_key, bucket_no FROM temp.snapshot_merge)
+            """), params)
+            conn.execute(text("""
+                INSERT INTO engagement_snapshots (post_key, ts, d_likes, d_comments, d_views)
+                SELECT post_key, ts, d_likes, d_comments, d_views FROM temp.snapshot_merge
+            """))
+            conn.execute(text("DROP TABLE temp.snapshot_merge"))
+        removed = before - conn.execute(text("SELECT COUNT(*) FROM engagement_snapshots")).scalar()
+    return removed
+
+
+def get_growth_curves(level="post", keys=None, freq="D", since=None):
+    """Kurva pertumbuhan kumulatif likes/comments/views per periode.
+
+    level: 'post' (link_pemberitaan), 'akun', atau 'unit' (pic_unit); keys: filter nilai level tersebut.
+    freq: frekuensi pandas ('D', 'W', 'M', ...). Nilai post di-carry forward antar periode sebelum
+    dijumlahkan per akun/unit. Return DataFrame [periode, <level>, likes, comments, views].
+    """
+    col = GROWTH_LEVELS[level]
+    sql = f"""
+        SELECT s.post_key, s.ts, s.d_likes, s.d_comments, s.d_views, m.{col} AS grp
+        FROM engagement_snapshots s
+        JOIN post_keys k ON k.post_key = s.post_key
+        JOIN monitoring_pln m ON m.link_pemberitaan = k.link_pemberitaan
+    """
+    params = {}
+    stmt = text(sql)
+    if keys:
+        stmt = text(sql + f" WHERE m.{col} IN :keys").bindparams(bindparam("keys", expanding=True))
+        params["keys"] = list(keys)
+    df = pd.read_sql(stmt, engine, params=params)
+    out_cols = ["periode", level] + METRICS
+    if df.empty:
+        return pd.DataFrame(columns=out_cols)
+
+    df = df.sort_values(["post_key", "ts"])
+    df[METRICS] = df.groupby("post_key")[["d_likes", "d_comments", "d_views"]].cumsum().to_numpy()
+    df["periode"] = pd.to_datetime(df["ts"], unit="s").dt.to_period(freq).dt.start_time
+
+    # Nilai terakhir per post per periode -> tabel lebar (periode x post), isi periode kosong ke depan
+    last = df.groupby(["periode", "post_key"])[METRICS].last()
+    wide = last.unstack("post_key")
+    full_index = pd.period_range(wide.index.min(), wide.index.max(), freq=freq).start_time
+    wide = wide.reindex(full_index).ffill().fillna(0)
+
+    post_group = df.drop_duplicates("post_key").set_index("post_key")["grp"]
+    grouped = wide.T.groupby([wide.columns.get_level_values(0),
+                              post_group.reindex(wide.columns.get_level_values(1)).to_numpy()]).sum().T
+    result = grouped.stack(level=1, future_stack=True) if _supports_future_stack() else grouped.stack(level=1)
+    result = result.reset_index()
+    result.columns = ["periode", level] + list(result.columns[2:])
+    result[METRICS] = result[METRICS].astype("int64")
+    if since is not None:
+        result = result[result["periode"] >= pd.Timestamp(since)]
+    return result[out_cols].sort_values([level, "periode"]).reset_index(drop=True)
+
+
+def _supports_future_stack():
+    return tuple(int(p) for p in pd.__version__.split(".")[:2]) >= (2, 1)
+
+
+def get_follower_growth(level="akun", freq="D", since=None):
+    """Jumlah follower per periode dari follower_history (dicatat setiap profil di-resolve).
+
+    level: 'akun' atau 'unit' (nama_unit dari daftar_akun_unit). Nilai terakhir per akun per
+    periode di-carry forward lalu dijumlahkan per unit. Return DataFrame [periode, <level>, followers].
+    """
+    df = pd.read_sql(text("""
+        SELECT h.username_ig, h.ts, h.followers, COALESCE(d.nama_unit, h.username_ig) AS unit
+        FROM follower_history h
+        LEFT JOIN daftar_akun_unit d ON REPLACE(d.username_ig, '@', '') = h.username_ig
+    """), engine)
+    out_cols = ["periode", level, "followers"]
+    if df.empty:
+        return pd.DataFrame(columns=out_cols)
+
+    df["periode"] = pd.to_datetime(df["ts"], unit="s").dt.to_period(freq).dt.start_time
+    wide = df.sort_values("ts").groupby(["periode", "username_ig"])["followers"].last().unstack("username_ig")
+    full_index = pd.period_range(wide.index.min(), wide.index.max(), freq=freq).start_time
+    wide = wide.reindex(full_index).ffill()
+
+    if level == "unit":
+        unit_of = df.drop_duplicates("username_ig").set_index("username_ig")["unit"]
+        wide = wide.T.groupby(unit_of.reindex(wide.columns).to_numpy()).sum(min_count=1).T
+    result = wide.stack().reset_index()
+    result.columns = out_cols
+    result["followers"] = result["followers"].astype("int64")
+    if since is not None:
+        result = result[result["periode"] >= pd.Timestamp(since)]
+    return result.sort_values([level, "periode"]).reset_index(drop=True)
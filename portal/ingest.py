@@ -0,0 +1,237 @@
+"""Ingest liputan Influencer/publik: post dengan hashtag terpantau dan post yang menandai akun unit.
+
+Sumber disimpan di tabel ingest_sources (kind 'hashtag' diatur admin, kind 'tagged' dibuat
+otomatis untuk setiap akun di daftar_akun_unit). Setiap sumber punya cursor inkremental:
+- last_post_at: tanggal post terbaru yang sudah tersimpan; iterasi berhenti begitu post
+  berturut-turut lebih lama dari ini (post lama yang muncul acak masih ditoleransi),
+- frozen + pending_post_at: posisi NodeIterator saat iterasi terputus (rate limit) dan
+  post terbaru yang sudah terbaca, agar run berikutnya melanjutkan tanpa celah.
+Penulisan ke monitoring_pln (kategori 'Influencer') dan job-nya ada di portal.sync.
+"""
+import json
+import time
+from datetime import datetime, timedelta
+
+from instaloader import FrozenNodeIterator
+from sqlalchemy import text
+
+from portal.db import engine
+from portal.instrumentation import phase
+from portal.scraper import get_post_source, log_notify, post_to_record, rate_limit_manager
+from portal.utils import extract_username
+
+INGEST_KATEGORI = "Influencer"
+# Run pertama sebuah sumber hanya mengambil post beberapa hari terakhir
+INITIAL_DAYS = 30
+# Post lebih lama dari cursor yang masih ditoleransi berturut-turut sebelum iterasi berhenti
+MAX_OUT_OF_ORDER = 5
+_TS = '%Y-%m-%d %H:%M:%S'
+
+
+def _now():
+    return datetime.now().strftime(_TS)
+
+
+def hashtag_key(name):
+    return f"hashtag:{name.lstrip('#').strip().lower()}"
+
+
+def tagged_key(username):
+    return f"tagged:{extract_username(username)}"
+
+
+def add_hashtag(name, nama_unit=None, added_by=None):
+    """Tambah/aktifkan hashtag terpantau. Return source_key"""
+    value = name.lstrip('#').strip().lower()
+    if not value:
+        raise ValueError("Hashtag kosong")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO ingest_sources (source_key, kind, value, nama_unit, active, added_by, created_at)
+            VALUES (:k, 'hashtag', :v, :n, 1, :by, :now)
+            ON CONFLICT(source_key) DO UPDATE SET active = 1, nama_unit = excluded.nama_unit
+        """), {"k": hashtag_key(value), "v": value, "n": nama_unit, "by": added_by, "now": _now()})
+    return hashtag_key(value)
+
+
+def set_source_active(source_key, active):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE ingest_sources SET active = :a WHERE source_key = :k"),
+                     {"a": 1 if active else 0, "k": source_key})
+
+
+def remove_source(source_key):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM ingest_sources WHERE source_key = :k"), {"k": source_key})
+
+
+def sync_tagged_sources():
+    """Pastikan setiap akun unit punya sumber 'tagged' (status aktif yang diatur admin dipertahankan)"""
+    with engine.begin() as conn:
+        units = conn.execute(text("SELECT nama_unit, username_ig FROM daftar_akun_unit")).fetchall()
+        existing = dict(conn.execute(text("SELECT source_key, nama_unit FROM ingest_sources WHERE kind = 'tagged'")).fetchall())
+        for nama_unit, username in units:
+            clean = extract_username(username or '')
+            # Hanya tulis jika sumber belum ada / unitnya berubah (dipanggil setiap halaman dirender)
+            if not clean or existing.get(tagged_key(clean), object()) == nama_unit:
+                continue
+            conn.execute(text("""
+                INSERT INTO ingest_sources (source_key, kind, value, nama_unit, active, created_at)
+                VALUES (:k, 'tagged', :v, :n, 1, :now)
+                ON CONFLICT(source_key) DO UPDATE SET nama_unit = excluded.nama_unit
+            """), {"k": tagged_key(clean), "v": clean, "n": nama_unit, "now": _now()})
+
+
+def list_sources(active_only=False):
+    """Sumber ingest (hashtag dulu) sebagai list of dict"""
+    with engine.begin() as conn:
+        rows = conn.execute(text(f"""
+            SELECT source_key, kind, value, nama_unit, active, last_post_at, pending_post_at, frozen,
+                   frozen IS NOT NULL AS has_cursor, last_run_at, last_status
+            FROM ingest_sources {"WHERE active = 1" if active_only else ""}
+            ORDER BY kind = 'tagged', value
+        """)).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def _owner_username(post):
+    """Username pemilik post; dari node feed atau cache ig_profiles dulu agar tidak menambah request"""
+    owner = (getattr(post, "_node", None) or {}).get("owner") or {}
+    if owner.get("username"):
+        return owner["username"]
+    if owner.get("id"):
+        with engine.begin() as conn:
+            row = conn.execute(text("SELECT username_ig FROM ig_profiles WHERE userid = :id"),
+                               {"id": int(owner["id"])}).fetchone()
+        if row:
+            return row[0]
+    return getattr(post, "owner_username", None)
+
+
+def _load_frozen(raw):
+    if not raw:
+        return None
+    try:
+        frozen = FrozenNodeIterator(**json.loads(raw))
+    except Exception:
+        return None
+    # Cursor Instagram kedaluwarsa (best_before Instaloader): mulai dari post terbaru
+    return frozen if frozen.best_before and frozen.best_before > time.time() else None
+
+
+def scrape_source(src, limit=50, notify=None, outcome=None, max_out_of_order=MAX_OUT_OF_ORDER):
+    """Generator record monitoring_pln (kategori Influencer) dari satu sumber ingest.
+
+    src: dict dari list_sources(). outcome diisi {'status': done/partial (limit tercapai)/interrupted/failed,
+    'newest', 'posts', 'rate_limited' (run ini kena 401/429)}
+    untuk commit_cursor() yang dipanggil penulis SETELAH record terakhir di-commit.
+    Jeda & budget request sama dengan sinkronisasi akun (rate_limit_manager + pacer global).
+    """
+    notify = notify or log_notify
+    outcome = outcome if outcome is not None else {}
+    outcome.update({"status": "failed", "newest": None, "posts": None, "rate_limited": False})
+    key = src["source_key"]
+    label = f"#{src['value']}" if src["kind"] == "hashtag" else f"tag @{src['value']}"
+    source_label = f"Hashtag #{src['value']}" if src["kind"] == "hashtag" else f"Tag @{src['value']}"
+
+    rate_limit_manager.wait_if_needed(key, notify)
+    hwm = datetime.strptime(src["last_post_at"], _TS) if src.get("last_post_at") else None
+    floor = hwm or datetime.now() - timedelta(days=INITIAL_DAYS)
+    post_source = get_post_source()
+    sess = post_source.checkout()
+    ok, error = True, None
+    try:
+        with phase("profile"):
+            try:
+                if src["kind"] == "hashtag":
+                    posts = post_source.hashtag_posts(sess, src["value"])
+                else:
+                    posts = post_source.tagged_posts(sess, src["value"])
+            except Exception as e:
+                outcome["rate_limited"] = _handle_error(e, key, post_source, sess, notify, f"Gagal membuka {label}")
+                return
+        frozen = _load_frozen(src.get("frozen"))
+        if frozen:
+            try:
+                posts.thaw(frozen)
+                notify("info", f"↪️ {label}: melanjutkan dari post ke-{frozen.total_index + 1}")
+            except Exception as e:
+                notify("debug", f"Cursor {label} tidak bisa dipakai: {e}")
+        outcome["posts"] = posts
+
+        count, older_streak, truncated = 0, 0, False
+        with phase("iteration"):
+            try:
+                for post in posts:
+                    if count >= limit:
+                        # Masih ada post baru di bawahnya: lanjutkan dari sini pada run berikutnya
+                        truncated = True
+                        break
+                    if post.date <= floor:
+                        older_streak += 1
+                        if older_streak > max_out_of_order:
+                            break
+                        continue
+                    older_streak = 0
+                    owner = _owner_username(post)
+                    if not owner:
+                        continue
+                    record = post_to_record(post, src.get("nama_unit") or "Pusat", extract_username(owner),
+                                            INGEST_KATEGORI)
+                    record["source"] = source_label
+                    if outcome["newest"] is None or post.date > outcome["newest"]:
+                        outcome["newest"] = post.date
+                    count += 1
+                    yield record
+            except Exception as e:
+                outcome["rate_limited"] = _handle_error(e, key, post_source, sess, notify, f"Gagal memuat post {label}")
+                outcome["status"] = "interrupted"
+                return
+        outcome["status"] = "partial" if truncated else "done"
+    except Exception as e:
+        ok, error = False, str(e)[:200]
+        raise
+    finally:
+        post_source.release(sess, ok=ok, error=error)
+
+
+def _handle_error(e, key, post_source, sess, notify, prefix):
+    """Catat error request; return True jika error-nya rate limit"""
+    error_msg = str(e)
+    if "401 Unauthorized" in error_msg or "Please wait" in error_msg or "429" in error_msg:
+        rate_limit_manager.mark_rate_limited(key)
+        post_source.mark_rate_limited(sess)
+        notify("warning", f"⚠️ {prefix}: Instagram membatasi akses (rate limit)")
+        return True
+    notify("warning", f"⚠️ {prefix}: {e}")
+    return False
+
+
+def commit_cursor(src, outcome):
+    """Majukan cursor sumber setelah record hasil scrape_source() tersimpan.
+    done: last_post_at = post terbaru yang pernah terbaca (termasuk run terputus sebelumnya);
+    partial/interrupted: simpan posisi iterator + post terbaru terbaca di pending_post_at."""
+    newest = outcome.get("newest").strftime(_TS) if outcome.get("newest") else None
+    frozen = None
+    if outcome["status"] in ("partial", "interrupted") and outcome.get("posts") is not None:
+        try:
+            frozen = json.dumps(outcome["posts"].freeze()._asdict())
+        except Exception:
+            frozen = None
+    with engine.begin() as conn:
+        if outcome["status"] == "done":
+            conn.execute(text("""
+                UPDATE ingest_sources SET
+                    last_post_at = NULLIF(MAX(COALESCE(last_post_at, ''), COALESCE(pending_post_at, ''),
+                                              COALESCE(:n, '')), ''),
+                    pending_post_at = NULL, frozen = NULL, last_run_at = :now, last_status = 'done'
+                WHERE source_key = :k
+            """), {"n": newest, "now": _now(), "k": src["source_key"]})
+        else:
+            conn.execute(text("""
+                UPDATE ingest_sources SET
+                    pending_post_at = CASE WHEN :n IS NULL THEN pending_post_at
+                                           ELSE MAX(COALESCE(pending_post_at, ''), :n) END,
+                    frozen = COALESCE(:f, frozen), last_run_at = :now, last_status = :s
+                WHERE source_key = :k
+            """), {"n": newest, "f": frozen, "now": _now(), "s": outcome["status"], "k": src["source_key"]})
@@ -0,0 +1,118 @@
+"""Instrumentasi sinkronisasi: rincian waktu per akun per run (tabel sync_metrics).
+
+SyncTimer diaktifkan di thread yang men-scrape satu akun; kode di scraper, pacing,
+dan rate limiter mencatat fasenya lewat phase()/count_request() tanpa perlu
+meneruskan objek timer. Di luar sinkronisasi (tidak ada timer aktif) semuanya no-op.
+Fase bersarang dihitung eksklusif: jeda di dalam iterasi tidak ikut dihitung sebagai iterasi.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+from portal.db import engine
+
+PHASES = ["profile", "iteration", "sleep", "rate_limit_wait", "db_write"]
+
+_local = threading.local()
+
+
+class SyncTimer:
+    """Akumulasi durasi per fase, jumlah request HTTP, dan hasil untuk satu akun"""
+    def __init__(self, username):
+        self.username = username
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.requests = 0
+        self.posts = 0
+        self.outcome = None
+        # Stack fase per thread: worker men-scrape sementara thread penulis mencatat db_write
+        self._stacks = {}
+
+    @contextmanager
+    def phase(self, name):
+        stack = self._stacks.setdefault(threading.get_ident(), [])
+        start = time.perf_counter()
+        stack.append(0.0)  # waktu fase anak yang dikurangkan dari fase ini
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            self.durations[name] += elapsed - children
+            if stack:
+                stack[-1] += elapsed
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def save(self, conn, job_id=None):
+        conn.execute(text("""
+            INSERT INTO sync_metrics (job_id, username_ig, started_at, total_s, profile_s, iteration_s, sleep_s,
+                                      rate_limit_wait_s, db_write_s, requests, posts, outcome)
+            VALUES (:job_id, :u, :started_at, :total, :profile, :iteration, :sleep, :rate_limit_wait, :db_write,
+                    :requests, :posts, :outcome)
+        """), {"job_id": job_id, "u": self.username, "started_at": self.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+               "total": round(self.total(), 3), **{k: round(v, 3) for k, v in self.durations.items()},
+               "requests": self.requests, "posts": self.posts, "outcome": self.outcome})
+
+
+def current_timer():
+    return getattr(_local, "timer", None)
+
+
+@contextmanager
+def activate(timer):
+    """Jadikan timer aktif di thread ini selama blok berjalan"""
+    previous = current_timer()
+    _local.timer = timer
+    try:
+        yield timer
+    finally:
+        _local.timer = previous
+
+
+@contextmanager
+def phase(name):
+    """Catat durasi blok ke fase `name` pada timer aktif (no-op tanpa timer)"""
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
+
+
+def count_request():
+    timer = current_timer()
+    if timer is not None:
+        timer.requests += 1
+
+
+def get_slowest_accounts(days=7, limit=10):
+    """Rata-rata rincian waktu per akun dalam `days` hari terakhir, akun paling lambat dulu"""
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    return pd.read_sql(text("""
+        SELECT username_ig, COUNT(*) AS runs, AVG(total_s) AS total_s, AVG(profile_s) AS profile_s,
+               AVG(iteration_s) AS iteration_s, AVG(sleep_s) AS sleep_s, AVG(rate_limit_wait_s) AS rate_limit_wait_s,
+               AVG(db_write_s) AS db_write_s, AVG(requests) AS requests, SUM(posts) AS posts,
+               SUM(outcome = 'rate_limited') AS rate_limited, SUM(outcome = 'failed') AS failed
+        FROM sync_metrics WHERE started_at >= :since
+        GROUP BY username_ig ORDER BY total_s DESC LIMIT :limit
+    """), engine, params={"since": since, "limit": int(limit)})
+
+
+def get_sync_trend(days=30):
+    """Total waktu per fase dan jumlah request per hari"""
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    return pd.read_sql(text("""
+        SELECT substr(started_at, 1, 10) AS tanggal, COUNT(*) AS akun, SUM(total_s) AS total_s,
+               SUM(profile_s) AS profile_s, SUM(iteration_s) AS iteration_s, SUM(sleep_s) AS sleep_s,
+               SUM(rate_limit_wait_s) AS rate_limit_wait_s, SUM(db_write_s) AS db_write_s, SUM(requests) AS requests
+        FROM sync_metrics WHERE started_at >= :since
+        GROUP BY tanggal ORDER BY tanggal
+    """), engine, params={"since": since})
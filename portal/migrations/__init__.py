@@ -0,0 +1,82 @@
+"""Migrasi skema versioned untuk DB utama.
+
+Setiap migrasi adalah modul `vNNN_nama.py` di paket ini dengan fungsi `upgrade(conn)`;
+NNN adalah nomor versi dan dijalankan berurutan. Versi yang sudah diterapkan dicatat di
+tabel schema_version sehingga setiap migrasi hanya berjalan sekali per database.
+run_migrations() dijaga per proses (cukup sekali saat server/worker start, bukan setiap
+rerun Streamlit) dan antar proses lewat write-lock SQLite.
+"""
+import importlib
+import pkgutil
+import threading
+from datetime import datetime
+
+from sqlalchemy import text
+
+_lock = threading.Lock()
+_done = set()  # URL database yang sudah dimigrasi di proses ini
+
+
+def add_missing_columns(conn, table_name, columns):
+    """Tambahkan kolom yang belum ada. columns: dict nama_kolom -> definisi (mis. "user_id INTEGER")"""
+    existing = [r[1] for r in conn.execute(text(f"PRAGMA table_info('{table_name}')")).fetchall()]
+    for col, definition in columns.items():
+        if col not in existing:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {definition}"))
+
+
+def list_migrations():
+    """[(versi, nama, modul)] urut versi"""
+    found = []
+    for info in pkgutil.iter_modules(__path__):
+        name = info.name
+        if name.startswith("v") and name[1:4].isdigit():
+            found.append((int(name[1:4]), name, importlib.import_module(f"{__name__}.{name}")))
+    return sorted(found)
+
+
+def _applied(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """))
+    return {r[0] for r in conn.execute(text("SELECT version FROM schema_version")).fetchall()}
+
+
+def run_migrations(engine, force=False):
+    """Terapkan migrasi yang belum tercatat. Return list nama migrasi yang baru diterapkan.
+
+    Panggilan berikutnya di proses yang sama langsung kembali (kecuali force=True).
+    Setiap migrasi berjalan dalam transaksinya sendiri bersama baris schema_version-nya,
+    jadi migrasi yang gagal tidak tercatat dan diulang pada start berikutnya.
+    """
+    key = str(engine.url)
+    if key in _done and not force:
+        return []
+    with _lock:
+        if key in _done and not force:
+            return []
+        migrations = list_migrations()
+        with engine.begin() as conn:
+            pending = [m for m in migrations if m[0] not in _applied(conn)]
+        applied = []
+        for version, name, module in pending:
+            with engine.begin() as conn:
+                # Ambil write-lock dulu lalu cek ulang: proses lain mungkin baru saja menerapkannya
+                conn.execute(text("UPDATE schema_version SET version = version WHERE 0"))
+                if conn.execute(text("SELECT 1 FROM schema_version WHERE version = :v"), {"v": version}).fetchone():
+                    continue
+                module.upgrade(conn)
+                conn.execute(text("INSERT INTO schema_version (version, name, applied_at) VALUES (:v, :n, :at)"),
+                             {"v": version, "n": name, "at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+            applied.append(name)
+        _done.add(key)
+        return applied
+
+
+def current_version(engine):
+    with engine.begin() as conn:
+        return max(_applied(conn), default=0)
@@ -0,0 +1,355 @@
+"""Skema awal: semua tabel aplikasi seperti sebelum sistem migrasi.
+
+Idempoten (IF NOT EXISTS + kolom yang hilang ditambahkan) agar DB lama yang dibuat oleh
+init_db()/ensure_columns versi sebelumnya ikut tercatat di versi 1 tanpa kehilangan data.
+"""
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import text
+
+from portal.migrations import add_missing_columns
+
+
+def upgrade(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT DEFAULT 'user',
+            unit TEXT,
+            created_at TEXT
+        )
+    """))
+    # Admin bawaan (password admin123) hanya jika belum ada
+    conn.execute(text("""
+        INSERT OR IGNORE INTO users (username, password, role, unit, created_at)
+        VALUES ('admin', :pass, 'admin', 'ADMIN', :ca)
+    """), {"pass": hashlib.sha256('admin123'.encode()).hexdigest(), "ca": datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS daftar_akun_unit (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nama_unit TEXT,
+            username_ig TEXT UNIQUE
+        )
+    """))
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS monitoring_pln (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tanggal TEXT, bulan TEXT, tahun TEXT,
+            judul_pemberitaan TEXT, 
+            link_pemberitaan TEXT UNIQUE,
+            platform TEXT, tipe_konten TEXT, 
+            pic_unit TEXT, 
+            akun TEXT,
+            kategori TEXT,
+            likes INTEGER DEFAULT 0, 
+            comments INTEGER DEFAULT 0,
+            views INTEGER DEFAULT 0,
+            last_updated TEXT
+        )
+    """))
+    # Ensure unique index exists for ON CONFLICT to work reliably
+    try:
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_monitoring_link ON monitoring_pln(link_pemberitaan)"))
+    except Exception:
+        pass
+
+    # High-water mark per akun untuk scraping inkremental
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS sync_state_akun (
+            username_ig TEXT PRIMARY KEY,
+            last_shortcode TEXT,
+            last_post_date TEXT,
+            last_synced_at TEXT
+        )
+    """))
+
+    # Cache profil Instagram hasil resolusi + riwayat jumlah follower per akun
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS ig_profiles (
+            username_ig TEXT PRIMARY KEY,
+            userid INTEGER,
+            full_name TEXT,
+            followers INTEGER,
+            mediacount INTEGER,
+            synced_mediacount INTEGER,
+            fetched_at TEXT
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS follower_history (
+            username_ig TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            followers INTEGER NOT NULL,
+            PRIMARY KEY (username_ig, ts)
+        ) WITHOUT ROWID
+    """))
+
+    # Posisi iterasi post yang terputus (FrozenNodeIterator Instaloader, JSON) per akun
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS scrape_cursors (
+            username_ig TEXT PRIMARY KEY,
+            request_key TEXT NOT NULL,
+            frozen TEXT NOT NULL,
+            window_from TEXT,
+            window_to TEXT,
+            updated_at TEXT
+        )
+    """))
+
+    # Rincian waktu sinkronisasi per akun per run (portal.instrumentation)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS sync_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER,
+            username_ig TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            total_s REAL,
+            profile_s REAL,
+            iteration_s REAL,
+            sleep_s REAL,
+            rate_limit_wait_s REAL,
+            db_write_s REAL,
+            requests INTEGER,
+            posts INTEGER,
+            outcome TEXT
+        )
+    """))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sync_metrics_started ON sync_metrics(started_at)"))
+
+    # Sumber ingest Influencer (hashtag & tagged post per unit) + cursor inkremental (portal.ingest)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS ingest_sources (
+            source_key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            nama_unit TEXT,
+            active INTEGER DEFAULT 1,
+            last_post_at TEXT,
+            pending_post_at TEXT,
+            frozen TEXT,
+            last_run_at TEXT,
+            last_status TEXT,
+            added_by TEXT,
+            created_at TEXT
+        )
+    """))
+
+    # Riwayat engagement (append-only): kunci integer per post + delta likes/comments/views,
+    # ditulis otomatis oleh trigger setiap kali nilai di monitoring_pln berubah
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS post_keys (
+            post_key INTEGER PRIMARY KEY,
+            link_pemberitaan TEXT UNIQUE NOT NULL
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS engagement_snapshots (
+            post_key INTEGER NOT NULL,
+            ts INTEGER NOT NULL,
+            d_likes INTEGER NOT NULL DEFAULT 0,
+            d_comments INTEGER NOT NULL DEFAULT 0,
+            d_views INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (post_key, ts)
+        ) WITHOUT ROWID
+    """))
+
+    # Antrean job sinkronisasi (diisi halaman Sinkronisasi Data, dikerjakan `python -m portal.sync`)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS sync_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT DEFAULT 'queued',
+            params TEXT,
+            requested_by TEXT,
+            worker_id TEXT,
+            created_at TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            total_accounts INTEGER DEFAULT 0,
+            processed_accounts INTEGER DEFAULT 0,
+            inserted INTEGER DEFAULT 0,
+            updated INTEGER DEFAULT 0,
+            message TEXT
+        )
+    """))
+
+    # Checkpoint per akun dalam satu job (queued, running, done, rate_limited, failed)
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS sync_job_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id INTEGER NOT NULL,
+            username_ig TEXT NOT NULL,
+            nama_unit TEXT,
+            kategori TEXT,
+            status TEXT DEFAULT 'queued',
+            attempts INTEGER DEFAULT 0,
+            inserted INTEGER DEFAULT 0,
+            updated INTEGER DEFAULT 0,
+            posts_fetched INTEGER DEFAULT 0,
+            error TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            UNIQUE(job_id, username_ig)
+        )
+    """))
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS sync_worker_heartbeat (
+            worker_id TEXT PRIMARY KEY,
+            pid INTEGER,
+            hostname TEXT,
+            state TEXT,
+            last_seen TEXT
+        )
+    """))
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS pengajuan_dokumentasi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nama_pengaju TEXT,
+            user_id INTEGER,
+            nomor_telpon TEXT,
+            unit TEXT,
+            tanggal_acara TEXT,
+            jam_mulai TEXT,
+            jam_selesai TEXT,
+            output_link_drive TEXT,
+            output_type TEXT,
+            biaya REAL DEFAULT 0,
+            deadline_penyelesaian TEXT,
+            status TEXT DEFAULT 'pending',
+            hasil_link_drive TEXT,
+            added_to_calendar INTEGER DEFAULT 0,
+            created_at TEXT,
+            updated_at TEXT,
+            notes TEXT
+        )
+    """))
+
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS dokumentasi_calendar (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pengajuan_id INTEGER,
+            tanggal TEXT,
+            nama_kegiatan TEXT,
+            unit TEXT,
+            status TEXT,
+            created_at TEXT
+        )
+    """))
+
+    # DB lama (sebelum sistem migrasi): tambahkan kolom yang belum ada
+    add_missing_columns(conn, 'pengajuan_dokumentasi', {
+        'user_id': "user_id INTEGER",
+        'nomor_telpon': "nomor_telpon TEXT",
+        'unit': "unit TEXT",
+        'tanggal_acara': "tanggal_acara TEXT",
+        'jam_mulai': "jam_mulai TEXT",
+        'jam_selesai': "jam_selesai TEXT",
+        'output_link_drive': "output_link_drive TEXT",
+        'output_type': "output_type TEXT",
+        'biaya': "biaya REAL DEFAULT 0",
+        'deadline_penyelesaian': "deadline_penyelesaian TEXT",
+        'status': "status TEXT DEFAULT 'pending'",
+        'hasil_link_drive': "hasil_link_drive TEXT",
+        'hasil_video': "hasil_video TEXT",
+        'hasil_flyer': "hasil_flyer TEXT",
+        'rejection_reason': "rejection_reason TEXT",
+        'added_to_calendar': "added_to_calendar INTEGER DEFAULT 0",
+        'created_at': "created_at TEXT",
+        'updated_at': "updated_at TEXT",
+        'notes': "notes TEXT"
+    })
+
+    add_missing_columns(conn, 'monitoring_pln', {
+        'platform': "platform TEXT DEFAULT 'Instagram'",
+        'tipe_konten': "tipe_konten TEXT DEFAULT 'Feeds'",
+        'comments': "comments INTEGER DEFAULT 0",
+        'source': "source TEXT DEFAULT 'Scraping'"
+    })
+
+    add_missing_columns(conn, 'dokumentasi_calendar', {
+        'pengajuan_id': "pengajuan_id INTEGER",
+        'tanggal': "tanggal TEXT",
+        'nama_kegiatan': "nama_kegiatan TEXT",
+        'unit': "unit TEXT",
+        'status': "status TEXT",
+        'doc_link': "doc_link TEXT",
+        'created_at': "created_at TEXT"
+    })
+
+    add_missing_columns(conn, 'sync_job_items', {
+        'posts_fetched': "posts_fetched INTEGER DEFAULT 0"
+    })
+
+    # Trigger riwayat engagement dibuat setelah kolom likes/comments/views dipastikan ada
+    has_triggers = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='trg_engagement_update'")).fetchone()
+    if not has_triggers:
+        _create_engagement_triggers(conn)
+
+
+# Snapshot dengan detik yang sama digabung (delta dijumlahkan) agar PK (post_key, ts) tidak bentrok
+_SNAPSHOT_UPSERT = """
+    ON CONFLICT(post_key, ts) DO UPDATE SET
+        d_likes = d_likes + excluded.d_likes,
+        d_comments = d_comments + excluded.d_comments,
+        d_views = d_views + excluded.d_views
+"""
+
+
+def _create_engagement_triggers(conn):
+    """Buat trigger snapshot engagement + baseline untuk post yang sudah ada (sekali saja)"""
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_engagement_insert AFTER INSERT ON monitoring_pln
+        WHEN NEW.link_pemberitaan IS NOT NULL
+        BEGIN
+            INSERT OR IGNORE INTO post_keys (link_pemberitaan) VALUES (NEW.link_pemberitaan);
+            INSERT INTO engagement_snapshots (post_key, ts, d_likes, d_comments, d_views)
+            SELECT post_key, CAST(strftime('%s', 'now') AS INTEGER),
+                   COALESCE(NEW.likes, 0), COALESCE(NEW.comments, 0), COALESCE(NEW.views, 0)
+            FROM post_keys WHERE link_pemberitaan = NEW.link_pemberitaan
+            {_SNAPSHOT_UPSERT};
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_engagement_update AFTER UPDATE OF likes, comments, views ON monitoring_pln
+        WHEN NEW.link_pemberitaan IS OLD.link_pemberitaan
+             AND (NEW.likes IS NOT OLD.likes OR NEW.comments IS NOT OLD.comments OR NEW.views IS NOT OLD.views)
+        BEGIN
+            INSERT INTO engagement_snapshots (post_key, ts, d_likes, d_comments, d_views)
+            SELECT post_key, CAST(strftime('%s', 'now') AS INTEGER),
+                   COALESCE(NEW.likes, 0) - COALESCE(OLD.likes, 0),
+                   COALESCE(NEW.comments, 0) - COALESCE(OLD.comments, 0),
+                   COALESCE(NEW.views, 0) - COALESCE(OLD.views, 0)
+            FROM post_keys WHERE link_pemberitaan = NEW.link_pemberitaan
+            {_SNAPSHOT_UPSERT};
+        END
+    """))
+    conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS trg_engagement_delete AFTER DELETE ON monitoring_pln
+        WHEN OLD.link_pemberitaan IS NOT NULL
+        BEGIN
+            DELETE FROM engagement_snapshots
+            WHERE post_key = (SELECT post_key FROM post_keys WHERE link_pemberitaan = OLD.link_pemberitaan);
+            DELETE FROM post_keys WHERE link_pemberitaan = OLD.link_pemberitaan;
+        END
+    """))
+    # Baseline: nilai saat ini sebagai snapshot pertama (waktu = last_updated jika ada)
+    conn.execute(text("""
+        INSERT OR IGNORE INTO post_keys (link_pemberitaan)
+        SELECT link_pemberitaan FROM monitoring_pln WHERE link_pemberitaan IS NOT NULL
+    """))
+    conn.execute(text(f"""
+        INSERT INTO engagement_snapshots (post_key, ts, d_likes, d_comments, d_views)
+        SELECT k.post_key,
+               COALESCE(CAST(strftime('%s', m.last_updated) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)),
+               COALESCE(m.likes, 0), COALESCE(m.comments, 0), COALESCE(m.views, 0)
+        FROM monitoring_pln m JOIN post_keys k ON k.link_pemberitaan = m.link_pemberitaan
+        WHERE NOT EXISTS (SELECT 1 FROM engagement_snapshots s WHERE s.post_key = k.post_key)
+        {_SNAPSHOT_UPSERT}
+    """))
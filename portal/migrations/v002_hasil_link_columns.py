@@ -0,0 +1,14 @@
+"""Kolom hasil_link_1..3 (nama lama link hasil dokumentasi).
+
+Form admin masih menulisnya bersamaan dengan hasil_link_drive/hasil_flyer/hasil_video, tapi
+hanya DB lama yang punya kolom ini; di DB baru UPDATE tersebut gagal "no such column".
+"""
+from portal.migrations import add_missing_columns
+
+
+def upgrade(conn):
+    add_missing_columns(conn, 'pengajuan_dokumentasi', {
+        'hasil_link_1': "hasil_link_1 TEXT",
+        'hasil_link_2': "hasil_link_2 TEXT",
+        'hasil_link_3': "hasil_link_3 TEXT",
+    })
@@ -0,0 +1,32 @@
+"""Index untuk pola query aplikasi (filter/grouping monitoring, riwayat pengajuan, join kalender).
+
+Cek rencana query-nya dengan `python check_query_plans.py`.
+"""
+from sqlalchemy import text
+
+INDEXES = [
+    # Rekap per unit/periode; hapus unit (DELETE ... WHERE pic_unit)
+    "CREATE INDEX IF NOT EXISTS ix_monitoring_unit_periode ON monitoring_pln(pic_unit, tahun, bulan, kategori)",
+    # Filter periode lintas unit (dashboard/rekap bulanan)
+    "CREATE INDEX IF NOT EXISTS ix_monitoring_periode ON monitoring_pln(tahun, bulan, kategori)",
+    # Per akun: frekuensi posting penjadwal membaca (akun, tanggal) langsung dari index
+    "CREATE INDEX IF NOT EXISTS ix_monitoring_akun ON monitoring_pln(akun, tanggal)",
+    # Liputan Influencer per sumber (hashtag/tag) vs Scraping/Manual
+    "CREATE INDEX IF NOT EXISTS ix_monitoring_kategori_source ON monitoring_pln(kategori, source)",
+    # Riwayat pengajuan user: WHERE user_id = ? ORDER BY created_at DESC tanpa sort
+    "CREATE INDEX IF NOT EXISTS ix_pengajuan_user_created ON pengajuan_dokumentasi(user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_pengajuan_status ON pengajuan_dokumentasi(status, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_pengajuan_unit ON pengajuan_dokumentasi(unit, created_at)",
+    # Penjadwal: sukses/gagal terakhir per akun (GROUP BY username_ig) langsung dari index
+    "CREATE INDEX IF NOT EXISTS ix_sync_metrics_outcome ON sync_metrics(outcome, username_ig, started_at)",
+    # Join/hapus kalender per pengajuan
+    "CREATE INDEX IF NOT EXISTS ix_calendar_pengajuan ON dokumentasi_calendar(pengajuan_id)",
+    # Link dokumentasi yang sudah diisi: partial + covering, tidak membaca baris kalender lain
+    """CREATE INDEX IF NOT EXISTS ix_calendar_doc_link ON dokumentasi_calendar(pengajuan_id, doc_link)
+       WHERE doc_link IS NOT NULL AND doc_link != ''""",
+]
+
+
+def upgrade(conn):
+    for ddl in INDEXES:
+        conn.execute(text(ddl))
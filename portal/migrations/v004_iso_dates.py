@@ -0,0 +1,68 @@
+"""Kolom tanggal ISO (YYYY-MM-DD) yang bisa diurutkan dan difilter rentang di SQL.
+
+monitoring_pln.tanggal_iso, dokumentasi_calendar.tanggal_iso, dan
+pengajuan_dokumentasi.tanggal_acara_iso diturunkan dari kolom teks dd/mm/YYYY yang sudah ada
+(tetap dipakai untuk tampilan). Trigger mengisinya pada setiap INSERT/UPDATE kolom asal, jadi
+semua jalur tulis (form, sinkronisasi, skrip) ikut terisi tanpa perlu diubah.
+"""
+from sqlalchemy import text
+
+from portal.migrations import add_missing_columns
+from portal.utils import parse_date_str
+
+# (tabel, kolom teks asal, kolom ISO)
+DATE_COLUMNS = [
+    ("monitoring_pln", "tanggal", "tanggal_iso"),
+    ("dokumentasi_calendar", "tanggal", "tanggal_iso"),
+    ("pengajuan_dokumentasi", "tanggal_acara", "tanggal_acara_iso"),
+]
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_monitoring_tanggal ON monitoring_pln(tanggal_iso)",
+    "CREATE INDEX IF NOT EXISTS ix_monitoring_unit_tanggal ON monitoring_pln(pic_unit, tanggal_iso)",
+    # Menggantikan (akun, tanggal): frekuensi posting per akun kini difilter lewat tanggal_iso
+    "DROP INDEX IF EXISTS ix_monitoring_akun",
+    "CREATE INDEX IF NOT EXISTS ix_monitoring_akun_tanggal ON monitoring_pln(akun, tanggal_iso)",
+    "CREATE INDEX IF NOT EXISTS ix_calendar_tanggal ON dokumentasi_calendar(tanggal_iso)",
+    "CREATE INDEX IF NOT EXISTS ix_pengajuan_tanggal ON pengajuan_dokumentasi(tanggal_acara_iso)",
+]
+
+
+def iso_date_sql(col):
+    """Ekspresi SQL: teks dd/mm/YYYY (juga d/m/YYYY), YYYY-MM-DD[...], atau dd-mm-YYYY -> 'YYYY-MM-DD'; lainnya NULL"""
+    return f"""CASE
+        WHEN {col} GLOB '[0-9]*/[0-9]*/[0-9][0-9][0-9][0-9]' THEN date(printf('%04d-%02d-%02d',
+            substr({col}, -4), substr({col}, instr({col}, '/') + 1, length({col}) - instr({col}, '/') - 5),
+            substr({col}, 1, instr({col}, '/') - 1)))
+        WHEN {col} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' THEN date(substr({col}, 1, 10))
+        WHEN {col} GLOB '[0-9][0-9]-[0-9][0-9]-[0-9][0-9][0-9][0-9]' THEN date(printf('%s-%s-%s',
+            substr({col}, 7, 4), substr({col}, 4, 2), substr({col}, 1, 2)))
+    END"""
+
+
+def upgrade(conn):
+    for table, source, iso in DATE_COLUMNS:
+        add_missing_columns(conn, table, {iso: f"{iso} TEXT"})
+        conn.execute(text(f"UPDATE {table} SET {iso} = {iso_date_sql(source)}"))
+        # Format lain yang masih bisa dibaca parse_date_str (mis. '5 Jan 2026') dibackfill dari Python
+        leftovers = conn.execute(text(
+            f"SELECT rowid, {source} FROM {table} WHERE {iso} IS NULL AND COALESCE({source}, '') != ''")).fetchall()
+        for rowid, value in leftovers:
+            parsed = parse_date_str(value)
+            if parsed:
+                conn.execute(text(f"UPDATE {table} SET {iso} = :d WHERE rowid = :r"),
+                             {"d": parsed.isoformat(), "r": rowid})
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{iso}_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE {table} SET {iso} = {iso_date_sql(f"NEW.{source}")} WHERE rowid = NEW.rowid;
+            END
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{iso}_update AFTER UPDATE OF {source} ON {table}
+            BEGIN
+                UPDATE {table} SET {iso} = {iso_date_sql(f"NEW.{source}")} WHERE rowid = NEW.rowid;
+            END
+        """))
+    for ddl in INDEXES:
+        conn.execute(text(ddl))
@@ -0,0 +1,6 @@
+"""Index sumber data monitoring_pln untuk daftar pilihan filter "Sumber Data" (portal.monitoring)."""
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_monitoring_source ON monitoring_pln(source)"))
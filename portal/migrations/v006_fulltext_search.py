@@ -0,0 +1,46 @@
+"""Index teks penuh (SQLite FTS5) untuk caption post dan nama pengajuan/kegiatan.
+
+Tabel FTS memakai external content (teks tidak disimpan dua kali): isinya dibaca dari tabel
+asal lewat rowid, dan trigger insert/update/delete menjaga index tetap sinkron untuk semua
+jalur tulis. Tokenizer unicode61 tanpa diakritik; index prefix 2-3 huruf untuk pencarian
+sambil mengetik.
+"""
+from sqlalchemy import text
+
+# (tabel fts, tabel asal, kolom teks, kolom rowid tabel asal)
+FTS_INDEXES = [
+    ("monitoring_fts", "monitoring_pln", "judul_pemberitaan", "rowid"),
+    ("pengajuan_fts", "pengajuan_dokumentasi", "nama_pengaju", "id"),
+    ("calendar_fts", "dokumentasi_calendar", "nama_kegiatan", "id"),
+]
+
+
+def upgrade(conn):
+    for fts, table, column, rowid in FTS_INDEXES:
+        conn.execute(text(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {column}, content='{table}', content_rowid='{rowid}',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {fts} (rowid, {column}) VALUES (NEW.{rowid}, NEW.{column});
+            END
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', OLD.{rowid}, OLD.{column});
+            END
+        """))
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {column} ON {table}
+            BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', OLD.{rowid}, OLD.{column});
+                INSERT INTO {fts} (rowid, {column}) VALUES (NEW.{rowid}, NEW.{column});
+            END
+        """))
+        # Backfill: bangun ulang index dari isi tabel asal
+        conn.execute(text(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"))
@@ -0,0 +1,173 @@
+"""Query halaman "Rekapitulasi Monitoring": filter panel -> SQL berparameter di monitoring_pln.
+
+Halaman tidak memuat seluruh tabel: jumlah baris, agregat heatmap, dan satu halaman
+editor masing-masing satu query dengan WHERE yang sama (build_filter), dan daftar
+pilihan unit/akun/sumber diambil dengan loose index scan (satu lookup index per nilai).
+Kata kunci caption dicocokkan lewat index FTS5 (portal.search), bukan LIKE '%..%'.
+NULL diperlakukan sama seperti pre-processing lama (unit 'Unknown', kategori 'Korporat',
+sumber 'Scraping').
+"""
+import pandas as pd
+from sqlalchemy import text
+
+from portal.db import engine
+from portal.search import CAPTION_FTS, fts_query, match_condition, snippet_sql
+from portal.utils import get_month_order
+
+DEFAULT_PAGE_SIZE = 100
+# Urutan editor: post terbaru dulu; rowid sebagai pemutus seri (kolom id bisa NULL di data lama),
+# dilayani index (.., tanggal_iso) tanpa sort karena rowid ikut tersimpan di setiap entri index
+PAGE_ORDER = "tanggal_iso DESC, rowid DESC"
+NULL_DEFAULTS = {"pic_unit": "Unknown", "kategori": "Korporat", "source": "Scraping"}
+# Kolom yang boleh dipakai distinct_values(); masing-masing punya index berawalan kolom tsb
+DISTINCT_COLUMNS = ("pic_unit", "akun", "source")
+
+
+def normalize_month(val):
+    """'1'/'01' -> 'Januari'; nama bulan dan nilai lain dikembalikan apa adanya (tanpa spasi)"""
+    v = str(val).strip() if val is not None and not pd.isna(val) else ''
+    if v.isdigit() and 1 <= int(v) <= 12:
+        return get_month_order()[int(v) - 1]
+    return v
+
+
+def _prepare(df):
+    """Samakan nilai kosong/format seperti tampilan lama"""
+    for col, default in NULL_DEFAULTS.items():
+        if col in df.columns:
+            df[col] = df[col].fillna(default)
+    if 'tahun' in df.columns:
+        df['tahun'] = df['tahun'].astype(str)
+    if 'bulan' in df.columns:
+        df['bulan'] = df['bulan'].map(normalize_month)
+    return df
+
+
+def _equals(column, value, params):
+    params[column] = value
+    if NULL_DEFAULTS.get(column) == value:
+        return f"({column} = :{column} OR {column} IS NULL)"
+    return f"{column} = :{column}"
+
+
+def _conditions(unit=None, akun=None, kategori=None, source=None, date_from=None, date_to=None):
+    conds, params = [], {}
+    if unit:
+        conds.append(_equals("pic_unit", unit, params))
+    if akun:
+        conds.append(_equals("akun", akun, params))
+    if kategori:
+        conds.append(_equals("kategori", kategori, params))
+    if source:
+        conds.append(_equals("source", source, params))
+    if date_from and date_to:
+        conds.append("tanggal_iso BETWEEN :date_from AND :date_to")
+        params.update(date_from=date_from, date_to=date_to)
+    return conds, params
+
+
+def _where(conds):
+    return ("WHERE " + " AND ".join(conds)) if conds else ""
+
+
+def build_filter(search=None, **filters):
+    """Filter panel -> (klausa WHERE, params). Nilai kosong/None berarti tanpa filter.
+    filters: unit, akun, kategori, source, date_from/date_to ('YYYY-MM-DD', keduanya wajib
+    agar filter tanggal aktif). search: kata kunci caption lewat index FTS (prefix per kata)"""
+    conds, params = _conditions(**filters)
+    match = fts_query(search)
+    if match:
+        # rowid ditulis lengkap agar klausa tetap jelas saat digabung dengan tabel FTS (search_sql)
+        conds.insert(0, match_condition(CAPTION_FTS, "monitoring_pln.rowid"))
+        params["search"] = match
+    return _where(conds), params
+
+
+def count_sql(where=""):
+    return f"SELECT COUNT(*) FROM monitoring_pln {where}"
+
+
+def page_sql(where=""):
+    return f"SELECT * FROM monitoring_pln {where} ORDER BY {PAGE_ORDER} LIMIT :limit OFFSET :offset"
+
+
+def heatmap_sql(where=""):
+    return f"""
+        SELECT tahun, pic_unit, bulan, COUNT(*) AS posts
+        FROM monitoring_pln {where}
+        GROUP BY tahun, pic_unit, bulan
+    """
+
+
+def search_sql(conds=()):
+    """Caption paling relevan (bm25) dengan cuplikan bertanda; conds = filter lain tanpa kata kunci"""
+    extra = "".join(f" AND {c}" for c in conds)
+    return f"""
+        SELECT monitoring_pln.tanggal, monitoring_pln.akun, monitoring_pln.pic_unit,
+               monitoring_pln.link_pemberitaan, monitoring_pln.likes, monitoring_pln.views,
+               {snippet_sql(CAPTION_FTS)} AS cuplikan
+        FROM {CAPTION_FTS} JOIN monitoring_pln ON monitoring_pln.rowid = {CAPTION_FTS}.rowid
+        WHERE {CAPTION_FTS} MATCH :search{extra}
+        ORDER BY {CAPTION_FTS}.rank LIMIT :limit
+    """
+
+
+def distinct_sql(column):
+    """Loose index scan: nilai berikutnya = MIN(kolom) > nilai sebelumnya, O(jumlah nilai x log n)"""
+    if column not in DISTINCT_COLUMNS:
+        raise ValueError(f"Kolom tidak didukung: {column}")
+    return f"""
+        WITH RECURSIVE vals(v) AS (
+            SELECT MIN({column}) FROM monitoring_pln
+            UNION ALL
+            SELECT (SELECT MIN({column}) FROM monitoring_pln WHERE {column} > vals.v) FROM vals WHERE vals.v IS NOT NULL
+        )
+        SELECT v FROM vals WHERE v IS NOT NULL
+    """
+
+
+def count_posts(where="", params=None):
+    with engine.begin() as conn:
+        return int(conn.execute(text(count_sql(where)), params or {}).scalar())
+
+
+def load_page(where="", params=None, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """Baris halaman ke-`page` (mulai 1) hasil filter, post terbaru dulu"""
+    params = {**(params or {}), "limit": int(page_size), "offset": (max(int(page), 1) - 1) * int(page_size)}
+    return _prepare(pd.read_sql(text(page_sql(where)), engine, params=params))
+
+
+def load_filtered(where="", params=None):
+    """Semua baris hasil filter (untuk ekspor Excel; dipanggil hanya saat diminta)"""
+    return _prepare(pd.read_sql(text(f"SELECT * FROM monitoring_pln {where} ORDER BY {PAGE_ORDER}"),
+                                engine, params=params or {}))
+
+
+def heatmap_counts(where="", params=None):
+    """Jumlah post per (tahun, pic_unit, bulan) hasil filter; bulan angka / tahun angka digabung
+    dengan nama bulan / tahun teks yang sama"""
+    df = _prepare(pd.read_sql(text(heatmap_sql(where)), engine, params=params or {}))
+    if df.empty:
+        return df
+    return df.groupby(['tahun', 'pic_unit', 'bulan'], as_index=False)['posts'].sum()
+
+
+def search_captions(search, limit=10, **filters):
+    """Top `limit` caption paling relevan untuk kata kunci + filter panel (kolom 'cuplikan'
+    berisi penanda mentah; tampilkan lewat portal.search.marked_html)"""
+    match = fts_query(search)
+    if not match:
+        return pd.DataFrame()
+    conds, params = _conditions(**filters)
+    params.update(search=match, limit=int(limit))
+    return pd.read_sql(text(search_sql(conds)), engine, params=params)
+
+
+def distinct_values(column):
+    """Nilai unik terurut untuk pilihan filter (NULL tampil sebagai nilai default-nya)"""
+    with engine.begin() as conn:
+        values = [r[0] for r in conn.execute(text(distinct_sql(column))).fetchall()]
+        if column in NULL_DEFAULTS and NULL_DEFAULTS[column] not in values and conn.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM monitoring_pln WHERE {column} IS NULL)")).scalar():
+            values = sorted(values + [NULL_DEFAULTS[column]])
+    return values
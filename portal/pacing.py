@@ -0,0 +1,176 @@
+"""Pacing adaptif (AIMD) untuk request Instagram.
+
+Setiap request HTTP yang benar-benar dikirim Instaloader dibebankan satu token
+(lewat PacedRateController), sehingga post yang dibaca dari halaman yang sudah
+diambil tidak memakan jeda. Laju token global dan jumlah akun paralel naik
+sedikit demi sedikit selama tidak ada 429/401, dan dipotong setengah begitu
+Instagram membatasi. State disimpan di file SQLite rate limiter agar semua
+proses memakai laju yang sama.
+"""
+import math
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+import instaloader
+
+from portal.instrumentation import count_request, current_timer, phase
+
+
+class AdaptivePacer:
+    """AIMD atas laju request global (request/detik) dan jumlah akun yang di-scrape bersamaan.
+
+    - Additive increase: setiap `increase_every` request tanpa rate limit, laju naik `increase`
+      dan slot paralel naik satu (sampai max_rate / max_concurrency).
+    - Multiplicative decrease: saat 429/401, laju dan slot dikali `decrease`. Throttle beruntun
+      dalam `hold_seconds` dihitung sekali agar beberapa worker yang kena bersamaan tidak
+      memotong laju berkali-kali.
+    """
+    def __init__(self, path, limiter, initial_rate=0.4, min_rate=0.02, max_rate=1.0, increase=0.02,
+                 decrease=0.5, increase_every=20, max_concurrency=3, min_concurrency=1, hold_seconds=30):
+        self.path = path
+        self.limiter = limiter
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.increase_every = increase_every
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.hold_seconds = hold_seconds
+        self._cond = threading.Condition()
+        self._active = 0
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pacing_state (
+                    key TEXT PRIMARY KEY,
+                    rate REAL,
+                    concurrency INTEGER,
+                    clean_requests INTEGER DEFAULT 0,
+                    throttles INTEGER DEFAULT 0,
+                    last_throttle_at REAL DEFAULT 0,
+                    updated_at REAL
+                )
+            """)
+            conn.execute("""
+                INSERT OR IGNORE INTO pacing_state (key, rate, concurrency, updated_at)
+                VALUES ('global', ?, ?, ?)
+            """, (initial_rate, max_concurrency, time.time()))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    def _update(self, fn):
+        """Baca-ubah-tulis state secara atomik (BEGIN IMMEDIATE, aman lintas proses)"""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("""
+                    SELECT rate, concurrency, clean_requests, throttles, last_throttle_at
+                    FROM pacing_state WHERE key = 'global'
+                """).fetchone()
+                state = dict(zip(["rate", "concurrency", "clean_requests", "throttles", "last_throttle_at"], row))
+                fn(state, time.time())
+                conn.execute("""
+                    UPDATE pacing_state SET rate = ?, concurrency = ?, clean_requests = ?, throttles = ?,
+                        last_throttle_at = ?, updated_at = ? WHERE key = 'global'
+                """, (state["rate"], state["concurrency"], state["clean_requests"], state["throttles"],
+                      state["last_throttle_at"], time.time()))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return state
+
+    def state(self):
+        """Laju & slot saat ini untuk ditampilkan di UI"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("""
+                SELECT rate, concurrency, clean_requests, throttles, last_throttle_at
+                FROM pacing_state WHERE key = 'global'
+            """).fetchone()
+        return {"rate": row[0], "concurrency": row[1], "clean_requests": row[2], "throttles": row[3],
+                "last_throttle_at": row[4]}
+
+    @property
+    def rate(self):
+        """Laju request global saat ini (request/detik)"""
+        return self.state()["rate"]
+
+    @property
+    def concurrency(self):
+        return self.state()["concurrency"]
+
+    def before_request(self, on_wait=None):
+        """Dipanggil sebelum setiap request HTTP: ambil token global dengan laju AIMD saat ini"""
+        def _grow(state, now):
+            state["clean_requests"] += 1
+            if state["clean_requests"] >= self.increase_every:
+                state["clean_requests"] = 0
+                state["rate"] = min(self.max_rate, state["rate"] + self.increase)
+                state["concurrency"] = min(self.max_concurrency, state["concurrency"] + 1)
+        state = self._update(_grow)
+        self.limiter.global_rate = state["rate"]
+        count_request()
+        # Menunggu token = jeda pacing; menunggu cooldown global = jeda karena rate limit
+        waiting_on = "sleep"
+        if current_timer() is not None and self.limiter.cooldown_remaining() > 0:
+            waiting_on = "rate_limit_wait"
+        with phase(waiting_on):
+            waited = self.limiter.acquire(on_wait=on_wait)
+        with self._cond:
+            self._cond.notify_all()  # slot paralel mungkin bertambah
+        return waited
+
+    def on_throttle(self):
+        """Instagram membalas 429/401: potong laju dan jumlah slot paralel"""
+        def _shrink(state, now):
+            state["clean_requests"] = 0
+            if now - (state["last_throttle_at"] or 0) < self.hold_seconds:
+                return
+            state["throttles"] += 1
+            state["last_throttle_at"] = now
+            state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+            state["concurrency"] = max(self.min_concurrency, math.floor(state["concurrency"] * self.decrease))
+        state = self._update(_shrink)
+        self.limiter.global_rate = state["rate"]
+        return state
+
+    @contextmanager
+    def slot(self):
+        """Batas akun yang di-scrape bersamaan di proses ini, mengikuti `concurrency` AIMD"""
+        with self._cond:
+            while self._active >= self.concurrency:
+                self._cond.wait(timeout=5)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+
+class PacedRateController(instaloader.RateController):
+    """RateController Instaloader yang membebankan setiap request ke AdaptivePacer.
+
+    Satu-satunya jeda per request adalah token AIMD: sliding window bawaan Instaloader tidak
+    dipanggil, sehingga laju efektif sama dengan `rate` pacer dan additive increase benar-benar
+    menaikkan throughput. 429 tidak lagi ditunggu berjam-jam oleh Instaloader: laju dipotong lalu
+    TooManyRequestsException diteruskan agar scraper menandai cooldown dan berhenti.
+    """
+    def __init__(self, context, pacer):
+        super().__init__(context)
+        self.pacer = pacer
+
+    def wait_before_query(self, query_type):
+        self.pacer.before_request()
+
+    def handle_429(self, query_type):
+        self.pacer.on_throttle()
+        raise instaloader.TooManyRequestsException("429 Too Many Requests")
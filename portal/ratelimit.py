@@ -0,0 +1,135 @@
+"""Token bucket rate limiter yang dibagi semua thread dan proses (state di file SQLite)."""
+import random
+import sqlite3
+import time
+from contextlib import closing
+
+GLOBAL_BUCKET = "global"
+
+
+class TokenBucketLimiter:
+    """Token bucket global + per akun, disimpan di SQLite agar semua proses memakai satu budget.
+
+    - acquire() mengambil satu token dari bucket global DAN bucket akun secara atomik
+      (BEGIN IMMEDIATE = write lock SQLite, aman lintas thread & proses).
+    - Cooldown rate limit disimpan per bucket (cooldown_until epoch) sehingga tetap berlaku
+      setelah restart atau dari proses lain. Cooldown global menahan semua acquire().
+    """
+    def __init__(self, path, global_capacity=10, global_rate=0.4, account_capacity=1, account_rate=1 / 3):
+        self.path = path
+        # capacity = burst maksimal, rate = token per detik
+        self.global_capacity = global_capacity
+        self.global_rate = global_rate
+        self.account_capacity = account_capacity
+        self.account_rate = account_rate
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                    bucket TEXT PRIMARY KEY,
+                    tokens REAL,
+                    updated_at REAL,
+                    cooldown_until REAL DEFAULT 0,
+                    request_count INTEGER DEFAULT 0
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    def _params(self, bucket):
+        if bucket == GLOBAL_BUCKET:
+            return self.global_capacity, self.global_rate
+        return self.account_capacity, self.account_rate
+
+    def _load(self, conn, bucket, now):
+        """Baca bucket dan isi ulang token sesuai waktu yang berlalu"""
+        capacity, rate = self._params(bucket)
+        row = conn.execute("SELECT tokens, updated_at, cooldown_until FROM rate_limit_buckets WHERE bucket = ?",
+                           (bucket,)).fetchone()
+        if row is None:
+            return float(capacity), 0.0
+        tokens, updated_at, cooldown_until = row
+        tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+        return tokens, cooldown_until or 0.0
+
+    @staticmethod
+    def _save(conn, bucket, tokens, now, taken):
+        conn.execute("""
+            INSERT INTO rate_limit_buckets (bucket, tokens, updated_at, request_count) VALUES (?, ?, ?, ?)
+            ON CONFLICT(bucket) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at,
+                request_count = request_count + excluded.request_count
+        """, (bucket, tokens, now, taken))
+
+    def try_acquire(self, account=None, charge_global=True):
+        """Ambil satu token tanpa menunggu. Return 0 jika berhasil, atau detik yang perlu ditunggu.
+        charge_global=False: hanya bucket akun (token global sudah dibebankan per request HTTP),
+        cooldown global tetap menahan"""
+        buckets = [GLOBAL_BUCKET] + ([f"account:{account}"] if account else [])
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                state = {b: self._load(conn, b, now) for b in buckets}
+                # Cooldown akun hanya informasi (lihat cooldown_remaining); yang menahan semua request
+                # hanya cooldown global dan ketersediaan token
+                wait = state[GLOBAL_BUCKET][1] - now
+                charged = {b: v for b, v in state.items() if charge_global or b != GLOBAL_BUCKET}
+                for b, (tokens, _) in charged.items():
+                    _, rate = self._params(b)
+                    if tokens < 1:
+                        wait = max(wait, (1 - tokens) / rate)
+                taken = 1 if wait <= 0 else 0
+                for b, (tokens, _) in charged.items():
+                    self._save(conn, b, tokens - taken, now, taken)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return max(0.0, wait)
+
+    def acquire(self, account=None, on_wait=None, max_sleep=30.0, charge_global=True):
+        """Tunggu sampai token global (dan akun) tersedia, lalu ambil. Return total detik menunggu.
+        on_wait: callable(seconds) dipanggil sebelum setiap jeda, misalnya untuk notifikasi UI"""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(account, charge_global)
+            if wait <= 0:
+                return waited
+            # Jitter agar proses yang antre tidak bangun bersamaan
+            sleep_for = min(wait, max_sleep) + random.uniform(0.1, 0.5)
+            if on_wait:
+                on_wait(wait)
+            time.sleep(sleep_for)
+            waited += sleep_for
+
+    def cooldown(self, account=None, seconds=900):
+        """Tandai bucket (akun, atau global jika account None) sedang kena rate limit"""
+        bucket = f"account:{account}" if account else GLOBAL_BUCKET
+        capacity, _ = self._params(bucket)
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                INSERT INTO rate_limit_buckets (bucket, tokens, updated_at, cooldown_until) VALUES (?, ?, ?, ?)
+                ON CONFLICT(bucket) DO UPDATE SET cooldown_until = MAX(cooldown_until, excluded.cooldown_until)
+            """, (bucket, float(capacity), time.time(), time.time() + seconds))
+
+    def cooldown_remaining(self, account=None):
+        """Sisa detik cooldown bucket akun (atau global); 0 jika tidak sedang cooldown"""
+        bucket = f"account:{account}" if account else GLOBAL_BUCKET
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT cooldown_until FROM rate_limit_buckets WHERE bucket = ?", (bucket,)).fetchone()
+        return max(0.0, (row[0] or 0.0) - time.time()) if row else 0.0
+
+    def reset(self):
+        """Hapus semua bucket & cooldown (token penuh lagi), misalnya antar run benchmark"""
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM rate_limit_buckets")
+
+    def request_count(self):
+        """Total token yang sudah diambil dari bucket global (semua proses)"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT request_count FROM rate_limit_buckets WHERE bucket = ?",
+                               (GLOBAL_BUCKET,)).fetchone()
+        return row[0] if row else 0
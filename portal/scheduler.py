@@ -0,0 +1,121 @@
+"""Penjadwal sinkronisasi berbasis prioritas.
+
+Setiap akun di daftar_akun_unit diberi skor dari:
+- staleness: jam sejak sinkronisasi terakhir yang berhasil,
+- frekuensi posting: akun yang posting harian punya interval target pendek (min. 6 jam),
+  akun dorman panjang (maks. 7 hari),
+- kegagalan terbaru: setiap gagal/rate limit sejak sukses terakhir memperpanjang interval (backoff).
+prioritas = staleness / (interval target * 2^kegagalan); akun jatuh tempo jika prioritas >= 1.
+plan_sync() memilih akun jatuh tempo berurutan prioritas selama estimasi request muat
+di sisa budget request harian (dihitung dari sync_metrics hari ini).
+"""
+import math
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+from portal.db import engine
+from portal.utils import extract_username
+
+DAILY_REQUEST_BUDGET = 600
+FREQUENCY_WINDOW_DAYS = 30
+FAILURE_WINDOW_DAYS = 7
+MIN_INTERVAL_HOURS = 6
+MAX_INTERVAL_HOURS = 7 * 24
+MAX_FAILURE_BACKOFF = 3  # interval maks. dikali 2^3
+# Estimasi request per akun jika belum ada riwayat sync_metrics (profil + 1-2 halaman post)
+DEFAULT_REQUESTS_PER_ACCOUNT = 3
+# Akun yang belum pernah sinkron dianggap sangat basi
+NEVER_SYNCED_HOURS = 10 * 365 * 24
+
+
+def _ts(dt):
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def requests_used_today(now=None):
+    """Jumlah request Instagram yang tercatat di sync_metrics sejak pukul 00:00"""
+    now = now or datetime.now()
+    with engine.begin() as conn:
+        return int(conn.execute(text("SELECT COALESCE(SUM(requests), 0) FROM sync_metrics WHERE started_at >= :d"),
+                                {"d": _ts(now.replace(hour=0, minute=0, second=0, microsecond=0))}).scalar())
+
+
+def score_accounts(now=None):
+    """Skor prioritas semua akun terdaftar, prioritas tertinggi dulu.
+
+    Kolom: username_ig, nama_unit, last_success_at, staleness_h, posts_per_day, interval_h,
+    failures, est_requests, priority, due.
+    """
+    now = now or datetime.now()
+    accounts = pd.read_sql(text("SELECT nama_unit, username_ig FROM daftar_akun_unit"), engine)
+    columns = ["username_ig", "nama_unit", "last_success_at", "staleness_h", "posts_per_day", "interval_h",
+               "failures", "est_requests", "priority", "due"]
+    if accounts.empty:
+        return pd.DataFrame(columns=columns)
+    accounts["key"] = accounts["username_ig"].map(extract_username)
+
+    with engine.begin() as conn:
+        # Sukses terakhir dari sync_metrics; sync_state_akun untuk akun yang disinkron sebelum ada metrik
+        last_success = dict(conn.execute(text("""
+            SELECT username_ig, MAX(started_at) FROM sync_metrics WHERE outcome = 'done' GROUP BY username_ig
+        """)).fetchall())
+        legacy_synced = dict(conn.execute(text("SELECT username_ig, last_synced_at FROM sync_state_akun")).fetchall())
+        failures = dict(conn.execute(text("""
+            SELECT m.username_ig, COUNT(*) FROM sync_metrics m
+            WHERE m.outcome IN ('failed', 'rate_limited') AND m.started_at >= :since
+              AND m.started_at > COALESCE((SELECT MAX(d.started_at) FROM sync_metrics d
+                                           WHERE d.username_ig = m.username_ig AND d.outcome = 'done'), '')
+            GROUP BY m.username_ig
+        """), {"since": _ts(now - timedelta(days=FAILURE_WINDOW_DAYS))}).fetchall())
+        est_requests = dict(conn.execute(text("""
+            SELECT username_ig, AVG(requests) FROM sync_metrics
+            WHERE outcome = 'done' AND started_at >= :since GROUP BY username_ig
+        """), {"since": _ts(now - timedelta(days=FREQUENCY_WINDOW_DAYS))}).fetchall())
+
+    # Frekuensi posting dari post tersimpan dalam FREQUENCY_WINDOW_DAYS hari terakhir (filter & hitung di SQL)
+    posts = pd.read_sql(text("""
+        SELECT akun, COUNT(*) AS n FROM monitoring_pln
+        WHERE tanggal_iso >= :since AND akun IS NOT NULL GROUP BY akun
+    """), engine, params={"since": (now - timedelta(days=FREQUENCY_WINDOW_DAYS)).strftime('%Y-%m-%d')})
+    post_counts = posts.groupby(posts["akun"].map(extract_username))["n"].sum().to_dict()
+
+    rows = []
+    for acc in accounts.itertuples(index=False):
+        last = last_success.get(acc.key) or legacy_synced.get(acc.key)
+        last_dt = datetime.strptime(last, '%Y-%m-%d %H:%M:%S') if last else None
+        staleness_h = (now - last_dt).total_seconds() / 3600 if last_dt else NEVER_SYNCED_HOURS
+        posts_per_day = post_counts.get(acc.key, 0) / FREQUENCY_WINDOW_DAYS
+        interval_h = MAX_INTERVAL_HOURS if posts_per_day <= 0 else \
+            min(max(24 / posts_per_day, MIN_INTERVAL_HOURS), MAX_INTERVAL_HOURS)
+        fails = int(failures.get(acc.key, 0))
+        priority = staleness_h / (interval_h * 2 ** min(fails, MAX_FAILURE_BACKOFF))
+        rows.append({
+            "username_ig": acc.username_ig, "nama_unit": acc.nama_unit, "last_success_at": last,
+            "staleness_h": round(staleness_h, 1), "posts_per_day": round(posts_per_day, 2),
+            "interval_h": round(interval_h, 1), "failures": fails,
+            "est_requests": max(1, math.ceil(est_requests.get(acc.key) or DEFAULT_REQUESTS_PER_ACCOUNT)),
+            "priority": round(priority, 3), "due": priority >= 1,
+        })
+    return pd.DataFrame(rows, columns=columns).sort_values("priority", ascending=False, ignore_index=True)
+
+
+def plan_sync(budget=None, now=None, include_not_due=False):
+    """Pilih akun untuk dijalankan sekarang, berurutan prioritas, dalam sisa budget request harian.
+
+    budget: budget request per hari (default DAILY_REQUEST_BUDGET).
+    include_not_due: isi sisa budget dengan akun yang belum jatuh tempo (mis. sinkron manual).
+    Return (DataFrame akun terpilih, sisa budget setelah rencana).
+    """
+    budget = DAILY_REQUEST_BUDGET if budget is None else int(budget)
+    scores = score_accounts(now)
+    remaining = budget - requests_used_today(now)
+    candidates = scores if include_not_due else scores[scores["due"]]
+    picked = []
+    for idx, row in candidates.iterrows():
+        if row["est_requests"] > remaining:
+            continue  # akun lebih murah di bawahnya masih bisa muat
+        picked.append(idx)
+        remaining -= row["est_requests"]
+    return candidates.loc[picked].reset_index(drop=True), remaining
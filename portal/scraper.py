@@ -0,0 +1,712 @@
+"""Scraper Instagram: cache hasil, rate limit manager, dan run_scraper.
+
+Modul ini tidak bergantung pada Streamlit sehingga bisa dipakai oleh halaman
+"Sinkronisasi Data" maupun proses sinkronisasi headless (python -m portal.sync).
+"""
+import calendar
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+from instaloader import FrozenNodeIterator
+import pandas as pd
+from sqlalchemy import text
+
+from portal.db import CACHE_DB_PATH, RATE_LIMIT_DB_PATH, engine
+from portal.instrumentation import phase
+from portal.pacing import AdaptivePacer, PacedRateController
+from portal.ratelimit import TokenBucketLimiter
+from portal.sessions import SessionPool
+from portal.singleflight import AccountFlights, SingleFlight
+from portal.sources import InstaloaderSource
+from portal.utils import clean_txt, extract_shortcode, extract_username, get_month_order, parse_date_str
+
+logger = logging.getLogger(__name__)
+
+
+# ============ CACHING & SESSION MANAGEMENT ============
+class ScrapingCache:
+    """Cache hasil scraping di SQLite (file di samping DB_PATH).
+
+    - Bertahan setelah Streamlit restart dan dibagi antar proses server (SQLite WAL).
+    - LRU berbatas jumlah entri dan total ukuran, ditambah TTL per entri.
+    - Negative cache untuk username yang tidak ditemukan (TTL lebih panjang).
+    - Statistik hit/miss disimpan di DB agar terlihat dari semua proses.
+    """
+    def __init__(self, path, ttl_minutes=60, max_entries=500, max_bytes=50 * 1024 * 1024, negative_ttl_minutes=360):
+        self.path = path
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.negative_ttl = timedelta(minutes=negative_ttl_minutes)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    value TEXT,
+                    size INTEGER DEFAULT 0,
+                    created_at REAL,
+                    last_access REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_scrape_cache_access ON scrape_cache(last_access)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_cache_missing (
+                    username TEXT PRIMARY KEY,
+                    created_at REAL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS scrape_cache_stats (name TEXT PRIMARY KEY, value INTEGER DEFAULT 0)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=15.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @staticmethod
+    def _bump(conn, name, amount=1):
+        conn.execute("""
+            INSERT INTO scrape_cache_stats (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+        """, (name, amount))
+
+    @staticmethod
+    def make_key(username, unit_name, limit, target_month, kategori, date_from=None, date_to=None, incremental=False):
+        """Kunci cache lengkap: semua parameter yang mempengaruhi hasil run_scraper"""
+        parts = [username, unit_name, limit, target_month, kategori,
+                 date_from.isoformat() if date_from else '', date_to.isoformat() if date_to else '',
+                 'inc' if incremental else 'full']
+        return "|".join(str(p) for p in parts)
+
+    def get(self, key):
+        """Get cached DataFrame jika belum expired (None jika miss)"""
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT value, created_at FROM scrape_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row and now - row[1] < self.ttl.total_seconds():
+                conn.execute("UPDATE scrape_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+                self._bump(conn, 'hits')
+                return pd.DataFrame(json.loads(row[0]))
+            if row:
+                conn.execute("DELETE FROM scrape_cache WHERE cache_key = ?", (key,))
+            self._bump(conn, 'misses')
+        return None
+
+    def set(self, key, value):
+        """Set cache value (DataFrame) lalu evict entri LRU jika melebihi batas"""
+        payload = json.dumps(value.to_dict('records'), default=str)
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("""
+                INSERT INTO scrape_cache (cache_key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET value=excluded.value, size=excluded.size,
+                    created_at=excluded.created_at, last_access=excluded.last_access
+            """, (key, payload, len(payload), now, now))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM scrape_cache WHERE created_at < ?", (time.time() - self.ttl.total_seconds(),))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT cache_key, size FROM scrape_cache ORDER BY last_access ASC").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM scrape_cache WHERE cache_key = ?", (key,))
+            count -= 1
+            total -= size
+            evicted += 1
+        self._bump(conn, 'evictions', evicted)
+
+    def is_missing(self, username):
+        """True jika username baru-baru ini tercatat tidak ditemukan (negative cache)"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT created_at FROM scrape_cache_missing WHERE username = ?", (username,)).fetchone()
+            if row and time.time() - row[0] < self.negative_ttl.total_seconds():
+                self._bump(conn, 'negative_hits')
+                return True
+            if row:
+                conn.execute("DELETE FROM scrape_cache_missing WHERE username = ?", (username,))
+        return False
+
+    def mark_missing(self, username):
+        """Catat username yang tidak ditemukan agar tidak di-request ulang selama negative_ttl"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO scrape_cache_missing (username, created_at) VALUES (?, ?)",
+                         (username, time.time()))
+
+    def clear_expired(self):
+        """Remove expired entries"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            self._evict(conn)
+            conn.execute("DELETE FROM scrape_cache_missing WHERE created_at < ?",
+                         (time.time() - self.negative_ttl.total_seconds(),))
+
+    def clear(self):
+        """Kosongkan semua entri dan statistik"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM scrape_cache")
+            conn.execute("DELETE FROM scrape_cache_missing")
+            conn.execute("DELETE FROM scrape_cache_stats")
+
+    def stats(self):
+        """Statistik cache: hits, misses, negative_hits, evictions, entries, missing, size_bytes, hit_rate"""
+        with self._lock, closing(self._connect()) as conn:
+            counters = dict(conn.execute("SELECT name, value FROM scrape_cache_stats").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()
+            missing = conn.execute("SELECT COUNT(*) FROM scrape_cache_missing").fetchone()[0]
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {
+            "hits": hits, "misses": misses,
+            "negative_hits": counters.get('negative_hits', 0),
+            "evictions": counters.get('evictions', 0),
+            "entries": entries, "missing": missing, "size_bytes": size,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+        }
+
+
+# Global cache instance (1 hour TTL)
+scraping_cache = ScrapingCache(CACHE_DB_PATH, ttl_minutes=60)
+
+
+def log_notify(level, message):
+    """Default notify di luar Streamlit: teruskan pesan scraper ke logging"""
+    log_level = {"debug": logging.DEBUG, "info": logging.INFO,
+                 "warning": logging.WARNING, "error": logging.ERROR}.get(level, logging.INFO)
+    logger.log(log_level, message)
+
+
+class NotifyBuffer:
+    """Kumpulkan pesan dari worker thread untuk ditampilkan di thread utama (mis. Streamlit)"""
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, level, message):
+        self.messages.append((level, message))
+
+    def flush(self, notify=None):
+        notify = notify or log_notify
+        for level, message in self.messages:
+            notify(level, message)
+        self.messages = []
+
+
+# ============ INSTAGRAM RATE LIMIT MANAGER ============
+class InstagramRateLimitManager:
+    """Manage Instagram rate limit safely: token bucket global + per akun (TokenBucketLimiter)
+    yang dibagi semua proses, cooldown yang bertahan setelah restart, dan batas akun paralel.
+    Token global dibebankan per request HTTP dengan laju AIMD dari AdaptivePacer"""
+    def __init__(self, max_concurrent_accounts=3, limiter=None, global_cooldown_seconds=60):
+        self.limiter = limiter or TokenBucketLimiter(RATE_LIMIT_DB_PATH)
+        self.max_concurrent_accounts = max_concurrent_accounts
+        # Rate limit biasanya per IP: setelah 429 semua akun ikut ditahan sebentar
+        self.global_cooldown_seconds = global_cooldown_seconds
+        # Laju request + jumlah akun paralel (lintas sesi admin) disesuaikan dari respons Instagram
+        self.pacer = AdaptivePacer(self.limiter.path, self.limiter, initial_rate=self.limiter.global_rate,
+                                   max_concurrency=max_concurrent_accounts)
+        self._lock = threading.Lock()
+        self.user_agent_list = [
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
+            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15'
+        ]
+        self.ua_index = 0
+
+    @property
+    def request_count(self):
+        return self.limiter.request_count()
+
+    @property
+    def current_rate(self):
+        """Laju request global saat ini (request/detik) hasil pacing adaptif"""
+        return self.pacer.rate
+
+    def get_next_user_agent(self):
+        """Rotate user agents"""
+        with self._lock:
+            ua = self.user_agent_list[self.ua_index]
+            self.ua_index = (self.ua_index + 1) % len(self.user_agent_list)
+        return ua
+    
+    def wait_if_needed(self, username, notify=None):
+        """Tunggu cooldown akun (maks. 60 detik, seperti sebelumnya) lalu ambil token bucket akun
+        (token global diambil per request HTTP oleh PacedRateController)"""
+        notify = notify or log_notify
+        remaining = self.limiter.cooldown_remaining(username)
+        if remaining:
+            notify("warning", f"⏳ Rate limit active untuk @{username}. Tunggu {int(remaining)} detik lagi...")
+            with phase("rate_limit_wait"):
+                time.sleep(min(remaining, 60))
+
+        def _on_wait(seconds):
+            if seconds > 5:
+                notify("debug", f"Budget request Instagram habis, menunggu {int(seconds)} detik (@{username})")
+        with phase("sleep"):
+            self.limiter.acquire(username, on_wait=_on_wait, charge_global=False)
+
+    def mark_rate_limited(self, username, retry_after_seconds=900):
+        """Mark account as rate limited (default 15 min) + cooldown global singkat untuk semua proses"""
+        self.limiter.cooldown(username, retry_after_seconds)
+        self.limiter.cooldown(None, self.global_cooldown_seconds)
+        self.pacer.on_throttle()
+
+    def is_rate_limited(self, username):
+        """True jika akun masih dalam masa tunggu rate limit (dibaca dari state bersama)"""
+        return self.limiter.cooldown_remaining(username) > 0
+
+    def should_slow_down(self):
+        """Return True if should add extra delay (every 10 requests)"""
+        return self.request_count % 10 == 0 and self.request_count > 0
+
+    def account_slot(self):
+        """Context manager: ambil satu slot akun paralel (jumlah slot mengikuti pacing adaptif)"""
+        return self.pacer.slot()
+
+# Global rate limit manager (modul hanya di-load sekali per proses, jadi dibagi semua sesi admin)
+rate_limit_manager = InstagramRateLimitManager(max_concurrent_accounts=3)
+# Sesi Instaloader yang dipakai ulang antar akun (satu sesi anonim per slot akun paralel)
+session_pool = SessionPool(anonymous_size=rate_limit_manager.max_concurrent_accounts,
+                           rate_controller=lambda ctx: PacedRateController(ctx, rate_limit_manager.pacer))
+# Sumber profil & post yang dipakai run_scraper (ganti dengan ReplaySource untuk benchmark/offline)
+_post_source = InstaloaderSource(session_pool, rate_limit_manager.get_next_user_agent)
+
+# Satu scrape per akun pada satu waktu, dalam proses ini maupun antar worker (lease di file rate limiter)
+account_flights = AccountFlights(RATE_LIMIT_DB_PATH)
+# run_scraper bersamaan dengan parameter sama (mis. dua admin) memakai satu DataFrame hasil
+_scrape_flights = SingleFlight()
+
+def get_post_source():
+    return _post_source
+
+def set_post_source(source):
+    """Ganti sumber post untuk seluruh proses (lihat portal.sources). Return sumber sebelumnya"""
+    global _post_source
+    previous, _post_source = _post_source, source
+    return previous
+
+# ============ SCRAPER ENGINE ============
+# Jumlah post lama berturut-turut yang masih ditoleransi sebelum iterasi dihentikan
+# (post yang di-pin muncul paling atas walaupun tanggalnya lama, maksimal 3)
+MAX_PINNED_POSTS = 3
+
+def resolve_date_window(target_month="Semua", date_from=None, date_to=None, today=None):
+    """Ubah filter bulan + rentang tanggal menjadi (start, end) bertipe date; None berarti tak terbatas.
+
+    Filter bulan tanpa tahun diartikan sebagai kemunculan terakhir bulan tersebut
+    (relatif terhadap date_to atau hari ini), lalu diiriskan dengan date_from/date_to.
+    """
+    start, end = date_from, date_to
+    if target_month and target_month != "Semua":
+        month = get_month_order().index(target_month) + 1
+        ref = date_to or today or datetime.now().date()
+        year = ref.year if month <= ref.month else ref.year - 1
+        month_start = datetime(year, month, 1).date()
+        month_end = datetime(year, month, calendar.monthrange(year, month)[1]).date()
+        start = max(start, month_start) if start else month_start
+        end = min(end, month_end) if end else month_end
+    return start, end
+
+def iter_posts_in_window(posts, date_from=None, date_to=None, max_out_of_order=MAX_PINNED_POSTS, known_shortcode=None):
+    """Iterasi post (urutan terbaru dulu) yang tanggalnya di dalam [date_from, date_to].
+
+    Post yang lebih baru dari date_to dilewati tanpa jeda. Iterasi dihentikan setelah lebih dari
+    max_out_of_order post berturut-turut lebih lama dari date_from, sehingga post pin yang muncul
+    paling atas tidak membuat iterasi berhenti terlalu cepat.
+    known_shortcode: post terbaru yang sudah tersimpan (sinkron incremental). Setelah post ini
+    ditemukan (bukan sebagai pin) sisa feed pasti kronologis: jika post tsb tidak lebih baru dari
+    date_from iterasi berhenti tepat di situ, selain itu berhenti di post pertama yang lebih lama
+    dari date_from tanpa toleransi pin. Jika post tsb sudah dihapus, berlaku aturan tanggal biasa.
+    """
+    older_streak = 0
+    past_known = False
+    for post in posts:
+        post_day = post.date.date()
+        if known_shortcode and post.shortcode == known_shortcode and not getattr(post, 'is_pinned', False):
+            if date_from is None or post_day <= date_from:
+                return
+            past_known = True
+        if date_from and post_day < date_from:
+            older_streak += 1
+            if past_known or older_streak > max_out_of_order:
+                return
+            continue
+        older_streak = 0
+        if date_to and post_day > date_to:
+            continue
+        yield post
+
+def get_sync_state(username):
+    """Ambil high-water mark (shortcode & tanggal post terbaru yang tersimpan) untuk akun"""
+    try:
+        with engine.begin() as conn:
+            row = conn.execute(text("SELECT last_shortcode, last_post_date, last_synced_at FROM sync_state_akun WHERE username_ig = :u"),
+                               {"u": username}).fetchone()
+    except Exception:
+        return None
+    if not row:
+        return None
+    return {"last_shortcode": row[0], "last_post_date": row[1], "last_synced_at": row[2]}
+
+def get_cached_profile(username):
+    """Profil yang pernah di-resolve: userid, followers, mediacount, synced_mediacount, fetched_at"""
+    try:
+        with engine.begin() as conn:
+            row = conn.execute(text("""
+                SELECT userid, followers, mediacount, synced_mediacount, fetched_at
+                FROM ig_profiles WHERE username_ig = :u
+            """), {"u": username}).mappings().fetchone()
+    except Exception:
+        return None
+    return dict(row) if row else None
+
+def record_profile(username, profile):
+    """Simpan hasil resolusi profil ke cache dan catat jumlah follower ke follower_history"""
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO ig_profiles (username_ig, userid, full_name, followers, mediacount, fetched_at)
+            VALUES (:u, :id, :fn, :f, :m, :at)
+            ON CONFLICT(username_ig) DO UPDATE SET userid=excluded.userid, full_name=excluded.full_name,
+                followers=excluded.followers, mediacount=excluded.mediacount, fetched_at=excluded.fetched_at
+        """), {"u": username, "id": profile.userid, "fn": profile.full_name, "f": profile.followers,
+               "m": profile.mediacount, "at": now.strftime('%Y-%m-%d %H:%M:%S')})
+        conn.execute(text("""
+            INSERT INTO follower_history (username_ig, ts, followers) VALUES (:u, :ts, :f)
+            ON CONFLICT(username_ig, ts) DO UPDATE SET followers=excluded.followers
+        """), {"u": username, "ts": int(now.timestamp()), "f": profile.followers})
+
+def mark_profile_synced(username, mediacount):
+    """Catat jumlah post saat sinkronisasi terakhir selesai (dasar skip akun tanpa post baru)"""
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE ig_profiles SET synced_mediacount = :m WHERE username_ig = :u"),
+                     {"m": mediacount, "u": username})
+
+def load_scrape_cursor(username, request_key):
+    """Cursor iterasi tertunda untuk akun, hanya jika dibuat untuk permintaan (window) yang sama.
+    Return dict {frozen, window_from, window_to} atau None"""
+    try:
+        with engine.begin() as conn:
+            row = conn.execute(text("""
+                SELECT frozen, window_from, window_to FROM scrape_cursors
+                WHERE username_ig = :u AND request_key = :k
+            """), {"u": username, "k": request_key}).fetchone()
+        if not row:
+            return None
+        frozen = FrozenNodeIterator(**json.loads(row[0]))
+    except Exception:
+        return None
+    # Cursor Instagram kadaluarsa (best_before dari Instaloader): mulai ulang dari awal
+    if not frozen.best_before or frozen.best_before < time.time():
+        clear_scrape_cursor(username)
+        return None
+    to_date = lambda v: datetime.strptime(v, '%Y-%m-%d').date() if v else None
+    return {"frozen": frozen, "window_from": to_date(row[1]), "window_to": to_date(row[2])}
+
+def save_scrape_cursor(username, request_key, posts, window_from, window_to):
+    """Simpan posisi NodeIterator (posts.freeze()) agar percobaan berikutnya melanjutkan dari halaman ini"""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO scrape_cursors (username_ig, request_key, frozen, window_from, window_to, updated_at)
+            VALUES (:u, :k, :f, :wf, :wt, :at)
+            ON CONFLICT(username_ig) DO UPDATE SET request_key=excluded.request_key, frozen=excluded.frozen,
+                window_from=excluded.window_from, window_to=excluded.window_to, updated_at=excluded.updated_at
+        """), {"u": username, "k": request_key, "f": json.dumps(posts.freeze()._asdict()),
+               "wf": window_from.isoformat() if window_from else None,
+               "wt": window_to.isoformat() if window_to else None,
+               "at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')})
+
+def clear_scrape_cursor(username):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM scrape_cursors WHERE username_ig = :u"), {"u": username})
+
+def update_sync_state(conn, username, records):
+    """Majukan high-water mark akun berdasarkan post terbaru di records (tidak pernah mundur)"""
+    newest_date, newest_shortcode = None, None
+    for item in records:
+        d = parse_date_str(item.get('tanggal'))
+        if d and (newest_date is None or d > newest_date):
+            newest_date = d
+            newest_shortcode = extract_shortcode(item.get('link_pemberitaan'))
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if newest_date is None:
+        conn.execute(text("""
+            INSERT INTO sync_state_akun (username_ig, last_synced_at) VALUES (:u, :now)
+            ON CONFLICT(username_ig) DO UPDATE SET last_synced_at=excluded.last_synced_at
+        """), {"u": username, "now": now})
+        return
+    conn.execute(text("""
+        INSERT INTO sync_state_akun (username_ig, last_shortcode, last_post_date, last_synced_at)
+        VALUES (:u, :sc, :d, :now)
+        ON CONFLICT(username_ig) DO UPDATE SET
+            last_shortcode = CASE WHEN sync_state_akun.last_post_date IS NULL OR excluded.last_post_date >= sync_state_akun.last_post_date
+                                  THEN excluded.last_shortcode ELSE sync_state_akun.last_shortcode END,
+            last_post_date = MAX(COALESCE(sync_state_akun.last_post_date, ''), excluded.last_post_date),
+            last_synced_at = excluded.last_synced_at
+    """), {"u": username, "sc": newest_shortcode, "d": newest_date.strftime('%Y-%m-%d'), "now": now})
+
+def post_to_record(post, unit_name, clean_username, kategori_input):
+    """Transformasi satu post Instagram menjadi baris monitoring_pln"""
+    is_vid = getattr(post, 'is_video', False)
+    caption = post.caption if getattr(post, 'caption', None) else ''
+    return {
+        "tanggal": post.date.strftime("%d/%m/%Y"),
+        "bulan": get_month_order()[post.date.month - 1],
+        "tahun": str(post.date.year),
+        "judul_pemberitaan": clean_txt(caption[:500] if caption else "Konten Visual"),
+        "link_pemberitaan": f"https://www.instagram.com/p/{post.shortcode}/",
+        "platform": "Instagram",
+        "tipe_konten": "Reels" if is_vid else "Feeds",
+        "pic_unit": unit_name,
+        "akun": f"@{clean_username}",
+        "kategori": kategori_input,
+        "likes": int(getattr(post, 'likes', 0) or 0),
+        "comments": int(getattr(post, 'comments', 0) or 0),
+        "views": int(getattr(post, 'video_view_count', 0) or 0),
+        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "source": "Scraping"
+    }
+
+def _iter_with_session(source, sess, clean_username, unit_name, limit, target_month, kategori_input,
+                       date_from, date_to, max_retries, notify, incremental, refresh_days, outcome):
+    """Generator badan scrape_posts dengan sesi pinjaman dari sumber post.
+    outcome['status']: 'done', 'interrupted' (rate limit/error halaman, cursor disimpan),
+    'skipped' (tidak ada post baru) atau 'failed' (profil gagal dibuka).
+    outcome['rate_limited']: True jika run ini berhenti karena 401/429 (bukan sisa cooldown lama;
+    429 saat membuka profil yang pulih pada retry berikutnya tidak dihitung)"""
+    outcome['status'] = 'failed'
+    outcome['rate_limited'] = False
+    # Normal profile scraping with retry and improved safety
+    cached_profile = get_cached_profile(clean_username)
+    profile = None
+    with phase("profile"):
+        for attempt in range(max_retries + 1):
+            try:
+                # User agent sesi anonim dirotasi setiap retry oleh InstaloaderSource
+                profile = source.profile(sess, clean_username)
+                break
+            except Exception as e:
+                error_msg = str(e)
+                # Check if user not found
+                if "not found" in error_msg.lower() or "does not exist" in error_msg.lower():
+                    # Username bisa saja diganti: coba lewat userid yang tersimpan di cache profil
+                    if cached_profile and cached_profile.get('userid'):
+                        try:
+                            profile = source.profile_by_id(sess, cached_profile['userid'])
+                            notify("warning", f"⚠️ @{clean_username} sekarang bernama @{profile.username}, perbarui daftar akun unit")
+                            break
+                        except Exception:
+                            pass
+                    scraping_cache.mark_missing(clean_username)
+                    notify("error", f"❌ Username '@{clean_username}' tidak ditemukan")
+                    return
+                # Rate limit error
+                elif "401 Unauthorized" in error_msg or "Please wait a few minutes" in error_msg or "429" in error_msg:
+                    rate_limit_manager.mark_rate_limited(clean_username)
+                    source.mark_rate_limited(sess)
+                    if attempt < max_retries:
+                        # Request berikutnya menunggu cooldown global dengan laju yang sudah diturunkan pacer
+                        notify("warning", f"⏳ Instagram membatasi akses (Rate Limit). Laju diturunkan ke {rate_limit_manager.current_rate:.2f} req/detik, retry setelah cooldown {rate_limit_manager.global_cooldown_seconds} detik... (Attempt {attempt+1}/{max_retries})")
+                    else:
+                        notify("error", f"❌ Instagram membatasi akses setelah {max_retries} retry. Silakan coba lagi dalam 15-30 menit.")
+                        outcome['rate_limited'] = True
+                        return
+                else:
+                    notify("error", f"❌ Gagal membuka profil @{clean_username}: {e}")
+                    return
+    
+    if not profile:
+        return
+
+    window_from, window_to = resolve_date_window(target_month, date_from, date_to)
+    if window_from and window_to and window_from > window_to:
+        notify("warning", f"⚠️ Filter bulan {target_month} berada di luar rentang tanggal yang dipilih")
+        return
+    try:
+        record_profile(clean_username, profile)
+    except Exception as e:
+        notify("debug", f"Gagal menyimpan cache profil @{clean_username}: {e}")
+    unfiltered_incremental = incremental and window_from is None and window_to is None
+    request_key = f"{window_from}|{window_to}|{'inc' if incremental else 'full'}"
+    cursor = load_scrape_cursor(clean_username, request_key)
+    known_shortcode = None
+    if cursor:
+        # Lanjutkan iterasi yang terputus dengan window yang sama seperti saat cursor dibuat
+        window_from, window_to = cursor['window_from'], cursor['window_to']
+    elif unfiltered_incremental:
+        # Jumlah post sama dengan saat sinkron terakhir: tidak ada post baru, lewati iterasi
+        # (metrik post lama di-refresh terpisah oleh job refresh metrik)
+        if cached_profile and cached_profile.get('synced_mediacount') == profile.mediacount:
+            notify("info", f"⏭️ @{clean_username}: tidak ada post baru ({profile.mediacount} post)")
+            outcome['status'] = 'skipped'
+            return
+        state = get_sync_state(clean_username)
+        if state and state.get('last_post_date'):
+            # Shortcode post terbaru tersimpan = penanda berhenti yang pasti (lihat iter_posts_in_window)
+            known_shortcode = state.get('last_shortcode')
+            window_from = (datetime.strptime(state['last_post_date'], '%Y-%m-%d') - timedelta(days=refresh_days)).date()
+
+    count = 0
+    interrupted = False
+    posts = None
+    with phase("iteration"):
+        try:
+            posts = profile.get_posts()
+            if cursor:
+                try:
+                    posts.thaw(cursor['frozen'])
+                    notify("info", f"↪️ @{clean_username}: melanjutkan iterasi dari post ke-{cursor['frozen'].total_index + 1}")
+                except Exception as e:
+                    # Cursor dari sesi lain (login vs anonim) atau query berbeda: mulai dari awal
+                    notify("debug", f"Cursor @{clean_username} tidak bisa dipakai: {e}")
+            for post in iter_posts_in_window(posts, window_from, window_to, known_shortcode=known_shortcode):
+                if count >= limit:
+                    break
+                try:
+                    record = post_to_record(post, unit_name, clean_username, kategori_input)
+                except Exception as inner_e:
+                    # Check if it's a rate limit error
+                    error_msg = str(inner_e)
+                    if "401 Unauthorized" in error_msg or "Please wait" in error_msg:
+                        outcome['rate_limited'] = True
+                        rate_limit_manager.mark_rate_limited(clean_username)
+                        source.mark_rate_limited(sess)
+                        notify("warning", "⚠️ Rate limit detected saat scrape post. Menghentikan scraping untuk mencegah ban...")
+                        interrupted = True
+                        break
+                    else:
+                        # Skip problematic post but continue
+                        notify("debug", f"Skip post @{clean_username}: {inner_e}")
+                        continue
+                count += 1
+                # Tanpa jeda per post: jeda dibebankan per request HTTP (PacedRateController)
+                yield record
+        except Exception as page_e:
+            # Error saat memuat halaman post berikutnya: post yang sudah di-yield tetap tersimpan
+            interrupted = True
+            error_msg = str(page_e)
+            if "401 Unauthorized" in error_msg or "Please wait" in error_msg or "429" in error_msg:
+                outcome['rate_limited'] = True
+                rate_limit_manager.mark_rate_limited(clean_username)
+                source.mark_rate_limited(sess)
+                notify("warning", f"⚠️ Rate limit detected saat memuat daftar post @{clean_username}. Menghentikan scraping untuk mencegah ban...")
+            else:
+                notify("warning", f"⚠️ Gagal memuat daftar post @{clean_username}: {page_e}")
+
+    outcome['status'] = 'interrupted' if interrupted else 'done'
+    try:
+        if interrupted and posts is not None:
+            save_scrape_cursor(clean_username, request_key, posts, window_from, window_to)
+            notify("info", f"💾 Posisi iterasi @{clean_username} disimpan, sinkron berikutnya melanjutkan dari sini")
+        elif not interrupted:
+            clear_scrape_cursor(clean_username)
+    except Exception as e:
+        notify("debug", f"Gagal menyimpan cursor @{clean_username}: {e}")
+
+    # Iterasi lengkap: jumlah post saat ini jadi acuan skip pada sinkron incremental berikutnya
+    if unfiltered_incremental and not interrupted and count < limit:
+        mark_profile_synced(clean_username, profile.mediacount)
+
+def scrape_posts(username, unit_name, limit=20, target_month="Semua", kategori_input="Korporat", date_from=None, date_to=None,
+                 max_retries=2, notify=None, incremental=False, refresh_days=3, outcome=None):
+    """Generator: yield record monitoring_pln satu per satu begitu post dibaca (tanpa menunggu akun selesai).
+
+    Parameter sama seperti run_scraper. outcome: dict opsional yang diisi status akhir
+    (lihat _iter_with_session). Sesi dikembalikan ke pool saat generator selesai/ditutup.
+    Hasil tidak disimpan ke ScrapingCache (pemanggil menulis langsung ke DB); negative cache tetap dipakai.
+    """
+    notify = notify or log_notify
+    outcome = outcome if outcome is not None else {}
+    clean_username = extract_username(username)
+    if scraping_cache.is_missing(clean_username):
+        outcome['status'] = 'failed'
+        notify("error", f"❌ Username '@{clean_username}' tidak ditemukan (cache)")
+        return
+
+    # Check rate limit before attempting
+    rate_limit_manager.wait_if_needed(clean_username, notify)
+
+    source = get_post_source()
+    sess = source.checkout()
+    ok, error = True, None
+    try:
+        yield from _iter_with_session(source, sess, clean_username, unit_name, limit, target_month, kategori_input,
+                                      date_from, date_to, max_retries, notify, incremental, refresh_days, outcome)
+    except Exception as e:
+        ok, error = False, str(e)[:200]
+        raise
+    finally:
+        # Juga saat generator ditutup di tengah jalan (GeneratorExit: break pemanggil / stop)
+        source.release(sess, ok=ok, error=error)
+
+def run_scraper(username, unit_name, limit=20, target_month="Semua", kategori_input="Korporat", date_from=None, date_to=None, max_retries=2, notify=None,
+                incremental=False, refresh_days=3):
+    """Scrape Instagram posts with retry logic and rate limit handling.
+
+    notify: callable(level, message) untuk pesan progres; default ke logging (log_notify).
+    Worker thread sinkronisasi paralel memakai NotifyBuffer agar UI hanya diupdate dari thread utama.
+    target_month/date_from/date_to dipersempit lewat resolve_date_window, dan iterasi berhenti
+    begitu post lebih lama dari awal rentang (lihat iter_posts_in_window).
+    incremental: berhenti begitu mencapai post yang sudah tersimpan (high-water mark di sync_state_akun:
+    shortcode post terbaru sebagai penanda berhenti, tanggalnya sebagai cadangan);
+    hanya post `refresh_days` hari sebelum high-water mark yang di-refresh metriknya.
+    Hanya berlaku tanpa filter bulan/tanggal.
+    Versi DataFrame + cache di atas scrape_posts; sinkronisasi memakai scrape_posts langsung.
+    """
+    notify = notify or log_notify
+    clean_username = extract_username(username)
+    cache_key = ScrapingCache.make_key(clean_username, unit_name, limit, target_month, kategori_input,
+                                       date_from, date_to, incremental)
+    cached_result = scraping_cache.get(cache_key)
+    if cached_result is not None:
+        notify("info", f"✅ Menggunakan cache untuk @{clean_username} (TTL: 1 jam)")
+        return cached_result
+
+    def _scrape():
+        outcome = {}
+        result_df = pd.DataFrame(list(scrape_posts(username, unit_name, limit, target_month, kategori_input, date_from,
+                                                   date_to, max_retries, notify, incremental, refresh_days, outcome)))
+        # Cache the result (hasil parsial dengan cursor tertunda / profil gagal dibuka tidak di-cache)
+        if outcome.get('status') in ('done', 'skipped'):
+            scraping_cache.set(cache_key, result_df)
+        return result_df
+
+    return _scrape_flights.do(cache_key, _scrape)
+
+
+# Kunci rate limit bersama untuk refresh metrik (request per shortcode, bukan per profil)
+METRICS_RATE_KEY = "__metrics__"
+
+def fetch_post_metrics(shortcode, sess, notify=None):
+    """Ambil likes/comments/views satu post berdasarkan shortcode (satu request, tanpa membuka profil).
+
+    sess: sesi pinjaman dari get_post_source(). Return dict {likes, comments, views} atau None jika gagal.
+    Saat kena rate limit, METRICS_RATE_KEY dan sesi ditandai sehingga pemanggil bisa berhenti.
+    """
+    notify = notify or log_notify
+    rate_limit_manager.wait_if_needed(METRICS_RATE_KEY, notify)
+    source = get_post_source()
+    try:
+        post = source.post(sess, shortcode)
+        return {
+            "likes": int(getattr(post, 'likes', 0) or 0),
+            "comments": int(getattr(post, 'comments', 0) or 0),
+            "views": int(getattr(post, 'video_view_count', 0) or 0),
+        }
+    except Exception as e:
+        error_msg = str(e)
+        if "401 Unauthorized" in error_msg or "Please wait" in error_msg or "429" in error_msg:
+            rate_limit_manager.mark_rate_limited(METRICS_RATE_KEY)
+            source.mark_rate_limited(sess)
+            notify("warning", "⚠️ Rate limit detected saat refresh metrik. Refresh dihentikan sementara...")
+        else:
+            notify("debug", f"Skip metrik {shortcode}: {e}")
+        return None
@@ -0,0 +1,66 @@
+"""Pencarian teks penuh (FTS5) atas caption post, nama pengajuan, dan nama kegiatan kalender.
+
+Index dibuat dan dijaga sinkron oleh trigger (migrasi v006_fulltext_search); modul ini hanya
+menyusun query MATCH, urutan relevansi (bm25) dan penanda kata yang cocok.
+"""
+import html
+import re
+
+from sqlalchemy import text
+
+from portal.db import engine
+
+CAPTION_FTS = "monitoring_fts"
+PENGAJUAN_FTS = "pengajuan_fts"
+CALENDAR_FTS = "calendar_fts"
+# Penanda sementara di hasil snippet()/highlight(); diganti <mark> setelah teks di-escape
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+
+def fts_query(term):
+    """Input bebas -> ekspresi MATCH aman: setiap kata jadi prefix ("pln"* "lamp"*), semua harus cocok.
+    None jika tidak ada kata yang bisa dicari"""
+    words = re.findall(r"\w+", term or "")
+    return " ".join(f'"{w}"*' for w in words) or None
+
+
+def match_condition(fts_table, rowid_expr, param="search"):
+    """Klausa `rowid_expr IN (...MATCH :param)` untuk digabung dengan filter lain"""
+    return f"{rowid_expr} IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :{param})"
+
+
+def snippet_sql(fts_table, max_tokens=16):
+    """Cuplikan teks di sekitar kata yang cocok (untuk caption panjang)"""
+    return f"snippet({fts_table}, 0, char(2), char(3), '…', {int(max_tokens)})"
+
+
+def highlight_sql(fts_table):
+    """Teks utuh dengan kata yang cocok ditandai (untuk nama pendek)"""
+    return f"highlight({fts_table}, 0, char(2), char(3))"
+
+
+def marked_html(value):
+    """Hasil snippet_sql/highlight_sql -> HTML aman dengan <mark> di kata yang cocok"""
+    return html.escape(str(value or "")).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def ranked_sql(fts_table):
+    return f"SELECT rowid, {highlight_sql(fts_table)} FROM {fts_table} WHERE {fts_table} MATCH :search ORDER BY rank"
+
+
+def ranked_matches(fts_table, term):
+    """[(rowid, nama bertanda HTML)] urut relevansi; [] jika tidak ada yang cocok"""
+    match = fts_query(term)
+    if not match:
+        return []
+    with engine.begin() as conn:
+        rows = conn.execute(text(ranked_sql(fts_table)), {"search": match}).fetchall()
+    return [(rowid, marked_html(marked)) for rowid, marked in rows]
+
+
+def rank_frame(df, matches, id_col="id"):
+    """Saring df ke baris hasil ranked_matches, urut relevansi, dengan kolom 'sorot' (nama bertanda)"""
+    order = {rowid: i for i, (rowid, _) in enumerate(matches)}
+    df = df[df[id_col].isin(order)].copy()
+    df["sorot"] = df[id_col].map(dict(matches))
+    return df.sort_values(id_col, key=lambda s: s.map(order))
@@ -0,0 +1,197 @@
+"""Pool sesi Instaloader yang dipakai ulang antar akun.
+
+Sesi login disimpan sebagai file di SESSION_DIR (dibuat sekali dengan
+`python -m portal.sessions --login USERNAME`). Tanpa file sesi, pool berisi
+beberapa context anonim. Kesehatan tiap sesi (pemakaian, gagal, cooldown rate
+limit) disimpan di file SQLite rate limiter sehingga terlihat dari semua proses
+dan cooldown tetap berlaku setelah restart.
+"""
+import argparse
+import glob
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+import instaloader
+
+from portal.db import RATE_LIMIT_DB_PATH, SESSION_DIR
+
+
+class InstaloaderSession:
+    """Satu Instaloader context yang sedang/bisa dipinjam"""
+    def __init__(self, name, loader, logged_in=False, session_file=None):
+        self.name = name
+        self.loader = loader
+        self.logged_in = logged_in
+        self.session_file = session_file
+        self.in_use = False
+        self.last_used = 0.0
+
+
+class SessionPool:
+    """Pinjamkan sesi Instaloader yang sehat; sesi yang kena rate limit diistirahatkan.
+
+    checkout() memilih sesi idle yang tidak sedang cooldown dan paling lama tidak dipakai;
+    jika semua sedang cooldown, dipilih yang cooldown-nya paling cepat selesai.
+    """
+    def __init__(self, session_dir=SESSION_DIR, health_path=RATE_LIMIT_DB_PATH, anonymous_size=3,
+                 cooldown_seconds=900, rate_controller=None):
+        self.session_dir = session_dir
+        # Factory RateController Instaloader (lihat portal.pacing) untuk semua loader di pool
+        self.rate_controller = rate_controller
+        self.health_path = health_path
+        self.cooldown_seconds = cooldown_seconds
+        self._cond = threading.Condition()
+        self._sessions = []
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ig_sessions (
+                    name TEXT PRIMARY KEY,
+                    logged_in INTEGER DEFAULT 0,
+                    uses INTEGER DEFAULT 0,
+                    failures INTEGER DEFAULT 0,
+                    rate_limited INTEGER DEFAULT 0,
+                    cooldown_until REAL DEFAULT 0,
+                    last_used REAL,
+                    last_error TEXT
+                )
+            """)
+        for path in sorted(glob.glob(os.path.join(session_dir, "session-*"))):
+            username = os.path.basename(path)[len("session-"):]
+            loader = self._new_loader(self.rate_controller)
+            try:
+                loader.load_session_from_file(username, path)
+            except Exception as e:
+                self._record(username, failures=1, last_error=f"gagal load sesi: {e}", logged_in=1)
+                continue
+            self._add(InstaloaderSession(username, loader, logged_in=True, session_file=path))
+        if not self._sessions:
+            for i in range(anonymous_size):
+                self._add(InstaloaderSession(f"anon-{i + 1}", self._new_loader(self.rate_controller)))
+
+    @staticmethod
+    def _new_loader(rate_controller=None):
+        # Dengan rate_controller, jeda acak bawaan Instaloader dimatikan (jeda diatur controller)
+        return instaloader.Instaloader(quiet=True, download_pictures=False, download_videos=False,
+                                       download_video_thumbnails=False, save_metadata=False,
+                                       sleep=rate_controller is None, rate_controller=rate_controller)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.health_path, timeout=15.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _add(self, session):
+        self._sessions.append(session)
+        self._record(session.name, logged_in=int(session.logged_in))
+
+    def _record(self, name, uses=0, failures=0, rate_limited=0, cooldown_until=None, last_error=None, logged_in=None):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                INSERT INTO ig_sessions (name, logged_in, uses, failures, rate_limited, cooldown_until, last_used, last_error)
+                VALUES (?, COALESCE(?, 0), ?, ?, ?, COALESCE(?, 0), ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    logged_in = COALESCE(?, logged_in),
+                    uses = uses + excluded.uses,
+                    failures = failures + excluded.failures,
+                    rate_limited = rate_limited + excluded.rate_limited,
+                    cooldown_until = COALESCE(?, cooldown_until),
+                    last_used = CASE WHEN excluded.uses > 0 THEN excluded.last_used ELSE last_used END,
+                    last_error = COALESCE(excluded.last_error, last_error)
+            """, (name, logged_in, uses, failures, rate_limited, cooldown_until, time.time(), last_error,
+                  logged_in, cooldown_until))
+
+    def _cooldowns(self):
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT name, cooldown_until FROM ig_sessions").fetchall())
+
+    def checkout(self, timeout=None):
+        """Pinjam satu sesi (blok sampai ada yang idle). Kembalikan dengan release()"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: any(not s.in_use for s in self._sessions), timeout):
+                raise TimeoutError("Tidak ada sesi Instagram yang tersedia")
+            now = time.time()
+            cooldowns = self._cooldowns()
+            idle = [s for s in self._sessions if not s.in_use]
+            healthy = [s for s in idle if cooldowns.get(s.name, 0) <= now]
+            if healthy:
+                session = min(healthy, key=lambda s: (not s.logged_in, s.last_used))
+            else:
+                session = min(idle, key=lambda s: cooldowns.get(s.name, 0))
+            session.in_use = True
+            session.last_used = now
+        return session
+
+    def release(self, session, ok=True, error=None):
+        """Kembalikan sesi ke pool dan catat hasil pemakaiannya"""
+        if session.logged_in and ok:
+            try:
+                session.loader.save_session_to_file(session.session_file)  # simpan cookie terbaru
+            except Exception:
+                pass
+        self._record(session.name, uses=1, failures=0 if ok else 1, last_error=error)
+        with self._cond:
+            session.in_use = False
+            self._cond.notify()
+
+    def mark_rate_limited(self, session, seconds=None):
+        """Istirahatkan sesi; checkout() berikutnya memilih sesi lain selama cooldown"""
+        self._record(session.name, rate_limited=1, cooldown_until=time.time() + (seconds or self.cooldown_seconds),
+                     last_error="rate limited")
+
+    @contextmanager
+    def session(self):
+        """with pool.session() as sess: ... sess.loader.context ..."""
+        sess = self.checkout()
+        try:
+            yield sess
+        except Exception as e:
+            self.release(sess, ok=False, error=str(e)[:200])
+            raise
+        else:
+            self.release(sess)
+
+    def stats(self):
+        """Kesehatan sesi untuk ditampilkan di UI (dibaca dari file bersama)"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("""
+                SELECT name, logged_in, uses, failures, rate_limited, cooldown_until, last_used, last_error
+                FROM ig_sessions ORDER BY logged_in DESC, name
+            """).fetchall()
+        now = time.time()
+        return [{
+            "sesi": r[0], "login": bool(r[1]), "dipakai": r[2], "gagal": r[3], "rate_limit": r[4],
+            "cooldown_detik": max(0, int((r[5] or 0) - now)),
+            "terakhir_dipakai": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r[6])) if r[6] else "-",
+            "error_terakhir": r[7] or ""
+        } for r in rows]
+
+
+def login(username, session_dir=SESSION_DIR):
+    """Login interaktif (password/2FA diminta di terminal) lalu simpan file sesi ke session_dir"""
+    os.makedirs(session_dir, exist_ok=True)
+    loader = SessionPool._new_loader()
+    loader.interactive_login(username)
+    path = os.path.join(session_dir, f"session-{username}")
+    loader.save_session_to_file(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m portal.sessions", description="Kelola sesi Instagram untuk scraper")
+    parser.add_argument("--login", metavar="USERNAME", help="Login dan simpan file sesi ke folder sesi")
+    parser.add_argument("--list", action="store_true", help="Tampilkan kesehatan sesi")
+    args = parser.parse_args(argv)
+    if args.login:
+        print(f"Sesi disimpan: {login(args.login)}")
+    if args.list or not args.login:
+        for row in SessionPool(anonymous_size=0).stats():
+            print(row)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
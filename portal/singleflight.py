@@ -0,0 +1,216 @@
+"""Single-flight per akun: satu akun hanya di-scrape sekali pada satu waktu.
+
+Dalam satu proses, permintaan kedua untuk kunci yang sama menunggu Flight milik
+permintaan pertama dan memakai hasilnya. Antar proses (beberapa worker
+`python -m portal.sync`), AccountFlights memegang lease di tabel scrape_flights
+pada file SQLite rate limiter: proses lain yang meminta akun yang sama menunggu
+sampai lease selesai lalu memakai hasil yang dicatat di sana. Lease diperbarui
+berkala oleh thread heartbeat; lease yang tidak diperbarui `lease_seconds` dianggap
+yatim (proses mati) dan boleh diambil alih.
+Flight juga membawa parameter permintaan leader (`request`, dict JSON) agar follower bisa
+menilai sendiri apakah hasil leader mencakup permintaannya.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+RESULT_FIELDS = ["status", "inserted", "updated", "posts", "error"]
+
+
+class Flight:
+    """Satu pekerjaan yang sedang berjalan untuk `key`; dipakai bersama leader dan semua follower"""
+    def __init__(self, key, remote=False, request=None):
+        self.key = key
+        self.remote = remote  # dikerjakan proses lain (hasil dibaca dari scrape_flights)
+        self.request = request  # parameter permintaan leader; None jika tidak diketahui
+        self.orphaned = False
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+
+class SingleFlight:
+    """Deduplikasi pekerjaan per kunci di dalam satu proses"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def claim(self, key, request=None):
+        """Return (flight, leader). leader=True: pemanggil wajib mengerjakan lalu finish(flight, ...);
+        leader=False: pekerjaan sudah berjalan, tunggu hasilnya dengan wait(flight).
+        request: parameter pekerjaan, disimpan di flight.request jika pemanggil menjadi leader"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight(key, request=request)
+            return flight, True
+
+    def finish(self, flight, result=None, error=None):
+        """Bagikan hasil leader (atau exception) ke semua yang menunggu"""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        flight.result, flight.error = result, error
+        flight._done.set()
+
+    def _poll(self, flight):
+        """Cek status flight di luar proses ini (tidak ada untuk SingleFlight biasa)"""
+
+    def wait(self, flight, timeout=None, stop=None, poll=1.0):
+        """Tunggu hasil leader. Return hasil, atau None jika timeout, `stop` di-set, atau leader di
+        proses lain hilang (flight.orphaned; pemanggil boleh claim ulang). Exception leader diteruskan"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not flight._done.wait(poll):
+            if (stop is not None and stop.is_set()) or (deadline is not None and time.monotonic() >= deadline):
+                return None
+            self._poll(flight)
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def do(self, key, fn):
+        """Jalankan fn() sekali untuk semua pemanggil bersamaan dengan `key` yang sama"""
+        flight, leader = self.claim(key)
+        if not leader:
+            return self.wait(flight)
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(flight, error=e)
+            raise
+        self.finish(flight, result)
+        return result
+
+
+class AccountFlights(SingleFlight):
+    """SingleFlight per akun yang juga terkoordinasi antar proses lewat lease SQLite.
+
+    Hasil yang dibagikan berupa dict {status, inserted, updated, posts, error}.
+    """
+    def __init__(self, path, lease_seconds=180, heartbeat_every=30):
+        super().__init__()
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.heartbeat_every = heartbeat_every
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._heartbeat = None
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_flights (
+                    username_ig TEXT PRIMARY KEY,
+                    owner TEXT,
+                    status TEXT,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    finished_at REAL,
+                    inserted INTEGER DEFAULT 0,
+                    updated INTEGER DEFAULT 0,
+                    posts INTEGER DEFAULT 0,
+                    error TEXT,
+                    request TEXT
+                )
+            """)
+            # File lease lama belum punya kolom request
+            columns = [r[1] for r in conn.execute("PRAGMA table_info('scrape_flights')").fetchall()]
+            if "request" not in columns:
+                conn.execute("ALTER TABLE scrape_flights ADD COLUMN request TEXT")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    def claim(self, key, request=None):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            now = time.time()
+            with closing(self._connect()) as conn:
+                # Ambil lease jika kosong, sudah selesai, atau yatim (heartbeat kedaluwarsa)
+                row = conn.execute("""
+                    INSERT INTO scrape_flights (username_ig, owner, status, started_at, heartbeat_at,
+                                                finished_at, inserted, updated, posts, error, request)
+                    VALUES (?, ?, 'running', ?, ?, NULL, 0, 0, 0, NULL, ?)
+                    ON CONFLICT(username_ig) DO UPDATE SET
+                        owner = excluded.owner, status = 'running', started_at = excluded.started_at,
+                        heartbeat_at = excluded.heartbeat_at, finished_at = NULL,
+                        inserted = 0, updated = 0, posts = 0, error = NULL, request = excluded.request
+                    WHERE scrape_flights.status != 'running' OR scrape_flights.heartbeat_at < ?
+                    RETURNING owner
+                """, (key, self.owner, now, now, json.dumps(request) if request is not None else None,
+                      now - self.lease_seconds)).fetchone()
+                if row is None:
+                    # Lease dipegang proses lain: baca parameter permintaannya
+                    held = conn.execute("SELECT request FROM scrape_flights WHERE username_ig = ?", (key,)).fetchone()
+            if row is None:
+                remote_request = json.loads(held[0]) if held and held[0] else None
+                flight = self._flights[key] = Flight(key, remote=True, request=remote_request)
+                return flight, False
+            flight = self._flights[key] = Flight(key, request=request)
+            self._ensure_heartbeat()
+            return flight, True
+
+    def finish(self, flight, result=None, error=None):
+        if not flight.remote:
+            result = result or {}
+            with closing(self._connect()) as conn:
+                conn.execute("""
+                    UPDATE scrape_flights SET status = ?, finished_at = ?, inserted = ?, updated = ?, posts = ?,
+                        error = ? WHERE username_ig = ? AND owner = ? AND status = 'running'
+                """, (result.get("status") or ("failed" if error else "done"), time.time(),
+                      result.get("inserted", 0), result.get("updated", 0), result.get("posts", 0),
+                      result.get("error") or (str(error) if error else None), flight.key, self.owner))
+        super().finish(flight, result, error)
+
+    def _poll(self, flight):
+        if not flight.remote:
+            return
+        with closing(self._connect()) as conn:
+            row = conn.execute("""
+                SELECT status, inserted, updated, posts, error, heartbeat_at FROM scrape_flights WHERE username_ig = ?
+            """, (flight.key,)).fetchone()
+        if row is None or row[0] != "running":
+            result = dict(zip(RESULT_FIELDS, row[:5])) if row else None
+            super().finish(flight, result)
+        elif row[5] < time.time() - self.lease_seconds:
+            flight.orphaned = True
+            super().finish(flight, None)
+
+    def _ensure_heartbeat(self):
+        if self._heartbeat is None or not self._heartbeat.is_alive():
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True, name="flight-heartbeat")
+            self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.heartbeat_every)
+            with self._lock:
+                keys = [k for k, f in self._flights.items() if not f.remote]
+            if not keys:
+                continue
+            try:
+                with closing(self._connect()) as conn:
+                    conn.executemany("""
+                        UPDATE scrape_flights SET heartbeat_at = ? WHERE username_ig = ? AND owner = ? AND status = 'running'
+                    """, [(time.time(), k, self.owner) for k in keys])
+            except sqlite3.Error:
+                pass  # dicoba lagi pada putaran berikutnya
+
+    def in_flight(self):
+        """Akun yang sedang di-scrape proses mana pun (lease masih hidup)"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("""
+                SELECT username_ig, owner, started_at FROM scrape_flights
+                WHERE status = 'running' AND heartbeat_at >= ? ORDER BY started_at
+            """, (time.time() - self.lease_seconds,)).fetchall()
+        return [dict(zip(["username_ig", "owner", "started_at"], r)) for r in rows]
@@ -0,0 +1,347 @@
+"""Sumber profil & post Instagram untuk scraper.
+
+run_scraper dan fetch_post_metrics hanya memakai antarmuka PostSource:
+- InstaloaderSource: Instagram asli lewat SessionPool (dipakai aplikasi & worker).
+- ReplaySource: memutar ulang profil dari file fixture JSON atau data sintetis, dengan
+  latensi dan error rate limit yang bisa diatur (untuk benchmark & uji tanpa internet).
+
+Format fixture (satu file JSON per profil, atau satu file berisi list profil):
+    {"username": "pln_uid_lampung", "userid": 123, "full_name": "...", "followers": 1000,
+     "posts": [{"shortcode": "C1x...", "date": "2026-01-15T08:00:00", "caption": "...",
+                "is_video": false, "likes": 10, "comments": 2, "views": 0}, ...]}
+Post diurutkan terbaru dulu (seperti Instagram). Opsional "tagged": list post akun lain yang
+menandai profil (format sama + "owner"); feed hashtag diambil dari caption semua post. Rekam profil asli dengan
+`python -m portal.sources --record USERNAME --out fixtures/`.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import instaloader
+from instaloader import FrozenNodeIterator
+
+
+class PostSource:
+    """Antarmuka sumber data. Profil yang dikembalikan punya atribut userid, username, full_name,
+    followers, mediacount dan get_posts() -> iterator post (date, shortcode, caption, is_video,
+    likes, comments, video_view_count) yang mendukung freeze()/thaw() seperti NodeIterator Instaloader."""
+    name = "base"
+
+    def checkout(self):
+        raise NotImplementedError
+
+    def release(self, sess, ok=True, error=None):
+        pass
+
+    def mark_rate_limited(self, sess):
+        pass
+
+    @contextmanager
+    def session(self):
+        sess = self.checkout()
+        try:
+            yield sess
+        except Exception as e:
+            self.release(sess, ok=False, error=str(e)[:200])
+            raise
+        else:
+            self.release(sess)
+
+    def profile(self, sess, username):
+        raise NotImplementedError
+
+    def profile_by_id(self, sess, userid):
+        raise NotImplementedError
+
+    def post(self, sess, shortcode):
+        raise NotImplementedError
+
+    def hashtag_posts(self, sess, name):
+        """Iterator post terbaru untuk hashtag `name` (tanpa #), mendukung freeze()/thaw()"""
+        raise NotImplementedError
+
+    def tagged_posts(self, sess, username):
+        """Iterator post akun lain yang menandai `username`, mendukung freeze()/thaw()"""
+        raise NotImplementedError
+
+
+class InstaloaderSource(PostSource):
+    """Instagram asli: sesi dari SessionPool, user agent sesi anonim dirotasi setiap request profil"""
+    name = "instaloader"
+
+    def __init__(self, pool, next_user_agent=None):
+        self.pool = pool
+        self.next_user_agent = next_user_agent
+
+    def checkout(self):
+        return self.pool.checkout()
+
+    def release(self, sess, ok=True, error=None):
+        self.pool.release(sess, ok=ok, error=error)
+
+    def mark_rate_limited(self, sess):
+        self.pool.mark_rate_limited(sess)
+
+    def _context(self, sess):
+        if not sess.logged_in and self.next_user_agent:
+            sess.loader.context.user_agent = self.next_user_agent()
+        return sess.loader.context
+
+    def profile(self, sess, username):
+        return instaloader.Profile.from_username(self._context(sess), username)
+
+    def profile_by_id(self, sess, userid):
+        return instaloader.Profile.from_id(self._context(sess), userid)
+
+    def post(self, sess, shortcode):
+        return instaloader.Post.from_shortcode(self._context(sess), shortcode)
+
+    def hashtag_posts(self, sess, name):
+        return instaloader.Hashtag.from_name(self._context(sess), name).get_posts_resumable()
+
+    def tagged_posts(self, sess, username):
+        return self.profile(sess, username).get_tagged_posts()
+
+
+class ReplayPost:
+    def __init__(self, data):
+        self.shortcode = data["shortcode"]
+        self.date = datetime.fromisoformat(data["date"])
+        self.caption = data.get("caption") or ""
+        self.is_video = bool(data.get("is_video"))
+        self.likes = int(data.get("likes") or 0)
+        self.comments = int(data.get("comments") or 0)
+        self.video_view_count = int(data.get("views") or 0)
+        self.owner_username = data.get("owner")
+
+
+class ReplayPostIterator:
+    """Iterator post per halaman (page_size); halaman pertama ikut metadata profil (gratis),
+    setiap halaman berikutnya = satu request simulasi. Mendukung freeze()/thaw()"""
+    def __init__(self, source, profile):
+        self.source = source
+        self.profile = profile
+        self.total_index = 0
+        self._loaded = min(source.page_size, len(profile.posts))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        posts = self.profile.posts
+        if self.total_index >= len(posts):
+            raise StopIteration
+        if self.total_index >= self._loaded:
+            self.source.request(f"posts:{self.profile.username}")
+            self._loaded = min(self._loaded + self.source.page_size, len(posts))
+        post = ReplayPost(posts[self.total_index])
+        self.total_index += 1
+        return post
+
+    def _query_variables(self):
+        return {"username": self.profile.username, "replay": True}
+
+    def freeze(self):
+        # Sama seperti NodeIterator: lanjut dari post terakhir yang sudah dikembalikan
+        index = max(self.total_index - 1, 0)
+        return FrozenNodeIterator(
+            query_hash=None, query_variables=self._query_variables(), query_referer=None,
+            context_username=None, total_index=index,
+            best_before=(datetime.now() + timedelta(days=29)).timestamp(),
+            remaining_data={"loaded": max(self._loaded, index)}, first_node=None, doc_id="replay")
+
+    def thaw(self, frozen):
+        if self.total_index or frozen.query_variables != self._query_variables() or frozen.doc_id != "replay":
+            raise instaloader.InvalidArgumentException("Mismatching resume information.")
+        self.total_index = frozen.total_index
+        self._loaded = frozen.remaining_data["loaded"]
+
+
+class ReplayProfile:
+    def __init__(self, source, data):
+        self.source = source
+        self.username = data["username"]
+        self.userid = int(data.get("userid") or zlib.crc32(self.username.encode()))
+        self.full_name = data.get("full_name", self.username)
+        self.followers = int(data.get("followers") or 0)
+        self.posts = data.get("posts", [])
+        self.mediacount = int(data.get("mediacount") or len(self.posts))
+
+    def get_posts(self):
+        return ReplayPostIterator(self.source, self)
+
+
+class ReplayFeed:
+    """Feed hashtag/tagged hasil replay: dipaging seperti post profil"""
+    def __init__(self, key, posts):
+        self.username = key
+        self.posts = posts
+
+
+class ReplaySession:
+    def __init__(self, name):
+        self.name = name
+        self.logged_in = False
+
+
+class ReplaySource(PostSource):
+    """Putar ulang profil dari fixture tanpa akses Instagram.
+
+    latency: detik per request simulasi (+ jitter acak 0..latency_jitter).
+    rate_limit_prob: peluang setiap request gagal dengan error 401 "Please wait" seperti Instagram.
+    pacer: AdaptivePacer opsional; jika diisi setiap request simulasi dibebankan ke pacer
+    (jalur pacing sama seperti PacedRateController).
+    """
+    name = "replay"
+
+    def __init__(self, profiles, latency=0.0, latency_jitter=0.0, rate_limit_prob=0.0, page_size=12,
+                 pacer=None, seed=None):
+        self.profiles = {p["username"].lower(): p for p in profiles}
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit_prob = rate_limit_prob
+        self.page_size = page_size
+        self.pacer = pacer
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counter = 0
+        self.requests = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def from_path(cls, path, **kwargs):
+        """Muat fixture dari file JSON atau semua *.json di folder"""
+        files = sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path]
+        profiles = []
+        for f in files:
+            with open(f, encoding="utf-8") as fh:
+                data = json.load(fh)
+            profiles.extend(data if isinstance(data, list) else [data])
+        return cls(profiles, **kwargs)
+
+    def request(self, what):
+        """Satu request simulasi: pacing, latensi, lalu kemungkinan rate limit"""
+        if self.pacer is not None:
+            self.pacer.before_request()
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            limited = self._random.random() < self.rate_limit_prob
+            if limited:
+                self.rate_limited += 1
+        if delay:
+            time.sleep(delay)
+        if limited:
+            if self.pacer is not None:
+                self.pacer.on_throttle()
+            raise instaloader.ConnectionException(
+                f'JSON Query to {what}: 401 Unauthorized - "Please wait a few minutes before you try again."')
+
+    def checkout(self):
+        with self._lock:
+            self._counter += 1
+            return ReplaySession(f"replay-{self._counter}")
+
+    def profile(self, sess, username):
+        self.request(f"profile:{username}")
+        data = self.profiles.get(username.lower())
+        if data is None:
+            raise instaloader.ProfileNotExistsException(f"Profile {username} does not exist.")
+        return ReplayProfile(self, data)
+
+    def profile_by_id(self, sess, userid):
+        self.request(f"profile_id:{userid}")
+        for data in self.profiles.values():
+            if int(data.get("userid") or 0) == int(userid):
+                return ReplayProfile(self, data)
+        raise instaloader.ProfileNotExistsException(f"No profile found with id {userid}.")
+
+    def post(self, sess, shortcode):
+        self.request(f"post:{shortcode}")
+        for data in self.profiles.values():
+            for p in data.get("posts", []):
+                if p["shortcode"] == shortcode:
+                    return ReplayPost(p)
+        raise instaloader.QueryReturnedNotFoundException(f"Post {shortcode} does not exist.")
+
+    def hashtag_posts(self, sess, name):
+        # Semua post profil yang caption-nya memuat #name, terbaru dulu
+        self.request(f"hashtag:{name}")
+        posts = [{**p, "owner": data["username"]} for data in self.profiles.values()
+                 for p in data.get("posts", []) if name.lower() in re.findall(r"#(\w+)", (p.get("caption") or "").lower())]
+        posts.sort(key=lambda p: p["date"], reverse=True)
+        return ReplayPostIterator(self, ReplayFeed(f"#{name}", posts))
+
+    def tagged_posts(self, sess, username):
+        # Fixture: "tagged": [{..., "owner": "akun_penanda"}] pada profil yang ditandai
+        profile = self.profile(sess, username)
+        posts = sorted(self.profiles[username.lower()].get("tagged", []), key=lambda p: p["date"], reverse=True)
+        return ReplayPostIterator(self, ReplayFeed(f"tagged:{profile.username}", posts))
+
+
+def synthetic_profiles(n_profiles=20, posts_per_profile=60, seed=0, now=None, prefix="bench_unit"):
+    """Profil sintetis: satu post setiap 1-3 hari mundur dari `now`, engagement acak"""
+    rnd = random.Random(seed)
+    now = now or datetime.now().replace(microsecond=0)
+    profiles = []
+    for i in range(n_profiles):
+        date = now
+        posts = []
+        for j in range(posts_per_profile):
+            date -= timedelta(days=rnd.randint(1, 3), minutes=rnd.randint(0, 600))
+            is_video = rnd.random() < 0.4
+            posts.append({
+                "shortcode": f"B{i:03d}x{j:05d}", "date": date.isoformat(),
+                "caption": f"Kegiatan {prefix}_{i} #{j} bersama masyarakat Lampung",
+                "is_video": is_video, "likes": rnd.randint(10, 2000), "comments": rnd.randint(0, 150),
+                "views": rnd.randint(100, 20000) if is_video else 0,
+            })
+        profiles.append({"username": f"{prefix}_{i}", "userid": 10 ** 9 + i, "full_name": f"Unit {i}",
+                         "followers": rnd.randint(500, 50000), "posts": posts})
+    return profiles
+
+
+def record_fixture(username, out_dir, limit=50, source=None):
+    """Rekam profil asli (maks. `limit` post) ke out_dir/<username>.json untuk ReplaySource"""
+    if source is None:
+        from portal.scraper import get_post_source
+        source = get_post_source()
+    with source.session() as sess:
+        profile = source.profile(sess, username)
+        posts = []
+        for post in profile.get_posts():
+            if len(posts) >= limit:
+                break
+            posts.append({"shortcode": post.shortcode, "date": post.date.isoformat(), "caption": post.caption or "",
+                          "is_video": bool(post.is_video), "likes": int(post.likes or 0),
+                          "comments": int(post.comments or 0), "views": int(post.video_view_count or 0)})
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{username}.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"username": profile.username, "userid": profile.userid, "full_name": profile.full_name,
+                   "followers": profile.followers, "mediacount": profile.mediacount, "posts": posts},
+                  fh, ensure_ascii=False, indent=1)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m portal.sources", description="Rekam fixture profil Instagram")
+    parser.add_argument("--record", metavar="USERNAME", action="append", required=True)
+    parser.add_argument("--out", default="fixtures")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+    for username in args.record:
+        print(f"Fixture disimpan: {record_fixture(username, args.out, args.limit)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
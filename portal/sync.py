@@ -0,0 +1,1022 @@
+"""Engine sinkronisasi Instagram -> monitoring_pln dan proses sinkronisasi headless.
+
+Halaman "Sinkronisasi Data" hanya memasukkan job ke tabel sync_jobs; proses ini
+yang mengambil job, menjalankan scraper, dan menulis hasilnya ke database yang sama.
+
+Jalankan dari folder root project:
+    python -m portal.sync                      # daemon: proses antrean + jadwal harian
+    python -m portal.sync --once               # proses antrean sekali lalu keluar
+    python -m portal.sync --schedule-every 360 # enqueue sinkronisasi semua akun tiap 6 jam
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from portal.db import engine, init_db
+from portal.engagement import downsample_snapshots
+from portal.ingest import INGEST_KATEGORI, commit_cursor, list_sources, scrape_source, sync_tagged_sources
+from portal.instrumentation import SyncTimer, activate
+from portal.scheduler import DAILY_REQUEST_BUDGET, plan_sync
+from portal.scraper import (METRICS_RATE_KEY, NotifyBuffer, account_flights, fetch_post_metrics, get_post_source,
+                            log_notify, rate_limit_manager, resolve_date_window, scrape_posts, update_sync_state)
+from portal.utils import extract_shortcode, extract_username
+
+logger = logging.getLogger("portal.sync")
+
+# Worker dianggap aktif jika heartbeat-nya lebih baru dari ini
+WORKER_HEARTBEAT_TIMEOUT = 120
+# Job yang berhenti karena rate limit dilanjutkan otomatis setelah jeda ini
+RATE_LIMIT_COOLDOWN_MINUTES = 20
+# Retensi snapshot engagement (downsampling) dijalankan worker sekali per interval ini
+SNAPSHOT_MAINTENANCE_INTERVAL = timedelta(hours=24)
+# Jadwal refresh metrik berdasarkan umur post: (umur maksimal dalam hari, interval refresh).
+# Post yang lebih tua dari tier terakhir tidak di-refresh lagi.
+METRIC_REFRESH_TIERS = [
+    (7, timedelta(hours=6)),
+    (30, timedelta(days=1)),
+    (90, timedelta(days=7)),
+]
+
+
+# ============ SYNC ENGINE ============
+# Kolom yang ditulis oleh sinkronisasi; urutan mengikuti placeholder di _upsert_chunk_sql
+UPSERT_COLUMNS = ["tanggal", "bulan", "tahun", "judul_pemberitaan", "link_pemberitaan",
+                  "platform", "tipe_konten", "pic_unit", "akun", "kategori",
+                  "likes", "comments", "views", "last_updated", "source"]
+# 15 parameter per baris -> 200 baris tetap jauh di bawah batas variabel SQLite
+UPSERT_CHUNK_SIZE = 200
+# Post per akun yang di-commit sekaligus saat streaming; antrean worker -> penulis dibatasi
+STREAM_BATCH_SIZE = 20
+STREAM_QUEUE_SIZE = 200
+
+
+# Ingest hashtag/tag: link yang sudah ada (mis. post akun unit sendiri) hanya diperbarui metriknya
+INGEST_UPDATE_COLUMNS = ["likes", "comments", "views", "last_updated"]
+
+
+def _upsert_chunk_sql(n_rows, update_columns=None):
+    values = ", ".join(
+        "(" + ", ".join(f":{col}_{i}" for col in UPSERT_COLUMNS) + ")" for i in range(n_rows)
+    )
+    updates = ", ".join(f"{col}=excluded.{col}" for col in (update_columns or UPSERT_COLUMNS)
+                        if col != "link_pemberitaan")
+    return text(f"""
+        INSERT INTO monitoring_pln ({", ".join(UPSERT_COLUMNS)}) VALUES {values}
+        ON CONFLICT(link_pemberitaan) DO UPDATE SET {updates}
+        RETURNING rowid
+    """)
+
+
+def save_scraped_posts(conn, records, unit_name, kat_name, target, notify=None, update_columns=None):
+    """Upsert hasil scrape satu akun dalam satu statement per chunk. Return (inserted, updated)
+
+    Baris baru dikenali dari rowid hasil RETURNING yang lebih besar dari MAX(rowid) sebelum upsert,
+    jadi tidak perlu SELECT per post. MAX(rowid) dibaca setelah write-lock diambil sehingga tidak ada
+    penulis lain di antaranya (dan transaksi tidak perlu naik dari pembaca ke penulis: BUSY_SNAPSHOT). update_columns: kolom yang ditimpa jika link sudah ada (default semua).
+    """
+    notify = notify or log_notify
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = {}
+    for item in records:
+        if not item: continue
+        link = item.get('link_pemberitaan')
+        if not link:
+            notify("warning", f"⚠️ Skip item tanpa link: {item.get('judul_pemberitaan', 'Unknown')[:50]}")
+            continue
+        # link yang sama dalam satu batch: data terakhir yang dipakai
+        rows[link] = {
+            "tanggal": item.get('tanggal'), "bulan": item.get('bulan'), "tahun": str(item.get('tahun')),
+            "judul_pemberitaan": item.get('judul_pemberitaan', 'No Title'), "link_pemberitaan": link,
+            "platform": item.get('platform', 'Instagram'), "tipe_konten": item.get('tipe_konten', 'Feeds'),
+            "pic_unit": unit_name, "akun": item.get('akun', target), "kategori": kat_name,
+            "likes": int(item.get('likes', 0)), "comments": int(item.get('comments', 0)),
+            "views": int(item.get('views', 0)), "last_updated": now,
+            "source": item.get('source', 'Scraping')
+        }
+    if not rows:
+        return 0, 0
+
+    # Ambil write-lock dulu (no-op UPDATE, seperti run_migrations) baru baca MAX(rowid)
+    conn.execute(text("UPDATE monitoring_pln SET rowid = rowid WHERE 0"))
+    max_rowid = conn.execute(text("SELECT COALESCE(MAX(rowid), 0) FROM monitoring_pln")).scalar()
+    inserted, updated = 0, 0
+    batch = list(rows.values())
+    for start in range(0, len(batch), UPSERT_CHUNK_SIZE):
+        chunk = batch[start:start + UPSERT_CHUNK_SIZE]
+        params = {f"{col}_{i}": row[col] for i, row in enumerate(chunk) for col in UPSERT_COLUMNS}
+        rowids = [r[0] for r in conn.execute(_upsert_chunk_sql(len(chunk), update_columns), params)]
+        new_rows = sum(1 for rid in rowids if rid > max_rowid)
+        inserted += new_rows
+        updated += len(rowids) - new_rows
+    return inserted, updated
+
+
+class _AccountWriter:
+    """Tulis record satu akun ke monitoring_pln per batch kecil, hanya dari thread pemanggil
+    (satu penulis agar tidak rebutan write-lock SQLite)"""
+    def __init__(self, row, timer, batch_size, notify):
+        self.row = row
+        self.target = row.get('username_ig', '')
+        self.timer = timer
+        self.batch_size = batch_size
+        self.notify = notify
+        self.pending = []
+        self.posts = 0
+        self.inserted = 0
+        self.updated = 0
+
+    def add(self, record):
+        """Tambah satu record; return (inserted, updated) jika batch penuh dan di-commit"""
+        self.pending.append(record)
+        self.posts += 1
+        if len(self.pending) >= self.batch_size:
+            return self.flush()
+        return 0, 0
+
+    def flush(self, final=False):
+        """Commit record yang tertunda + high-water mark akun. final=True juga mencatat
+        last_synced_at walaupun tidak ada record"""
+        batch, self.pending = self.pending, []
+        if not batch and not final:
+            return 0, 0
+        inserted, updated = 0, 0
+        with self.timer.phase("db_write"), engine.begin() as conn:
+            if batch:
+                inserted, updated = save_scraped_posts(conn, batch, self.row.get('nama_unit', 'Unknown'),
+                                                       self.row.get('kategori', 'Korporat'), self.target, self.notify)
+            update_sync_state(conn, extract_username(self.target), batch)
+        self.inserted += inserted
+        self.updated += updated
+        return inserted, updated
+
+
+def _flight_request(row, limit, target_month, date_from, date_to, incremental):
+    """Parameter scrape satu akun yang disimpan di flight (lihat _request_covers)"""
+    window_from, window_to = resolve_date_window(target_month, date_from, date_to)
+    return {
+        "unit": row.get('nama_unit', 'Unknown'),
+        "kategori": row.get('kategori', 'Korporat'),
+        "from": window_from.isoformat() if window_from else None,
+        "to": window_to.isoformat() if window_to else None,
+        # incremental hanya berpengaruh tanpa filter tanggal (awal window dari high-water mark akun)
+        "incremental": bool(incremental) and window_from is None and window_to is None,
+        "limit": int(limit),
+    }
+
+
+def _request_covers(leader, request):
+    """True jika hasil scrape dengan parameter `leader` sudah mencakup `request`.
+
+    Post dibaca dari yang terbaru, jadi leader hanya mencakup jika unit/kategori sama, akhir window
+    sama, awal window leader tidak lebih baru, dan limit-nya tidak lebih kecil. Leader incremental
+    hanya mencakup permintaan incremental lain. Parameter leader yang tidak diketahui: tidak mencakup.
+    """
+    if not leader or leader.get("unit") != request["unit"] or leader.get("kategori") != request["kategori"]:
+        return False
+    if leader.get("to") != request["to"] or (leader.get("limit") or 0) < request["limit"]:
+        return False
+    if leader.get("incremental"):
+        return request["incremental"]
+    return leader.get("from") is None or (request["from"] is not None and leader["from"] <= request["from"])
+
+
+def _scrape_account_worker(row, limit, target_month, date_from, date_to, incremental, out,
+                           on_account_start=None, halt=None, stop=None):
+    """Dijalankan di worker thread: scrape satu akun di bawah batas global akun paralel dan kirim
+    setiap record ke antrean `out` begitu dibaca. Pesan per akun: ('start', row, (timer, flight)),
+    ('post', row, record)..., lalu selalu diakhiri ('end', row, info), ('skipped', row, None), atau
+    ('shared', row, hasil) jika akun sedang di-scrape job/proses lain dengan parameter yang mencakup
+    permintaan ini (single-flight, hasilnya dipakai). Jika tidak mencakup, tunggu scrape tsb selesai
+    lalu scrape sendiri"""
+    target = row.get('username_ig', '')
+    key = extract_username(target)
+    request = _flight_request(row, limit, target_month, date_from, date_to, incremental)
+    while True:
+        with rate_limit_manager.account_slot():
+            if (halt is not None and halt.is_set()) or (stop is not None and stop.is_set()):
+                out.put(("skipped", row, None))
+                return
+            flight, leader = account_flights.claim(key, request)
+            if leader:
+                _scrape_account(row, flight, limit, target_month, date_from, date_to, incremental, out,
+                                on_account_start, halt, stop)
+                return
+        covered = _request_covers(flight.request, request)
+        # Tunggu di luar slot agar akun lain tetap jalan
+        try:
+            shared = account_flights.wait(flight, stop=stop)
+        except Exception as e:
+            shared = {"status": "failed", "error": str(e)}
+        if shared is not None and covered:
+            out.put(("shared", row, shared))
+            return
+        if shared is None and not flight.orphaned:
+            out.put(("skipped", row, None))
+            return
+        # Pemilik lease di proses lain hilang, atau rentang/parameter leader tidak mencakup
+        # permintaan ini: claim ulang lalu scrape sendiri
+
+
+def _scrape_account(row, flight, limit, target_month, date_from, date_to, incremental, out,
+                    on_account_start, halt, stop):
+    target = row.get('username_ig', '')
+    timer = SyncTimer(extract_username(target))
+    out.put(("start", row, (timer, flight)))
+    info = {"buffer": NotifyBuffer(), "outcome": {}, "rate_limited": False, "error": None}
+    try:
+        if on_account_start:
+            on_account_start(row)
+        with activate(timer):
+            for record in scrape_posts(target, row.get('nama_unit', 'Unknown'), limit, target_month,
+                                       row.get('kategori', 'Korporat'), date_from, date_to,
+                                       notify=info["buffer"], incremental=incremental, outcome=info["outcome"]):
+                out.put(("post", row, record))
+                if stop is not None and stop.is_set():
+                    break
+    except Exception as e:
+        info["error"] = str(e)
+    finally:
+        # Hanya rate limit yang dialami run ini; cooldown tersimpan dari run sebelumnya sudah
+        # ditunggu wait_if_needed dan tidak boleh menghentikan job bila scrape kali ini berhasil
+        info["rate_limited"] = bool(info["outcome"].get("rate_limited"))
+        if info["rate_limited"] and halt is not None:
+            halt.set()
+        out.put(("end", row, info))
+
+
+def _shared_result(shared):
+    """Hasil akun yang ikut hasil scrape lain: tidak ada baris yang ditulis di sini"""
+    status = shared.get("status") if shared else None
+    result = {"status": status if status in ("done", "rate_limited") else "failed", "inserted": 0, "updated": 0,
+              "posts": (shared or {}).get("posts") or 0, "error": None, "shared": True}
+    if result["status"] == "rate_limited":
+        result["error"] = "Instagram membatasi akses (rate limit)"
+    elif result["status"] == "failed":
+        result["error"] = f"Sinkronisasi bersamaan gagal: {(shared or {}).get('error') or status}"
+    return result
+
+
+def sync_accounts_concurrently(to_process, limit, target_month, date_from=None, date_to=None,
+                               max_workers=3, on_account_done=None, incremental=False, notify=None,
+                               on_account_start=None, stop_on_rate_limit=False, job_id=None,
+                               on_account_progress=None, batch_size=STREAM_BATCH_SIZE):
+    """Scrape banyak akun secara paralel dan tulis hasilnya dari thread pemanggil secara streaming.
+
+    to_process: DataFrame atau list of dict dengan kolom username_ig, nama_unit, kategori.
+    Worker hanya melakukan scraping (jeda per akun tetap diatur InstagramRateLimitManager) dan
+    mengirim post satu per satu lewat antrean; di sini post di-upsert per batch `batch_size`
+    sehingga hasil parsial tetap tersimpan walaupun akun gagal di tengah jalan.
+    on_account_start: callable(row), dipanggil dari worker thread saat akun mulai di-scrape.
+    on_account_progress: callable(row, progress) setiap post diterima, progress dict
+    {'posts': jumlah post akun ini sejauh ini, 'inserted', 'updated': yang baru di-commit pada langkah ini}.
+    on_account_done: callable(done, total, row, result) dengan result dict
+    {'status': done/rate_limited/failed, 'inserted', 'updated', 'posts', 'error'} (total per akun);
+    'shared': True jika akun sedang di-scrape sinkronisasi lain dan hasilnya yang dipakai (inserted/updated 0).
+    stop_on_rate_limit: begitu satu akun kena rate limit, akun yang belum mulai dibatalkan
+    (dicatat di summary['skipped'] agar bisa dilanjutkan nanti).
+    Rincian waktu tiap akun dicatat ke sync_metrics (job_id opsional, lihat portal.instrumentation).
+    Return dict ringkasan {'inserted', 'updated', 'failed', 'rate_limited', 'skipped'}.
+    """
+    notify = notify or log_notify
+    rows = to_process.to_dict('records') if isinstance(to_process, pd.DataFrame) else list(to_process)
+    total = len(rows)
+    summary = {"inserted": 0, "updated": 0, "failed": [], "rate_limited": [], "skipped": []}
+    if not rows:
+        return summary
+
+    workers = max(1, min(int(max_workers), total, rate_limit_manager.max_concurrent_accounts))
+    halt = threading.Event() if stop_on_rate_limit else None
+    stop = threading.Event()
+    # Antrean terbatas: worker tertahan jika penulisan DB tertinggal (memori tetap kecil)
+    out = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ig-sync")
+    futures = []
+    flights = {}
+    try:
+        futures = [
+            pool.submit(_scrape_account_worker, row, limit, target_month, date_from, date_to,
+                        incremental, out, on_account_start, halt, stop)
+            for row in rows
+        ]
+
+        writers, errors = {}, {}
+        done = finished = 0
+        while finished < total:
+            kind, row, payload = out.get()
+            key = id(row)
+            target = row.get('username_ig', '')
+            if kind == "skipped":
+                finished += 1
+                summary["skipped"].append(target)
+                continue
+            if kind == "shared":
+                finished += 1
+                done += 1
+                result = _shared_result(payload)
+                if result["status"] == "failed":
+                    summary["failed"].append((target, result["error"]))
+                elif result["status"] == "rate_limited":
+                    summary["rate_limited"].append(target)
+                if on_account_done:
+                    on_account_done(done, total, row, result)
+                continue
+            if kind == "start":
+                timer, flight = payload
+                writers[key] = _AccountWriter(row, timer, batch_size, notify)
+                flights[key] = flight
+                continue
+            writer = writers[key]
+            if kind == "post":
+                if key in errors:
+                    continue
+                try:
+                    inserted, updated = writer.add(payload)
+                except Exception as e:
+                    errors[key] = f"Gagal insert/update item: {e}"
+                    continue
+                if on_account_progress:
+                    on_account_progress(row, {"posts": writer.posts, "inserted": inserted, "updated": updated})
+                continue
+
+            # kind == "end": commit sisa batch lalu laporkan hasil akun
+            finished += 1
+            done += 1
+            payload["buffer"].flush(notify)
+            result = {"status": "done", "inserted": 0, "updated": 0, "posts": writer.posts, "error": None}
+            if key not in errors:
+                try:
+                    # Hasil parsial tetap disimpan walaupun akun terkena rate limit
+                    inserted, updated = writer.flush(final=True)
+                    if on_account_progress and (inserted or updated):
+                        on_account_progress(row, {"posts": writer.posts, "inserted": inserted, "updated": updated})
+                except Exception as e:
+                    errors[key] = f"Gagal insert/update item: {e}"
+            result["inserted"], result["updated"] = writer.inserted, writer.updated
+            if payload["error"] or key in errors:
+                result["status"], result["error"] = "failed", payload["error"] or errors[key]
+            elif payload["rate_limited"]:
+                result["status"], result["error"] = "rate_limited", "Instagram membatasi akses (rate limit)"
+
+            # Bagikan hasil ke sinkronisasi lain yang menunggu akun ini (single-flight)
+            account_flights.finish(flights.pop(key), result)
+            writer.timer.posts = writer.posts
+            writer.timer.outcome = result["status"]
+            try:
+                with engine.begin() as conn:
+                    writer.timer.save(conn, job_id)
+            except Exception as e:
+                notify("debug", f"Gagal mencatat sync_metrics @{target}: {e}")
+
+            if result["status"] == "failed":
+                summary["failed"].append((target, result["error"]))
+            elif result["status"] == "rate_limited":
+                summary["rate_limited"].append(target)
+            summary["inserted"] += result["inserted"]
+            summary["updated"] += result["updated"]
+            if on_account_done:
+                on_account_done(done, total, row, result)
+    finally:
+        # Saat dihentikan (Ctrl+C/error), akun yang belum mulai tidak ikut dijalankan dan worker yang
+        # sedang berjalan berhenti di post berikutnya; antrean dikosongkan agar worker tidak tertahan
+        stop.set()
+        for fut in futures:
+            fut.cancel()
+        while not all(fut.done() for fut in futures):
+            try:
+                kind, row, payload = out.get(timeout=0.2)
+                if kind == "start":
+                    flights[id(row)] = payload[1]
+            except queue.Empty:
+                pass
+        pool.shutdown(wait=True)
+        # Akun yang terhenti sebelum selesai: lepas lease agar penunggu tidak menunggu sampai kedaluwarsa
+        for flight in flights.values():
+            account_flights.finish(flight, {"status": "interrupted", "error": "Sinkronisasi dihentikan"})
+    return summary
+
+
+# ============ METRICS REFRESH ============
+def select_posts_due_for_refresh(now=None, tiers=METRIC_REFRESH_TIERS, limit=None):
+    """Post Instagram yang metriknya sudah waktunya di-refresh menurut tier umur post.
+    last_updated dipakai sebagai waktu refresh terakhir. Urut dari post terbaru."""
+    now = pd.Timestamp(now or datetime.now())
+    # Post lebih tua dari tier terakhir tidak pernah di-refresh: saring di SQL lewat tanggal_iso
+    oldest = (now - pd.Timedelta(days=max(max_age for max_age, _ in tiers))).strftime('%Y-%m-%d')
+    df = pd.read_sql(text("""
+        SELECT link_pemberitaan, akun, tanggal, tanggal_iso, last_updated FROM monitoring_pln
+        WHERE tanggal_iso >= :oldest AND link_pemberitaan LIKE '%instagram.com/%'
+    """), engine, params={"oldest": oldest})
+    if df.empty:
+        return df.assign(shortcode=[], age_days=[])
+    df['shortcode'] = df['link_pemberitaan'].map(extract_shortcode)
+    posted = pd.to_datetime(df['tanggal_iso'], format='%Y-%m-%d', errors='coerce')
+    refreshed = pd.to_datetime(df['last_updated'], errors='coerce')
+    df['age_days'] = (now - posted).dt.days
+    interval = pd.Series(np.select(
+        [df['age_days'] <= max_age for max_age, _ in tiers],
+        [pd.Timedelta(every).to_timedelta64() for _, every in tiers],
+        default=np.timedelta64('NaT')
+    ), index=df.index)
+    due = df['shortcode'].notna() & interval.notna() & (df['age_days'] >= 0) & \
+        (refreshed.isna() | ((now - refreshed) >= interval))
+    df = df[due].sort_values('age_days')
+    return df.head(limit) if limit else df
+
+
+def refresh_post_metrics(limit=150, notify=None, on_progress=None, flush_every=20):
+    """Refresh likes/comments/views per shortcode untuk post yang jatuh tempo (tanpa scrape profil).
+    Berhenti begitu kena rate limit. Return dict {'due', 'refreshed', 'failed', 'rate_limited'}"""
+    notify = notify or log_notify
+    due = select_posts_due_for_refresh(limit=limit)
+    summary = {"due": len(due), "refreshed": 0, "failed": 0, "rate_limited": False}
+    if due.empty:
+        return summary
+
+    pending = []
+
+    def _flush():
+        if pending:
+            with engine.begin() as conn:
+                conn.execute(text("""
+                    UPDATE monitoring_pln SET likes=:lk, comments=:cm, views=:vw, last_updated=:lu
+                    WHERE link_pemberitaan=:l
+                """), pending)
+            summary["refreshed"] += len(pending)
+            pending.clear()
+
+    with get_post_source().session() as sess:
+        for done, post in enumerate(due.itertuples(), start=1):
+            metrics = fetch_post_metrics(post.shortcode, sess, notify)
+            if metrics is None:
+                if rate_limit_manager.is_rate_limited(METRICS_RATE_KEY):
+                    summary["rate_limited"] = True
+                    break
+                summary["failed"] += 1
+            else:
+                pending.append({"lk": metrics["likes"], "cm": metrics["comments"], "vw": metrics["views"],
+                                "lu": datetime.now().strftime('%Y-%m-%d %H:%M:%S'), "l": post.link_pemberitaan})
+            if len(pending) >= flush_every:
+                _flush()
+            if on_progress:
+                on_progress(done, len(due))
+    _flush()
+    return summary
+
+
+# ============ JOB QUEUE ============
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def enqueue_sync_job(params, requested_by=None):
+    """Masukkan job sinkronisasi ke antrean. params: dict (lihat resolve_job_targets). Return id job"""
+    with engine.begin() as conn:
+        res = conn.execute(text("""
+            INSERT INTO sync_jobs (status, params, requested_by, created_at)
+            VALUES ('queued', :p, :rb, :ca) RETURNING id
+        """), {"p": json.dumps(params, default=str), "rb": requested_by, "ca": _now()})
+        return res.fetchone()[0]
+
+
+def claim_next_job(worker_id):
+    """Ambil satu job 'queued' tertua secara atomik (aman jika ada beberapa worker)"""
+    with engine.begin() as conn:
+        row = conn.execute(text("""
+            UPDATE sync_jobs SET status='running', started_at=:now, worker_id=:w
+            WHERE id = (SELECT id FROM sync_jobs WHERE status='queued' ORDER BY id LIMIT 1)
+            RETURNING id, params, requested_by
+        """), {"now": _now(), "w": worker_id}).fetchone()
+    if not row:
+        return None
+    return {"id": row[0], "params": json.loads(row[1] or '{}'), "requested_by": row[2]}
+
+
+def ensure_job_items(job_id, params):
+    """Buat checkpoint per akun saat job pertama kali diambil (sekali saja per job).
+    Return list item yang belum selesai: {id, username_ig, nama_unit, kategori}"""
+    with engine.begin() as conn:
+        has_items = conn.execute(text("SELECT 1 FROM sync_job_items WHERE job_id=:j LIMIT 1"), {"j": job_id}).fetchone()
+        if not has_items:
+            for row in resolve_job_targets(params):
+                conn.execute(text("""
+                    INSERT OR IGNORE INTO sync_job_items (job_id, username_ig, nama_unit, kategori)
+                    VALUES (:j, :u, :n, :k)
+                """), {"j": job_id, "u": row['username_ig'], "n": row['nama_unit'], "k": row['kategori']})
+        pending = conn.execute(text("""
+            SELECT id, username_ig, nama_unit, kategori FROM sync_job_items
+            WHERE job_id=:j AND status IN ('queued', 'running', 'rate_limited') ORDER BY id
+        """), {"j": job_id}).mappings().all()
+    return [dict(r) for r in pending]
+
+
+def mark_item_running(item_id):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE sync_job_items SET status='running', attempts=attempts+1, started_at=:now, error=NULL,
+                posts_fetched=0
+            WHERE id=:id
+        """), {"now": _now(), "id": item_id})
+
+
+def checkpoint_item(job_id, item_id, status, inserted=0, updated=0, error=None):
+    """Simpan hasil satu akun lalu hitung ulang progres job dari tabel item"""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE sync_job_items SET status=:s, inserted=inserted+:ins, updated=updated+:upd,
+                error=:e, finished_at=:now
+            WHERE id=:id
+        """), {"s": status, "ins": inserted, "upd": updated, "e": error, "now": _now(), "id": item_id})
+        _refresh_job_counters(conn, job_id)
+
+
+def update_item_progress(job_id, item_id, posts, inserted=0, updated=0):
+    """Progres akun yang sedang berjalan: jumlah post terbaca + hasil batch yang sudah di-commit"""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE sync_job_items SET posts_fetched=:p, inserted=inserted+:ins, updated=updated+:upd
+            WHERE id=:id
+        """), {"p": posts, "ins": inserted, "upd": updated, "id": item_id})
+        if inserted or updated:
+            _refresh_job_counters(conn, job_id)
+
+
+def _refresh_job_counters(conn, job_id):
+    conn.execute(text("""
+        UPDATE sync_jobs SET
+            total_accounts = (SELECT COUNT(*) FROM sync_job_items WHERE job_id=:j),
+            processed_accounts = (SELECT COUNT(*) FROM sync_job_items WHERE job_id=:j AND status IN ('done', 'failed')),
+            inserted = (SELECT COALESCE(SUM(inserted), 0) FROM sync_job_items WHERE job_id=:j),
+            updated = (SELECT COALESCE(SUM(updated), 0) FROM sync_job_items WHERE job_id=:j)
+        WHERE id=:j
+    """), {"j": job_id})
+
+
+def finish_job(job_id, status=None, message=None):
+    """Tutup job. Tanpa status eksplisit, status diturunkan dari item: masih ada akun
+    rate_limited/belum diproses -> 'rate_limited' (dilanjutkan otomatis setelah cooldown), selain itu 'done'"""
+    with engine.begin() as conn:
+        counts = dict(conn.execute(text("SELECT status, COUNT(*) FROM sync_job_items WHERE job_id=:j GROUP BY status"),
+                                   {"j": job_id}).fetchall())
+        pending = sum(counts.get(k, 0) for k in ('rate_limited', 'queued', 'running'))
+        if status is None:
+            status = "rate_limited" if pending else "done"
+        if message is None:
+            totals = conn.execute(text("""
+                SELECT COALESCE(SUM(inserted), 0), COALESCE(SUM(updated), 0) FROM sync_job_items WHERE job_id=:j
+            """), {"j": job_id}).fetchone()
+            message = f"Baru: {totals[0]}, Diperbarui: {totals[1]}"
+            if pending:
+                message += f", Tertunda rate limit: {pending} akun (dilanjutkan otomatis)"
+            if counts.get('failed'):
+                message += f", Gagal: {counts['failed']} akun"
+        if counts:
+            _refresh_job_counters(conn, job_id)
+        conn.execute(text("UPDATE sync_jobs SET status=:s, finished_at=:now, message=:m WHERE id=:id"),
+                     {"s": status, "now": _now(), "m": message, "id": job_id})
+    return status
+
+
+def resume_job(job_id, retry_failed=True):
+    """Masukkan kembali job ke antrean; akun yang sudah 'done' tidak di-scrape ulang"""
+    statuses = "('running', 'rate_limited', 'failed')" if retry_failed else "('running', 'rate_limited')"
+    with engine.begin() as conn:
+        conn.execute(text(f"UPDATE sync_job_items SET status='queued' WHERE job_id=:j AND status IN {statuses}"),
+                     {"j": job_id})
+        conn.execute(text("UPDATE sync_jobs SET status='queued', worker_id=NULL, finished_at=NULL WHERE id=:j"),
+                     {"j": job_id})
+
+
+def recover_stale_jobs(max_age_seconds=WORKER_HEARTBEAT_TIMEOUT):
+    """Job 'running' yang worker-nya mati/berhenti dikembalikan ke antrean (lanjut dari checkpoint)"""
+    since = (datetime.now() - timedelta(seconds=max_age_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+    with engine.begin() as conn:
+        stale = [r[0] for r in conn.execute(text("""
+            SELECT j.id FROM sync_jobs j
+            LEFT JOIN sync_worker_heartbeat h ON h.worker_id = j.worker_id
+            WHERE j.status = 'running'
+              AND (h.worker_id IS NULL OR h.state = 'stopped' OR h.last_seen < :s)
+        """), {"s": since}).fetchall()]
+    for job_id in stale:
+        resume_job(job_id, retry_failed=False)
+        logger.warning("job dilanjutkan dari checkpoint", extra={"job_id": job_id})
+    return stale
+
+
+def requeue_rate_limited_jobs(cooldown_minutes=RATE_LIMIT_COOLDOWN_MINUTES):
+    """Job yang berhenti karena rate limit diantrekan lagi setelah cooldown"""
+    before = (datetime.now() - timedelta(minutes=cooldown_minutes)).strftime('%Y-%m-%d %H:%M:%S')
+    with engine.begin() as conn:
+        due = [r[0] for r in conn.execute(text(
+            "SELECT id FROM sync_jobs WHERE status = 'rate_limited' AND finished_at <= :b"), {"b": before}).fetchall()]
+    for job_id in due:
+        resume_job(job_id, retry_failed=False)
+        logger.info("job rate limit diantrekan ulang", extra={"job_id": job_id})
+    return due
+
+
+def list_sync_jobs(limit=20):
+    """Job terbaru untuk ditampilkan di halaman Sinkronisasi Data"""
+    return pd.read_sql(text("""
+        SELECT id, status, requested_by, created_at, started_at, finished_at,
+               processed_accounts, total_accounts, inserted, updated, message
+        FROM sync_jobs ORDER BY id DESC LIMIT :n
+    """), engine, params={"n": limit})
+
+
+def list_job_items(job_id):
+    """Status per akun dari satu job"""
+    return pd.read_sql(text("""
+        SELECT username_ig, nama_unit, status, attempts, posts_fetched, inserted, updated, error,
+               started_at, finished_at
+        FROM sync_job_items WHERE job_id=:j ORDER BY id
+    """), engine, params={"j": job_id})
+
+
+def record_heartbeat(worker_id, state):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO sync_worker_heartbeat (worker_id, pid, hostname, state, last_seen)
+            VALUES (:w, :pid, :host, :st, :now)
+            ON CONFLICT(worker_id) DO UPDATE SET state=excluded.state, last_seen=excluded.last_seen
+        """), {"w": worker_id, "pid": os.getpid(), "host": socket.gethostname(), "st": state, "now": _now()})
+
+
+def get_active_workers(max_age_seconds=WORKER_HEARTBEAT_TIMEOUT):
+    """Worker sinkronisasi yang mengirim heartbeat dalam max_age_seconds terakhir"""
+    since = (datetime.now() - timedelta(seconds=max_age_seconds)).strftime('%Y-%m-%d %H:%M:%S')
+    return pd.read_sql(text("SELECT worker_id, hostname, pid, state, last_seen FROM sync_worker_heartbeat WHERE last_seen >= :s AND state != 'stopped'"),
+                       engine, params={"s": since})
+
+
+def resolve_job_targets(params):
+    """Ubah params job menjadi list akun {username_ig, nama_unit, kategori}.
+
+    params['mode']: 'all' (semua daftar_akun_unit), 'units' (params['usernames']),
+    'priority' (akun jatuh tempo berurutan prioritas dalam params['budget'] request/hari,
+    lihat portal.scheduler), atau 'manual' (params['username'] + params['unit'], kategori Influencer).
+    """
+    mode = params.get('mode', 'all')
+    if mode == 'manual':
+        return [{"username_ig": extract_username(params.get('username', '')),
+                 "nama_unit": params.get('unit') or 'Pusat', "kategori": "Influencer"}]
+    if mode == 'priority':
+        # Dihitung saat job diambil worker agar memakai staleness & budget terbaru
+        plan, _ = plan_sync(params.get('budget'))
+        return [{"username_ig": r['username_ig'], "nama_unit": r['nama_unit'], "kategori": "Korporat"}
+                for r in plan.to_dict('records')]
+    units_df = pd.read_sql(text("SELECT nama_unit, username_ig FROM daftar_akun_unit"), engine)
+    if mode == 'units':
+        units_df = units_df[units_df['username_ig'].isin(params.get('usernames', []))]
+    units_df['kategori'] = "Korporat"
+    return units_df.to_dict('records')
+
+
+class _JobLogAdapter(logging.LoggerAdapter):
+    """LoggerAdapter yang menggabungkan extra adapter (job_id) dengan extra per pesan"""
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def run_job(job):
+    """Jalankan satu job dari antrean; setiap akun di-checkpoint begitu selesai
+    sehingga job yang terputus dilanjutkan tanpa mengulang akun yang sudah 'done'"""
+    params = job["params"]
+    log = _JobLogAdapter(logger, {"job_id": job["id"]})
+    if params.get('mode') == 'metrics':
+        return run_metrics_job(job, log)
+    if params.get('mode') == 'ingest':
+        return run_ingest_job(job, log)
+    items = ensure_job_items(job["id"], params)
+    log.info("job dimulai", extra={"pending_accounts": len(items)})
+
+    def _on_account_start(row):
+        mark_item_running(row['id'])
+
+    progress_written = {}
+
+    def _on_account_progress(row, progress):
+        # Jumlah post terbaca cukup ditulis ~1x per detik; hasil batch yang di-commit selalu ditulis
+        now = time.monotonic()
+        if progress["inserted"] or progress["updated"] or now - progress_written.get(row['id'], 0) >= 1:
+            progress_written[row['id']] = now
+            update_item_progress(job["id"], row['id'], progress["posts"], progress["inserted"], progress["updated"])
+
+    def _on_account_done(done, total, row, result):
+        # inserted/updated sudah dijumlahkan per batch lewat _on_account_progress
+        checkpoint_item(job["id"], row['id'], result["status"], error=result["error"])
+        fields = {"account": row['username_ig'], "status": result["status"],
+                  "inserted": result["inserted"], "updated": result["updated"]}
+        if result["error"]:
+            log.warning("akun tidak selesai", extra={**fields, "error": result["error"]})
+        else:
+            log.info("akun selesai", extra=fields)
+
+    try:
+        summary = sync_accounts_concurrently(
+            items, int(params.get('limit', 10)), params.get('month', 'Semua'),
+            _parse_date(params.get('date_from')), _parse_date(params.get('date_to')),
+            max_workers=int(params.get('workers', rate_limit_manager.max_concurrent_accounts)),
+            on_account_done=_on_account_done, on_account_start=_on_account_start,
+            on_account_progress=_on_account_progress,
+            incremental=bool(params.get('incremental', True)), stop_on_rate_limit=True, job_id=job["id"],
+            notify=lambda level, message: log_notify(level, f"[job {job['id']}] {message}")
+        )
+    except Exception as e:
+        log.exception("job gagal")
+        finish_job(job["id"], "failed", str(e))
+        return None
+
+    status = finish_job(job["id"])
+    log.info("job selesai", extra={"status": status, "inserted": summary["inserted"], "updated": summary["updated"],
+                                   "failed": len(summary["failed"]), "rate_limited": len(summary["rate_limited"])})
+    return summary
+
+
+def run_metrics_job(job, log):
+    """Job refresh metrik saja (params: mode='metrics', limit = maksimal post per job)"""
+    try:
+        summary = refresh_post_metrics(
+            limit=int(job["params"].get('limit', 150)),
+            notify=lambda level, message: log_notify(level, f"[job {job['id']}] {message}"),
+            on_progress=lambda done, total: update_job_progress(job["id"], done, total)
+        )
+    except Exception as e:
+        log.exception("job gagal")
+        finish_job(job["id"], "failed", str(e))
+        return None
+    message = f"Metrik diperbarui: {summary['refreshed']}/{summary['due']} post"
+    if summary["failed"]:
+        message += f", Gagal: {summary['failed']}"
+    if summary["rate_limited"]:
+        message += " (terhenti rate limit, dilanjutkan otomatis)"
+    status = finish_job(job["id"], "rate_limited" if summary["rate_limited"] else "done", message)
+    log.info("job selesai", extra={"status": status, **summary})
+    return summary
+
+
+# ============ INGEST HASHTAG & TAG ============
+def run_ingest(limit=50, notify=None, on_progress=None, job_id=None, stop_on_rate_limit=True):
+    """Ingest post Influencer dari semua sumber aktif (hashtag terpantau + post yang menandai akun unit).
+
+    Sumber diproses berurutan dengan slot akun, pacing, dan single-flight yang sama seperti
+    sinkronisasi akun; post ditulis per batch STREAM_BATCH_SIZE lalu cursor sumber dimajukan.
+    Return dict {'sources', 'processed', 'inserted', 'updated', 'failed', 'rate_limited'}.
+    """
+    notify = notify or log_notify
+    sync_tagged_sources()
+    sources = list_sources(active_only=True)
+    summary = {"sources": len(sources), "processed": 0, "inserted": 0, "updated": 0, "failed": [],
+               "rate_limited": False}
+    for i, src in enumerate(sources):
+        if stop_on_rate_limit and summary["rate_limited"]:
+            break
+        key = src["source_key"]
+        flight, leader = account_flights.claim(key)
+        if not leader:
+            # Sumber yang sama sedang di-ingest proses lain: pakai hasilnya
+            account_flights.wait(flight)
+            summary["processed"] += 1
+            continue
+        timer = SyncTimer(key)
+        outcome, result = {}, {"status": "failed", "inserted": 0, "updated": 0, "posts": 0, "error": None}
+
+        def _write(batch):
+            with timer.phase("db_write"), engine.begin() as conn:
+                ins, upd = save_scraped_posts(conn, batch, src.get("nama_unit") or "Pusat", INGEST_KATEGORI, "",
+                                              notify, update_columns=INGEST_UPDATE_COLUMNS)
+            result["inserted"] += ins
+            result["updated"] += upd
+
+        try:
+            with rate_limit_manager.account_slot(), activate(timer):
+                batch = []
+                for record in scrape_source(src, limit, notify, outcome):
+                    batch.append(record)
+                    result["posts"] += 1
+                    if len(batch) >= STREAM_BATCH_SIZE:
+                        _write(batch)
+                        batch = []
+                if batch:
+                    _write(batch)
+            # Cursor dimajukan hanya setelah semua post tersimpan
+            commit_cursor(src, outcome)
+            # Hanya rate limit run ini, bukan sisa cooldown run sebelumnya (lihat _scrape_account)
+            if outcome.get("rate_limited"):
+                result["status"] = "rate_limited"
+                summary["rate_limited"] = True
+            elif outcome.get("status") in ("done", "partial"):
+                result["status"] = "done"
+            else:
+                result["error"] = f"Ingest {key} gagal"
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            account_flights.finish(flight, result)
+            timer.posts, timer.outcome = result["posts"], result["status"]
+            try:
+                with engine.begin() as conn:
+                    timer.save(conn, job_id)
+            except Exception as e:
+                notify("debug", f"Gagal mencatat sync_metrics {key}: {e}")
+        if result["status"] == "failed":
+            summary["failed"].append((key, result["error"]))
+        summary["processed"] += 1
+        summary["inserted"] += result["inserted"]
+        summary["updated"] += result["updated"]
+        notify("info", f"#️⃣ {key}: {result['posts']} post (baru {result['inserted']}, diperbarui {result['updated']})")
+        if on_progress:
+            on_progress(i + 1, len(sources))
+    return summary
+
+
+def run_ingest_job(job, log):
+    """Job ingest hashtag & tag (params: mode='ingest', limit = maksimal post baru per sumber)"""
+    try:
+        summary = run_ingest(
+            limit=int(job["params"].get('limit', 50)),
+            notify=lambda level, message: log_notify(level, f"[job {job['id']}] {message}"),
+            on_progress=lambda done, total: update_job_progress(job["id"], done, total), job_id=job["id"]
+        )
+    except Exception as e:
+        log.exception("job gagal")
+        finish_job(job["id"], "failed", str(e))
+        return None
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE sync_jobs SET inserted=:i, updated=:u WHERE id=:id"),
+                     {"i": summary["inserted"], "u": summary["updated"], "id": job["id"]})
+    message = f"Ingest {summary['processed']}/{summary['sources']} sumber, Baru: {summary['inserted']}, Diperbarui: {summary['updated']}"
+    if summary["failed"]:
+        message += f", Gagal: {len(summary['failed'])}"
+    if summary["rate_limited"]:
+        message += " (terhenti rate limit, dilanjutkan otomatis)"
+    status = finish_job(job["id"], "rate_limited" if summary["rate_limited"] else "done", message)
+    log.info("job selesai", extra={"status": status, **{k: v for k, v in summary.items() if k != "failed"},
+                                   "failed": len(summary["failed"])})
+    return summary
+
+
+def update_job_progress(job_id, processed, total):
+    """Progres job yang tidak memakai checkpoint per akun (mis. refresh metrik)"""
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE sync_jobs SET processed_accounts=:p, total_accounts=:t WHERE id=:id"),
+                     {"p": processed, "t": total, "id": job_id})
+
+
+def _last_scheduled_at(requested_by):
+    with engine.begin() as conn:
+        row = conn.execute(text("SELECT MAX(created_at) FROM sync_jobs WHERE requested_by = :rb"),
+                           {"rb": requested_by}).fetchone()
+    return datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S') if row and row[0] else None
+
+
+def maybe_enqueue_scheduled(every_minutes, params, requested_by='scheduler'):
+    """Enqueue job terjadwal jika interval sudah lewat (dihitung dari DB, aman setelah restart)"""
+    if not every_minutes:
+        return None
+    last = _last_scheduled_at(requested_by)
+    if last and datetime.now() - last < timedelta(minutes=every_minutes):
+        return None
+    job_id = enqueue_sync_job(params, requested_by=requested_by)
+    logger.info("job terjadwal dibuat", extra={"job_id": job_id, "requested_by": requested_by})
+    return job_id
+
+
+# ============ CLI ============
+class JsonLogFormatter(logging.Formatter):
+    """Satu objek JSON per baris log (ts, level, logger, msg + field extra)"""
+    _reserved = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {"message", "asctime"}
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).strftime('%Y-%m-%dT%H:%M:%S'),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update({k: v for k, v in vars(record).items() if k not in self._reserved})
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def configure_logging(level="INFO"):
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonLogFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m portal.sync", description="Proses sinkronisasi Instagram headless")
+    parser.add_argument("--once", action="store_true", help="Proses antrean (dan jadwal) sekali lalu keluar")
+    parser.add_argument("--schedule-every", type=int, default=60, metavar="MENIT",
+                        help="Interval enqueue otomatis sinkronisasi terjadwal (0 = nonaktif, default 60)")
+    parser.add_argument("--schedule-mode", choices=["priority", "all"], default="priority",
+                        help="priority: hanya akun jatuh tempo berurutan prioritas dalam budget harian; "
+                             "all: semua akun urut tabel")
+    parser.add_argument("--daily-budget", type=int, default=DAILY_REQUEST_BUDGET, metavar="REQUEST",
+                        help="Budget request Instagram per hari untuk mode priority")
+    parser.add_argument("--metrics-every", type=int, default=60, metavar="MENIT",
+                        help="Interval enqueue refresh metrik per shortcode sesuai tier umur post (0 = nonaktif)")
+    parser.add_argument("--metrics-limit", type=int, default=150, help="Maksimal post per job refresh metrik")
+    parser.add_argument("--ingest-every", type=int, default=180, metavar="MENIT",
+                        help="Interval enqueue ingest hashtag terpantau & post yang menandai akun unit (0 = nonaktif)")
+    parser.add_argument("--ingest-limit", type=int, default=50, help="Maksimal post baru per sumber ingest")
+    parser.add_argument("--poll", type=int, default=15, metavar="DETIK", help="Interval cek antrean job")
+    parser.add_argument("--limit", type=int, default=10, help="Limit post per akun untuk job terjadwal")
+    parser.add_argument("--workers", type=int, default=rate_limit_manager.max_concurrent_accounts,
+                        help="Akun paralel untuk job terjadwal")
+    parser.add_argument("--full", action="store_true", help="Job terjadwal tanpa mode inkremental")
+    parser.add_argument("--log-level", default="INFO")
+    return parser.parse_args(argv)
+
+
+class _HeartbeatThread(threading.Thread):
+    """Kirim heartbeat berkala selama worker hidup, termasuk saat satu akun butuh waktu lama"""
+    def __init__(self, worker_id, interval=30):
+        super().__init__(daemon=True, name="sync-heartbeat")
+        self.worker_id = worker_id
+        self.interval = interval
+        self.state = "idle"
+        self._stop_event = threading.Event()
+
+    def set_state(self, state):
+        self.state = state
+        record_heartbeat(self.worker_id, state)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                record_heartbeat(self.worker_id, self.state)
+            except Exception:
+                logger.exception("heartbeat gagal")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(args.log_level.upper())
+    init_db()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    scheduled_params = {"mode": args.schedule_mode, "limit": args.limit, "month": "Semua", "workers": args.workers,
+                        "incremental": not args.full}
+    if args.schedule_mode == "priority":
+        scheduled_params["budget"] = args.daily_budget
+    logger.info("sync worker mulai", extra={"worker_id": worker_id, "schedule_every": args.schedule_every})
+    heartbeat = _HeartbeatThread(worker_id)
+    heartbeat.set_state("idle")
+    heartbeat.start()
+    last_maintenance = None
+
+    try:
+        while True:
+            heartbeat.set_state("idle")
+            if last_maintenance is None or datetime.now() - last_maintenance >= SNAPSHOT_MAINTENANCE_INTERVAL:
+                logger.info("downsampling snapshot engagement", extra={"removed": downsample_snapshots()})
+                last_maintenance = datetime.now()
+            recover_stale_jobs()
+            requeue_rate_limited_jobs()
+            maybe_enqueue_scheduled(args.schedule_every, scheduled_params)
+            maybe_enqueue_scheduled(args.metrics_every, {"mode": "metrics", "limit": args.metrics_limit},
+                                    requested_by='scheduler-metrics')
+            maybe_enqueue_scheduled(args.ingest_every, {"mode": "ingest", "limit": args.ingest_limit},
+                                    requested_by='scheduler-ingest')
+            job = claim_next_job(worker_id)
+            while job:
+                heartbeat.set_state(f"job {job['id']}")
+                run_job(job)
+                job = claim_next_job(worker_id)
+            if args.once:
+                break
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        # Job yang sedang berjalan dilanjutkan dari checkpoint oleh worker berikutnya
+        logger.info("sync worker dihentikan", extra={"worker_id": worker_id})
+    finally:
+        heartbeat.stop()
+        record_heartbeat(worker_id, "stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Helper umum yang dipakai UI Streamlit maupun scraper."""
+import calendar
+import re
+
+import pandas as pd
+
+
+def clean_txt(text_input):
+    if not text_input: return "Konten Visual"
+    res = re.sub(r'[^\x00-\x7f]', r'', text_input)
+    return res.replace('\n', ' ').strip()
+
+
+def get_month_order():
+    return ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 
+            'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember']
+
+
+def extract_username(input_str):
+    if not input_str:
+        return ""
+    s = str(input_str).strip()
+    # Jika merupakan URL posting (/p/shortcode) kembalikan full url (handler lain akan deteksi)
+    if '/p/' in s:
+        return s.rstrip('/')
+    # Jika berupa URL profil, ambil username terakhir
+    if 'instagram.com' in s:
+        parts = s.rstrip('/').split('/')
+        return parts[-1].replace('@','')
+    # Jika berupa shortcode (beberapa input hanya shortcode), biarkan apa adanya
+    return s.replace('@', '').strip()
+
+
+def extract_shortcode(link):
+    """Ambil shortcode dari URL post Instagram (/p/, /reel/, /tv/). None jika bukan URL post"""
+    if not link:
+        return None
+    m = re.search(r'instagram\.com/(?:[^/]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)', str(link))
+    return m.group(1) if m else None
+
+
+def parse_date_str(datestr):
+    """Try to parse several date formats to a datetime.date object"""
+    from datetime import datetime as _dt
+    if not datestr or pd.isna(datestr):
+        return None
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d-%m-%Y"):
+        try:
+            return _dt.strptime(datestr, fmt).date()
+        except Exception:
+            continue
+    try:
+        # fallback: pandas
+        return pd.to_datetime(datestr, dayfirst=True).date()
+    except Exception:
+        return None
+
+
+def period_bounds(year, month=0):
+    """Rentang ISO ('YYYY-MM-DD', 'YYYY-MM-DD') satu tahun (month=0) atau satu bulan,
+    untuk filter BETWEEN pada kolom tanggal_iso / tanggal_acara_iso"""
+    year = int(year)
+    if not month:
+        return f"{year:04d}-01-01", f"{year:04d}-12-31"
+    last_day = calendar.monthrange(year, int(month))[1]
+    return f"{year:04d}-{int(month):02d}-01", f"{year:04d}-{int(month):02d}-{last_day:02d}"
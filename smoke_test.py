@@ -3,11 +3,15 @@
 Run: python smoke_test.py
 This script performs non-destructive checks and a set of simple inserts/updates to validate
 pengajuan <-> dokumentasi_calendar <-> monitoring_pln flows. It uses the same DB file as the app.
+It also runs check_query_plans.py (EXPLAIN QUERY PLAN on a temporary migrated DB) and exits 1
+if any query falls back to a full table scan.
 """
 import sqlite3
 import os
 from datetime import datetime
 
+import check_query_plans
+
 DB_PATH = os.path.abspath("PLN_Ultimate_Monitoring_V7.db")
 
 print("DB path:", DB_PATH)
@@ -99,6 +103,11 @@ cur.execute("SELECT COUNT(*) FROM dokumentasi_calendar")
 print('dokumentasi_calendar:', cur.fetchone()[0])
 cur.execute("SELECT COUNT(*) FROM monitoring_pln")
 print('monitoring_pln:', cur.fetchone()[0])
+conn.close()
+
+print('\nChecking query plans (check_query_plans.py)...')
+if check_query_plans.main([]):
+    print('ERROR: some queries do a full table scan or need an automatic index (see above).')
+    raise SystemExit(1)
 
 print('\nSmoke test finished. If all steps above succeeded, core DB flows are working.')
-conn.close()